@@ -0,0 +1,72 @@
+"""
+Compares two benchmark result files and exits non-zero on regressions.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Direction in which each metric improves.
+HIGHER_IS_BETTER = {"pages_per_sec", "files_per_sec"}
+LOWER_IS_BETTER = {"seconds", "peak_rss_kb", "encoded_bytes_per_page"}
+# Counts that must not grow at all, e.g. heavy modules loaded at import.
+MUST_NOT_GROW = {"eager_imports"}
+
+
+def case_key(result: dict) -> str:
+    return json.dumps([result["name"], result["params"]], sort_keys=True)
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Returns one message per metric that got worse by more than `threshold`."""
+    baseline_cases = {case_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        previous = baseline_cases.get(case_key(result))
+        if previous is None:
+            continue
+        for metric, value in result["metrics"].items():
+            old = previous["metrics"].get(metric)
+            if metric in MUST_NOT_GROW and old is not None and value > old:
+                regressions.append(
+                    f"{result['name']} {result['params']}: {metric} {old} -> {value}"
+                )
+                continue
+            if not old or metric not in HIGHER_IS_BETTER | LOWER_IS_BETTER:
+                continue
+            change = (value - old) / old
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append(
+                    f"{result['name']} {result['params']}: {metric} "
+                    f"{old:.4g} -> {value:.4g} ({change:+.1%} worse)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(args.current, encoding="utf-8") as file:
+        current = json.load(file)
+
+    regressions = compare(baseline, current, args.threshold)
+    for regression in regressions:
+        print(regression)
+    if regressions:
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
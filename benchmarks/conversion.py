@@ -0,0 +1,104 @@
+"""Conversion throughput: pages/sec, peak RSS and encoded bytes per page."""
+
+import multiprocessing
+import resource
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.synthetic import make_dataset
+from datex.conversion import run_conversions
+from datex.conversion.schemas import ConversionTask, RenderSettings
+from datex.conversion.strategies import ConversionStrategy
+
+RENDER_SETTINGS = [
+    RenderSettings(dpi=100),
+    RenderSettings(dpi=200),
+    RenderSettings(dpi=200, image_format="jpeg"),
+    RenderSettings(dpi=200, renderer="pdf2image"),
+    RenderSettings(dpi=200, renderer="pdfium"),
+    RenderSettings(dpi=200, renderer="pdfium", image_format="jpeg"),
+]
+
+
+def peak_rss_kb() -> int:
+    """Peak RSS of this process and its waited-for children (e.g. pdftoppm)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children)
+
+
+def _measure(file_paths: list[Path], settings: RenderSettings, queue) -> None:
+    task = ConversionTask(
+        file_paths=file_paths,
+        strategy=ConversionStrategy.PDF2IMG,
+        requested_at=datetime.now(),
+        render_settings=settings,
+        use_cache=False,
+    )
+    start = time.perf_counter()
+    result = run_conversions(task)
+    elapsed = time.perf_counter() - start
+
+    pages = sum(len(f.parts) for f in result.files)
+    encoded_bytes = sum(len(p.content) for f in result.files for p in f.parts)
+    queue.put(
+        {
+            "seconds": elapsed,
+            "pages": pages,
+            "pages_per_sec": pages / elapsed if elapsed else 0.0,
+            "encoded_bytes_per_page": encoded_bytes / pages if pages else 0.0,
+            "peak_rss_kb": peak_rss_kb(),
+            "errors": len(result.errors),
+        }
+    )
+
+
+def run(
+    workdir: Path,
+    page_counts: list[int],
+    content_types: list[str],
+    files: int,
+) -> list[dict]:
+    """
+    Converts synthetic datasets with every render setting.
+
+    Each case runs in a fresh process so that peak RSS is not inherited from
+    previous cases.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for content in content_types:
+        for pages in page_counts:
+            file_paths = make_dataset(
+                workdir / f"conversion_{content}_{pages}", files, pages, content
+            )
+            # Without poppler, the poppler settings run on pdfium. Rows are
+            # labeled with the renderer that ran, and duplicates are skipped.
+            measured = []
+            for settings in RENDER_SETTINGS:
+                settings = settings.resolved()
+                if settings in measured:
+                    continue
+                measured.append(settings)
+                queue = context.Queue()
+                process = context.Process(
+                    target=_measure, args=(file_paths, settings, queue)
+                )
+                process.start()
+                metrics = queue.get()
+                process.join()
+                results.append(
+                    {
+                        "name": "conversion",
+                        "params": {
+                            "content": content,
+                            "pages": pages,
+                            "files": files,
+                            **settings.model_dump(mode="json"),
+                        },
+                        "metrics": metrics,
+                    }
+                )
+                print(f"conversion {results[-1]['params']}: {metrics}")
+    return results
@@ -0,0 +1,74 @@
+"""Import time of the entry points and CLI startup, each in a fresh interpreter."""
+
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = [
+    "datex.main",
+    "datex.batch",
+    "datex.service",
+    "datex.jobs",
+    "datex.sweep",
+]
+COMMANDS = {
+    "datex --help": ["-m", "datex.main", "--help"],
+    "datex-batch --help": ["-m", "datex.batch", "--help"],
+}
+# Loaded only once a provider or renderer is selected.
+LAZY_MODULES = ["openai", "ollama", "pdf2image", "PIL", "pypdfium2"]
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+lazy = [name for name in {lazy!r} if name in sys.modules]
+print(elapsed, ",".join(lazy))
+"""
+
+
+def _import_seconds(module: str) -> tuple[float, list[str]]:
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            IMPORT_SCRIPT.format(module=module, lazy=LAZY_MODULES),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    seconds, _, loaded = completed.stdout.strip().partition(" ")
+    return float(seconds), [name for name in loaded.split(",") if name]
+
+
+def _command_seconds(args: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def run(repeats: int = 5) -> list[dict]:
+    """Reports the median of `repeats` fresh interpreters per case."""
+    results = []
+    for module in MODULES:
+        samples = [_import_seconds(module) for _ in range(repeats)]
+        metrics = {
+            "seconds": statistics.median(seconds for seconds, _ in samples),
+            "eager_imports": len(samples[0][1]),
+        }
+        results.append(
+            {"name": "import", "params": {"module": module}, "metrics": metrics}
+        )
+        print(f"import {module}: {metrics} {samples[0][1]}")
+    for name, args in COMMANDS.items():
+        metrics = {
+            "seconds": statistics.median(_command_seconds(args) for _ in range(repeats))
+        }
+        results.append(
+            {"name": "startup", "params": {"command": name}, "metrics": metrics}
+        )
+        print(f"startup {name}: {metrics}")
+    return results
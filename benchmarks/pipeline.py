@@ -0,0 +1,116 @@
+"""End-to-end `run_pipeline` throughput against the mock provider."""
+
+import contextlib
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.synthetic import make_dataset
+from datex.conversion.pipeline import run_conversions
+from datex.conversion.schemas import ConversionStrategy, ConversionTask
+from datex.main import run_pipeline
+
+OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "product_name": {"type": "string"},
+        "voltage": {"type": "number"},
+        "release_date": {"type": "string", "format": "date"},
+        "features": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["product_name", "voltage", "release_date", "features"],
+    "additionalProperties": False,
+}
+
+
+def write_inputs(workdir: Path, latency_mean: float, latency_stddev: float):
+    config_path = workdir / "config.json"
+    config_path.write_text(
+        json.dumps(
+            {
+                "provider": "mock",
+                "model_name": "mock",
+                "temperature": 0.1,
+                "top_p": 0.1,
+                "system_prompt": "Benchmark",
+                "user_prompt": "Benchmark",
+                "mock": {
+                    "latency_distribution": "lognormal",
+                    "latency_mean": latency_mean,
+                    "latency_stddev": latency_stddev,
+                    "seed": 0,
+                },
+            }
+        )
+    )
+    schema_path = workdir / "output_schema.json"
+    schema_path.write_text(json.dumps(OUTPUT_SCHEMA))
+    expected_path = workdir / "expected_output.json"
+    expected_path.write_text("{}")
+    return config_path, schema_path, expected_path
+
+
+async def run(
+    workdir: Path,
+    concurrency_levels: list[int],
+    files: int,
+    pages: int,
+    latency_mean: float,
+    latency_stddev: float,
+) -> list[dict]:
+    """
+    Runs the full pipeline once per concurrency level. The conversion cache
+    lives in the workdir and is warmed first, so every level measures the
+    same work: cache lookups and extraction.
+    """
+    dataset_path = workdir / "pipeline_dataset"
+    file_paths = make_dataset(dataset_path, files, pages, "mixed")
+    config_path, schema_path, expected_path = write_inputs(
+        workdir, latency_mean, latency_stddev
+    )
+
+    results = []
+    # The caches are relative to the working directory.
+    with contextlib.chdir(workdir):
+        run_conversions(
+            ConversionTask(
+                file_paths=file_paths,
+                strategy=ConversionStrategy.PDF2IMG,
+                requested_at=datetime.now(),
+            )
+        )
+        for concurrency in concurrency_levels:
+            start = time.perf_counter()
+            extraction_result, _ = await run_pipeline(
+                config_path=config_path,
+                output_schema_path=schema_path,
+                dataset_path=dataset_path,
+                expected_result_path=expected_path,
+                max_concurrency=concurrency,
+            )
+            elapsed = time.perf_counter() - start
+            metrics = {
+                "seconds": elapsed,
+                "files": len(extraction_result.files),
+                "files_per_sec": (
+                    len(extraction_result.files) / elapsed if elapsed else 0.0
+                ),
+                "errors": sum(f.error is not None for f in extraction_result.files),
+                "cache_hit_rate": extraction_result.usage.cache_hit_rate,
+            }
+            results.append(
+                {
+                    "name": "pipeline",
+                    "params": {
+                        "concurrency": concurrency,
+                        "files": files,
+                        "pages": pages,
+                        "latency_mean": latency_mean,
+                        "latency_stddev": latency_stddev,
+                    },
+                    "metrics": metrics,
+                }
+            )
+            print(f"pipeline {results[-1]['params']}: {metrics}")
+    return results
@@ -0,0 +1,92 @@
+"""
+Runs the benchmark suite and stores the results as JSON.
+
+    python -m benchmarks.run --output bench/0.1.0.json
+    python -m benchmarks.compare bench/0.1.0.json bench/current.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from benchmarks import conversion, imports, pipeline
+
+
+def int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def str_list(value: str) -> list[str]:
+    return value.split(",")
+
+
+def environment() -> dict:
+    try:
+        datex_version = version("datex")
+    except PackageNotFoundError:
+        datex_version = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "datex_version": datex_version,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument(
+        "--suite",
+        choices=["all", "conversion", "pipeline", "imports"],
+        default="all",
+    )
+    parser.add_argument("--pages", type=int_list, default=[1, 10, 50])
+    parser.add_argument("--content", type=str_list, default=["text", "image", "mixed"])
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--concurrency", type=int_list, default=[1, 4, 16, 64])
+    parser.add_argument("--pipeline-files", type=int, default=64)
+    parser.add_argument("--latency-mean", type=float, default=0.2)
+    parser.add_argument("--latency-stddev", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = []
+    if args.suite in ("all", "imports"):
+        results += imports.run()
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        if args.suite in ("all", "conversion"):
+            results += conversion.run(workdir, args.pages, args.content, args.files)
+        if args.suite in ("all", "pipeline"):
+            results += asyncio.run(
+                pipeline.run(
+                    workdir,
+                    args.concurrency,
+                    files=args.pipeline_files,
+                    pages=1,
+                    latency_mean=args.latency_mean,
+                    latency_stddev=args.latency_stddev,
+                )
+            )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump({"environment": environment(), "results": results}, file, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Generates synthetic PDF datasets without any third-party dependency."""
+
+import random
+import zlib
+from pathlib import Path
+
+CONTENT_TYPES = ["text", "image", "mixed", "blank"]
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+IMAGE_SIZE = 256
+
+
+def _text_stream(rng: random.Random, lines: int) -> bytes:
+    words = ["voltage", "current", "temperature", "model", "rev", "date", "weight"]
+    commands = ["BT", "/F1 11 Tf", "14 TL", f"50 {PAGE_HEIGHT - 60} Td"]
+    for _ in range(lines):
+        text = " ".join(rng.choice(words) for _ in range(8))
+        value = rng.randint(0, 9999)
+        commands.append(f"({text}: {value}) Tj T*")
+    commands.append("ET")
+    return "\n".join(commands).encode("latin-1")
+
+
+def _image_data(rng: random.Random) -> bytes:
+    # Smooth gradients with noise compress like scanned pages rather than like
+    # random bytes.
+    base = rng.randint(0, 255)
+    rows = bytearray()
+    for y in range(IMAGE_SIZE):
+        for x in range(IMAGE_SIZE):
+            noise = rng.randint(0, 16)
+            rows += bytes(((base + x) % 256, (base + y) % 256, (x + y + noise) % 256))
+    return zlib.compress(bytes(rows))
+
+
+def write_pdf(path: Path, pages: int, content: str, seed: int = 0) -> Path:
+    """
+    Writes a PDF with the given number of pages.
+
+    Args:
+        path: Destination of the PDF.
+        pages: Number of pages.
+        content: One of CONTENT_TYPES.
+        seed: Seed for the generated text and images.
+
+    Returns:
+        The path the PDF was written to.
+    """
+    if content not in CONTENT_TYPES:
+        raise ValueError(f"Unknown content type: {content}")
+    rng = random.Random(seed)
+
+    objects: list[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog_id = add(b"")
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for _ in range(pages):
+        stream = b""
+        resources = f"/Font << /F1 {font_id} 0 R >>"
+        if content in ("image", "mixed"):
+            data = _image_data(rng)
+            image_id = add(
+                f"<< /Type /XObject /Subtype /Image /Width {IMAGE_SIZE} "
+                f"/Height {IMAGE_SIZE} /ColorSpace /DeviceRGB /BitsPerComponent 8 "
+                f"/Filter /FlateDecode /Length {len(data)} >>\nstream\n".encode()
+                + data
+                + b"\nendstream"
+            )
+            resources += f" /XObject << /Im1 {image_id} 0 R >>"
+            height = 300 if content == "mixed" else 700
+            stream += f"q 495 0 0 {height} 50 80 cm /Im1 Do Q\n".encode()
+        if content in ("text", "mixed"):
+            stream += _text_stream(rng, lines=50 if content == "text" else 20)
+
+        content_id = add(
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+        page_ids.append(
+            add(
+                f"<< /Type /Page /Parent {pages_id} 0 R "
+                f"/MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << {resources} >> /Contents {content_id} 0 R >>".encode()
+            )
+        )
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[catalog_id - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode()
+    objects[pages_id - 1] = (
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+    )
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + obj + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root {catalog_id} 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n".encode()
+    )
+
+    path.write_bytes(bytes(output))
+    return path
+
+
+def make_dataset(
+    directory: Path, files: int, pages: int, content: str, seed: int = 0
+) -> list[Path]:
+    """Writes `files` PDFs with `pages` pages each into `directory`."""
+    directory.mkdir(parents=True, exist_ok=True)
+    return [
+        write_pdf(directory / f"{content}_{pages}p_{i}.pdf", pages, content, seed + i)
+        for i in range(files)
+    ]
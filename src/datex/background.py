@@ -0,0 +1,169 @@
+from pathlib import Path
+from typing import Any, Literal
+import asyncio
+import threading
+import time
+import uuid
+from datetime import datetime
+from datex.extraction import run_extractions
+from datex.extraction.schemas import (
+    ExtractedFile,
+    ExtractionConfig,
+    ExtractionResult,
+    ExtractionTask,
+    Usage,
+)
+from datex.conversion import run_conversions
+from datex.conversion.schemas import ConversionTask, ConvertedFile, RenderSettings
+from datex.conversion.strategies import ConversionStrategy
+
+RunStatus = Literal["converting", "extracting", "done", "failed", "cancelled"]
+
+
+class BackgroundRun:
+    """
+    Conversion and extraction of one dataset in its own thread and event
+    loop, so the caller (e.g. a Streamlit script) is never blocked. Progress
+    and finished files can be read at any time from other threads.
+    """
+
+    def __init__(
+        self,
+        config: ExtractionConfig,
+        output_schema: dict[str, Any],
+        file_paths: list[Path],
+        max_concurrency: int | None = None,
+        render_settings: RenderSettings | None = None,
+    ):
+        self.id = uuid.uuid4().hex
+        self.config = config
+        self.output_schema = output_schema
+        self.file_paths = file_paths
+        self.max_concurrency = max_concurrency
+        self.render_settings = render_settings or RenderSettings()
+
+        self.status: RunStatus = "converting"
+        self.error: str | None = None
+        self.converted = 0
+        self.files: list[ExtractedFile] = []
+        self.result: ExtractionResult | None = None
+        self.started_at = datetime.now()
+        self.finished_at: datetime | None = None
+
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._start = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def total(self) -> int:
+        return len(self.file_paths)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def files_per_minute(self) -> float:
+        elapsed = time.monotonic() - self._start
+        return 60 * len(self.files) / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self) -> list[ExtractedFile]:
+        with self._lock:
+            return list(self.files)
+
+    def start(self) -> "BackgroundRun":
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._loop and self._task:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+
+    def _on_result(self, extracted_file: ExtractedFile):
+        with self._lock:
+            self.files.append(extracted_file)
+
+    def _convert(self) -> list[ConvertedFile]:
+        converted_files = []
+        for path in self.file_paths:
+            if self._cancelled.is_set():
+                break
+            conversion_result = run_conversions(
+                ConversionTask(
+                    file_paths=[path],
+                    strategy=ConversionStrategy.PDF2IMG,
+                    render_settings=self.render_settings,
+                    requested_at=datetime.now(),
+                )
+            )
+            converted_files.extend(conversion_result.files)
+            for error in conversion_result.errors:
+                self._on_result(ExtractedFile(file_path=str(path), error=error))
+            self.converted += 1
+        return converted_files
+
+    async def _extract(self, converted_files: list[ConvertedFile]):
+        self._task = asyncio.current_task()
+        if self._cancelled.is_set():
+            raise asyncio.CancelledError()
+        task = ExtractionTask(
+            config=self.config,
+            output_schema=self.output_schema,
+            files=converted_files,
+            max_concurrency=self.max_concurrency,
+        )
+        return await run_extractions(task=task, on_result=self._on_result)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            converted_files = self._convert()
+            self.status = "extracting"
+            self._loop.run_until_complete(self._extract(converted_files))
+            self.status = "done"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+        except Exception as e:
+            self.error = str(e)
+            self.status = "failed"
+        finally:
+            self._loop.close()
+            self.finished_at = datetime.now()
+            files = self.snapshot()
+            # Cancelled and failed runs keep the files finished so far.
+            self.result = ExtractionResult(
+                status="failed" if self.status == "failed" else "success",
+                duration=int((self.finished_at - self.started_at).total_seconds()),
+                files=files,
+                usage=sum((f.usage for f in files if f.usage), Usage()),
+            )
+
+
+class RunRegistry:
+    """Thread-safe registry of background runs, shared by all sessions."""
+
+    def __init__(self, max_finished_runs: int = 50):
+        self.max_finished_runs = max_finished_runs
+        self._runs: dict[str, BackgroundRun] = {}
+        self._lock = threading.Lock()
+
+    def start(self, **kwargs) -> BackgroundRun:
+        run = BackgroundRun(**kwargs)
+        with self._lock:
+            finished = [r for r in self._runs.values() if r.finished]
+            for old_run in finished[: max(0, len(finished) - self.max_finished_runs)]:
+                del self._runs[old_run.id]
+            self._runs[run.id] = run
+        return run.start()
+
+    def get(self, run_id: str) -> BackgroundRun | None:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def active(self) -> list[BackgroundRun]:
+        with self._lock:
+            return [r for r in self._runs.values() if not r.finished]
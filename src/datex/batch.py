@@ -0,0 +1,286 @@
+from dotenv import load_dotenv
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, TextIO
+import argparse
+import asyncio
+import glob
+import sys
+from datetime import datetime
+from datex import jsonio
+from datex.main import (
+    add_renderer_argument,
+    file_path,
+    load_config,
+    prepare_dataset,
+    render_settings,
+)
+from datex.streaming import run_streaming_pipeline
+from datex.extraction.limits import RateBudget
+from datex.extraction.scheduling import schedule_paths
+from datex.extraction.schemas import (
+    ExtractedFile,
+    ExtractionConfig,
+    ExtractionResult,
+    ScheduleOrder,
+)
+from datex.extraction.strategies import ExtractionStrategy
+from datex.evaluation.pipeline import build_comparison_table
+from datex.evaluation.schemas import EvaluationTask
+from datex.conversion.schemas import ConversionTask, RenderSettings
+from datex.conversion.spill import ByteBudget
+from datex.conversion.strategies import ConversionStrategy
+
+load_dotenv()
+
+EXPECTED_RESULT_FILE_NAME = "expected_output.json"
+
+
+def collect_inputs(inputs: list[str]) -> dict[Path, list[Path]]:
+    """
+    Resolves dataset folders, PDF files and glob patterns such as
+    "data/**/*.pdf" into PDFs grouped by their folder. Files that are named
+    more than once are processed once.
+    """
+    groups: dict[Path, list[Path]] = {}
+    seen: set[Path] = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            paths = prepare_dataset(path=path)
+        elif path.is_file():
+            paths = [path]
+        else:
+            paths = sorted(
+                Path(match)
+                for match in glob.glob(item, recursive=True)
+                if match.lower().endswith(".pdf")
+            )
+            if not paths:
+                print(f"No PDFs match {item}", file=sys.stderr)
+        for pdf_path in paths:
+            if pdf_path.resolve() in seen:
+                continue
+            seen.add(pdf_path.resolve())
+            groups.setdefault(pdf_path.parent, []).append(pdf_path)
+    return groups
+
+
+def load_expected(folder: Path) -> dict[str, dict[str, Any]] | None:
+    expected_result_path = folder / EXPECTED_RESULT_FILE_NAME
+    if not expected_result_path.exists():
+        return None
+    return jsonio.load(expected_result_path)
+
+
+def evaluate_file(
+    extracted_file: ExtractedFile,
+    expected: dict[str, Any],
+    output_schema: dict[str, Any],
+) -> dict[str, Any]:
+    """Scores one extracted file against its expected result."""
+    file_name = Path(extracted_file.file_path).name
+    table = build_comparison_table(
+        EvaluationTask(
+            extraction_result=ExtractionResult(
+                status="success", duration=0, files=[extracted_file]
+            ),
+            expected={file_name: expected},
+            output_schema=output_schema,
+        )
+    )
+    document = table.document_metrics()[0]
+    return {
+        "exact_match": document.exact_match,
+        "fields": {
+            field.field: field.exact_match
+            for field in table.field_metrics()
+            if field.count
+        },
+    }
+
+
+class JsonLinesWriter:
+    """Writes one JSON object per line and flushes it right away."""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.count = 0
+
+    def write(self, record: dict[str, Any]):
+        self.stream.write(jsonio.dumps(record).decode("utf-8") + "\n")
+        self.stream.flush()
+        self.count += 1
+
+
+async def run_batch(
+    config: ExtractionConfig,
+    output_schema: dict[str, Any],
+    groups: dict[Path, list[Path]],
+    on_record: Callable[[dict[str, Any]], None],
+    evaluate: bool = False,
+    max_concurrency: int | None = None,
+    requests_per_minute: float | None = None,
+    schedule: ScheduleOrder = ScheduleOrder.LONGEST_FIRST,
+    max_memory_bytes: int = 512 * 2**20,
+    render_settings: RenderSettings | None = None,
+) -> dict[Path, ExtractionResult]:
+    """
+    Streams all groups through conversion and extraction at once. The
+    extractor with its clients, the rate budget and the byte budget are
+    shared by all groups, converted pages come from the shared conversion
+    cache.
+
+    Args:
+        config: The extraction config.
+        output_schema: The output schema.
+        groups: PDFs by folder, see collect_inputs().
+        on_record: Called with one JSON-serializable record per finished file.
+        evaluate: Whether to score files that have an expected result in the
+            expected_output.json of their folder.
+        max_concurrency: Maximum number of concurrent requests over all groups.
+        requests_per_minute: Optional request rate limit over all groups.
+        schedule: The start order of the files of each group.
+        max_memory_bytes: Encoded page data kept in memory, the rest is spilled.
+        render_settings: How the PDFs are rendered.
+
+    Returns:
+        The ExtractionResult of every group.
+    """
+    extractor = ExtractionStrategy(config.provider).strategy_class(
+        config=config, output_schema=output_schema
+    )
+    rate_budget = RateBudget(
+        max_concurrency=max_concurrency, requests_per_minute=requests_per_minute
+    )
+    byte_budget = ByteBudget(max_memory_bytes=max_memory_bytes)
+
+    async def run_group(folder: Path, pdf_paths: list[Path]) -> ExtractionResult:
+        expected = (load_expected(folder) if evaluate else None) or {}
+
+        def on_result(extracted_file: ExtractedFile):
+            file_name = Path(extracted_file.file_path).name
+            record = {
+                "dataset": str(folder),
+                "file_name": file_name,
+                **extracted_file.model_dump(mode="json"),
+            }
+            if file_name in expected:
+                record["evaluation"] = evaluate_file(
+                    extracted_file, expected[file_name], output_schema
+                )
+            on_record(record)
+
+        conversion_task = ConversionTask(
+            file_paths=schedule_paths(pdf_paths, schedule),
+            strategy=ConversionStrategy.PDF2IMG,
+            render_settings=render_settings or RenderSettings(),
+            requested_at=datetime.now(),
+        )
+        return await run_streaming_pipeline(
+            conversion_task=conversion_task,
+            config=config,
+            output_schema=output_schema,
+            byte_budget=byte_budget,
+            on_result=on_result,
+            rate_budget=rate_budget,
+            extractor=extractor,
+        )
+
+    results = await asyncio.gather(
+        *[run_group(folder, pdf_paths) for folder, pdf_paths in groups.items()]
+    )
+    return dict(zip(groups, results))
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Extract many datasets or PDFs and stream one JSON line per file."
+    )
+    parser.add_argument("config_path", type=file_path)
+    parser.add_argument("output_schema_path", type=file_path)
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help='Dataset folders, PDF files or quoted glob patterns like "data/**/*.pdf".',
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Write the JSON lines to this file instead of stdout.",
+    )
+    parser.add_argument(
+        "--evaluate",
+        action="store_true",
+        help="Score files against the expected_output.json of their folder.",
+    )
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--requests-per-minute", type=float, default=None)
+    parser.add_argument(
+        "--schedule",
+        choices=[order.value for order in ScheduleOrder],
+        default=ScheduleOrder.LONGEST_FIRST.value,
+    )
+    parser.add_argument(
+        "--max-memory-mb",
+        type=int,
+        default=512,
+        help="Encoded page data kept in memory, the rest is spilled to disk. "
+        "The files being converted come on top.",
+    )
+    add_renderer_argument(parser)
+
+    args = parser.parse_args()
+    config = load_config(path=args.config_path)
+    output_schema = jsonio.load(args.output_schema_path)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    writer = JsonLinesWriter(output)
+    try:
+        # Progress messages go to stderr, stdout carries only the JSON lines.
+        with redirect_stdout(sys.stderr):
+            groups = collect_inputs(args.inputs)
+            results = await run_batch(
+                config=config,
+                output_schema=output_schema,
+                groups=groups,
+                on_record=writer.write,
+                evaluate=args.evaluate,
+                max_concurrency=args.max_concurrency,
+                requests_per_minute=args.requests_per_minute,
+                schedule=ScheduleOrder(args.schedule),
+                max_memory_bytes=args.max_memory_mb * 2**20,
+                render_settings=render_settings(args),
+            )
+    finally:
+        if args.output:
+            output.close()
+
+    for folder, result in results.items():
+        errors = sum(f.error is not None for f in result.files)
+        summary = (
+            f"{folder}: {len(result.files)} files, {errors} errors, "
+            f"{result.usage.input_tokens} input tokens"
+        )
+        expected = load_expected(folder) if args.evaluate else None
+        if expected:
+            evaluation = build_comparison_table(
+                EvaluationTask(
+                    extraction_result=result,
+                    expected=expected,
+                    output_schema=output_schema,
+                )
+            ).evaluation_result()
+            if evaluation.exact_match is not None:
+                summary += f", exact match {evaluation.exact_match:.1%}"
+        print(summary, file=sys.stderr)
+    print(f"{writer.count} results written.", file=sys.stderr)
+
+
+def cli():
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    cli()
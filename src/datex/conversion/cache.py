@@ -0,0 +1,130 @@
+from pathlib import Path
+import hashlib
+import os
+import threading
+from datex.conversion.schemas import ConvertedFile, RenderSettings
+
+CONVERSION_CACHE_PATH = Path(".cache/datex/conversions")
+CONVERSION_CACHE_MAX_BYTES = 4 * 2**30
+
+
+def conversion_key(
+    file_hash: str, strategy: str, render_settings: RenderSettings
+) -> str:
+    """Identifies the output of converting one file content with one strategy and settings."""
+    settings = render_settings.model_dump_json()
+    return hashlib.sha256(f"{file_hash}\0{strategy}\0{settings}".encode()).hexdigest()
+
+
+class ConversionCache:
+    """
+    Converted files on disk, keyed by the hash of the PDF content and the
+    conversion settings, so that a file is rasterized only once no matter
+    under which name or in which dataset it appears.
+
+    Conversions that are in progress in this process can be marked pending;
+    callers that need the same key wait for them instead of converting the
+    file a second time.
+
+    Once the entries exceed max_bytes, the least recently used ones are
+    deleted until 90% of the limit is left. Reads touch the modification
+    time of an entry, which serves as its last use.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = CONVERSION_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.pending: dict[str, threading.Event] = {}
+        self.lock = threading.Lock()
+        # Total size of the entries, counted on the first write.
+        self.size: int | None = None
+
+    def _entry_path(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def contains(self, key: str) -> bool:
+        return self._entry_path(key).exists()
+
+    def get(self, key: str, file_path: Path) -> ConvertedFile | None:
+        entry_path = self._entry_path(key)
+        try:
+            converted_file = ConvertedFile.model_validate_json(entry_path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass  # Pruned by another process in the meantime.
+        converted_file.file_path = file_path
+        return converted_file
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for entry_path in self.path.glob("*/*.json"):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        return entries
+
+    def prune(self, keep: str | None = None):
+        """Deletes the least recently used entries down to 90% of max_bytes."""
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry_path in entries:
+            if size <= self.max_bytes * 0.9:
+                break
+            if keep and entry_path == self._entry_path(keep):
+                continue
+            entry_path.unlink(missing_ok=True)
+            size -= entry_size
+        self.size = size
+
+    def put(self, key: str, converted_file: ConvertedFile):
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        data = converted_file.model_dump_json().encode("utf-8")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, entry_path)
+        with self.lock:
+            if self.size is None:
+                self.size = sum(entry_size for _, entry_size, _ in self._entries())
+            else:
+                self.size += len(data)
+            if self.size > self.max_bytes:
+                self.prune(keep=key)
+
+    def mark_pending(self, key: str) -> bool:
+        """Returns False if the key is already being converted."""
+        with self.lock:
+            if key in self.pending:
+                return False
+            self.pending[key] = threading.Event()
+            return True
+
+    def unmark_pending(self, key: str):
+        with self.lock:
+            event = self.pending.pop(key, None)
+        if event:
+            event.set()
+
+    def wait_pending(self, keys: list[str], timeout: float | None = None):
+        with self.lock:
+            events = [self.pending[key] for key in keys if key in self.pending]
+        for event in events:
+            event.wait(timeout)
+
+
+_caches: dict[Path, ConversionCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_conversion_cache(path: Path = CONVERSION_CACHE_PATH) -> ConversionCache:
+    """Returns the process-wide cache for a path."""
+    path = path.resolve()
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ConversionCache(path)
+        return _caches[path]
@@ -0,0 +1,80 @@
+from datex.conversion.schemas import (
+    ConversionResult,
+    Part,
+    PartType,
+    ConvertedFile,
+)
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import concurrent.futures
+from datex.conversion.renderers import RendererStrategy
+from datex.conversion.scheduler import get_cpu_budget
+from datex.conversion.strategies import Conversion
+from datex.manifest import read_page_count
+
+
+class ImgPerPageConversion(Conversion):
+    def __call__(self) -> ConversionResult:
+        converted_files: list[ConvertedFile] = []
+        errors = []
+        # Files beyond the CPU budget would only wait for renderer tokens.
+        max_workers = get_cpu_budget().file_workers(len(self.task.file_paths))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_file_path = {
+                executor.submit(self._convert, Path(file_path)): file_path
+                for file_path in self.task.file_paths
+            }
+            for future in concurrent.futures.as_completed(future_to_file_path):
+                file_path = future_to_file_path[future]
+                try:
+                    data = future.result()
+                    converted_files.append(
+                        ConvertedFile(
+                            file_path=file_path,
+                            mime_type=self.task.render_settings.image_format.value,
+                            parts=data,
+                        )
+                    )
+                except Exception as exc:
+                    errors.append(f"Error converting {file_path}: {exc}")
+
+        return ConversionResult(
+            status="success", duration=0, files=converted_files, errors=errors
+        )
+
+    def _convert_to_b64images(self, pdf_path):
+        settings = self.task.render_settings
+        renderer = RendererStrategy(settings.renderer).renderer_class()
+        budget = get_cpu_budget()
+        wanted = budget.page_threads(
+            read_page_count(Path(pdf_path)), len(self.task.file_paths)
+        )
+        if renderer.max_threads:
+            wanted = min(wanted, renderer.max_threads)
+        # One renderer thread or process per token.
+        tokens = budget.acquire(wanted)
+        try:
+            pages = renderer(Path(pdf_path), settings, tokens)
+        finally:
+            budget.release(tokens)
+
+        return [(base64.b64encode(data).decode("utf-8"), size) for data, size in pages]
+
+    def _convert(self, pdf_path: Path) -> list[Part]:
+        input_data = [
+            Part(
+                type=PartType.IMG,
+                content=img,
+                metadata={
+                    "format": self.task.render_settings.image_format.value,
+                    "page": page,
+                    "width": width,
+                    "height": height,
+                },
+            )
+            for page, (img, (width, height)) in enumerate(
+                self._convert_to_b64images(pdf_path), start=1
+            )
+        ]
+        return input_data
@@ -1,10 +1,14 @@
-from datex.conversion.schemas import ConversionTask, ConversionResult
+from datex.conversion.schemas import ConversionTask, ConversionResult, ConvertedFile
+from datex.conversion.cache import conversion_key, get_conversion_cache
+from datex.manifest import hash_files
 from datetime import datetime
 
 
 def run_conversions(task: ConversionTask) -> ConversionResult:
     """
     Runs the conversion process based on the strategy defined in the task.
+    Files that were converted before with the same settings are taken from
+    the conversion cache.
 
     Args:
         task: A ConversionTask object containing file paths and the conversion strategy.
@@ -13,12 +17,85 @@ def run_conversions(task: ConversionTask) -> ConversionResult:
         A ConversionResult object with the outcome of the conversion.
     """
     print(f"Converting files using strategy: {task.strategy.name}...")
+    # Cache keys name the renderer that actually produces the pages.
+    task = task.model_copy(update={"render_settings": task.render_settings.resolved()})
 
-    # Instantiate the strategy class directly from the enum member
-    strategy_instance = task.strategy.strategy_class(task)
+    if not task.use_cache:
+        # Instantiate the strategy class directly from the enum member
+        result = task.strategy.strategy_class(task)()
+        print("Conversion finished.")
+        return result
 
-    # Execute the conversion by calling the strategy instance
-    result = strategy_instance()
+    cache = get_conversion_cache()
+    # Dataset files are looked up in their manifest instead of being hashed.
+    # Unreadable files get no key and are left to the strategy to report.
+    keys = {
+        file_path: conversion_key(file_hash, task.strategy.value, task.render_settings)
+        for file_path, file_hash in hash_files(task.file_paths).items()
+    }
 
+    def lookup(file_paths) -> tuple[list[ConvertedFile], list]:
+        found, missing = [], []
+        for file_path in file_paths:
+            key = keys.get(file_path)
+            converted_file = cache.get(key, file_path) if key else None
+            if converted_file:
+                found.append(converted_file)
+            else:
+                missing.append(file_path)
+        return found, missing
+
+    cached_files, missing = lookup(task.file_paths)
+
+    # Files that another thread is converting right now are waited for
+    # instead of being converted twice.
+    owned, to_convert, duplicates = [], [], []
+    while missing:
+        others = []
+        for file_path in missing:
+            key = keys.get(file_path)
+            if key is None:
+                to_convert.append(file_path)
+            elif key in owned:
+                duplicates.append(file_path)
+            elif not cache.mark_pending(key):
+                others.append(file_path)
+            elif converted_file := cache.get(key, file_path):
+                cache.unmark_pending(key)
+                cached_files.append(converted_file)
+            else:
+                owned.append(key)
+                to_convert.append(file_path)
+        if others:
+            cache.wait_pending([keys[p] for p in others])
+        found, missing = lookup(others)
+        cached_files.extend(found)
+    print(
+        f"{len(cached_files) + len(duplicates)} of {len(task.file_paths)} "
+        "files from cache."
+    )
+
+    result = ConversionResult(status="success", duration=0, files=[], errors=[])
+    try:
+        if to_convert:
+            # Instantiate the strategy class directly from the enum member
+            strategy_instance = task.strategy.strategy_class(
+                task.model_copy(update={"file_paths": to_convert})
+            )
+            result = strategy_instance()
+            for converted_file in result.files:
+                key = keys.get(converted_file.file_path)
+                if key:
+                    cache.put(key, converted_file)
+            # Files with the same content as another file of the task.
+            for file_path in duplicates:
+                converted_file = cache.get(keys[file_path], file_path)
+                if converted_file:
+                    result.files.append(converted_file)
+    finally:
+        for key in owned:
+            cache.unmark_pending(key)
+
+    result.files = cached_files + result.files
     print("Conversion finished.")
     return result
@@ -0,0 +1,102 @@
+from pydantic import BaseModel
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+import threading
+from datex.conversion.cache import conversion_key, get_conversion_cache
+from datex.conversion.pipeline import run_conversions
+from datex.conversion.schemas import ConversionTask, RenderSettings
+from datex.conversion.strategies import ConversionStrategy
+from datex.manifest import update_manifest
+
+
+class DatasetReadiness(BaseModel):
+    total: int
+    converted: int
+    pending: int
+    failed: list[str]
+
+    @property
+    def ready(self) -> bool:
+        return self.converted == self.total
+
+
+class PreconversionPool:
+    """
+    Converts files in the background as soon as they are added to a dataset,
+    so that the conversion cache is warm when the next run starts.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        strategy: ConversionStrategy = ConversionStrategy.PDF2IMG,
+        render_settings: RenderSettings | None = None,
+    ):
+        self.strategy = strategy
+        self.render_settings = (render_settings or RenderSettings()).resolved()
+        self.cache = get_conversion_cache()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="preconversion"
+        )
+        self.futures: dict[str, Future] = {}
+        self.errors: dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def _key(self, sha256: str) -> str:
+        return conversion_key(sha256, self.strategy.value, self.render_settings)
+
+    def _convert(self, key: str, file_path: Path):
+        result = run_conversions(
+            ConversionTask(
+                file_paths=[file_path],
+                strategy=self.strategy,
+                render_settings=self.render_settings,
+                requested_at=datetime.now(),
+            )
+        )
+        if result.errors:
+            with self.lock:
+                self.errors[key] = "; ".join(result.errors)
+
+    def submit_dataset(self, dataset_path: Path) -> int:
+        """
+        Queues every file of the dataset that is neither cached nor queued.
+
+        Returns:
+            The number of newly queued files.
+        """
+        manifest = update_manifest(dataset_path=dataset_path)
+        queued = 0
+        with self.lock:
+            for name, entry in manifest.files.items():
+                key = self._key(entry.sha256)
+                future = self.futures.get(key)
+                if (future and not future.done()) or self.cache.contains(key):
+                    continue
+                self.errors.pop(key, None)
+                self.futures[key] = self.executor.submit(
+                    self._convert, key, dataset_path / name
+                )
+                queued += 1
+        return queued
+
+    def readiness(self, dataset_path: Path) -> DatasetReadiness:
+        manifest = update_manifest(dataset_path=dataset_path)
+        converted, pending, failed = 0, 0, []
+        with self.lock:
+            for name, entry in manifest.files.items():
+                key = self._key(entry.sha256)
+                future = self.futures.get(key)
+                if self.cache.contains(key):
+                    converted += 1
+                elif key in self.errors:
+                    failed.append(f"{name}: {self.errors[key]}")
+                elif future is not None and not future.done():
+                    pending += 1
+        return DatasetReadiness(
+            total=len(manifest.files),
+            converted=converted,
+            pending=pending,
+            failed=failed,
+        )
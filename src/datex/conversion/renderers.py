@@ -0,0 +1,208 @@
+from enum import Enum
+from typing import Protocol, Type
+from io import BytesIO
+from pathlib import Path
+import subprocess
+import tempfile
+import threading
+from PIL import Image
+from datex.conversion.schemas import ImageFormat, RenderSettings, RendererBackend
+from datex.manifest import read_page_count
+
+# Encoded image bytes and (width, height) of one page.
+RenderedPage = tuple[bytes, tuple[int, int]]
+
+
+def _encode_image(image: Image.Image, settings: RenderSettings) -> bytes:
+    byte_io = BytesIO()
+    if settings.image_format == ImageFormat.JPEG:
+        image.convert("RGB").save(byte_io, format="JPEG", quality=settings.jpeg_quality)
+    else:
+        image.save(byte_io, format="PNG")
+    return byte_io.getvalue()
+
+
+class Renderer(Protocol):
+    # Most CPU tokens the renderer can use for one file, None for no limit.
+    max_threads: int | None
+
+    def __call__(
+        self, pdf_path: Path, settings: RenderSettings, thread_count: int
+    ) -> list[RenderedPage]: ...
+
+
+class Pdf2ImageRenderer(Renderer):
+    """
+    pdftoppm through pdf2image: PPM output is parsed into PIL images and
+    encoded again.
+    """
+
+    max_threads = None
+
+    def __call__(
+        self, pdf_path: Path, settings: RenderSettings, thread_count: int
+    ) -> list[RenderedPage]:
+        from pdf2image import convert_from_path
+
+        images = convert_from_path(
+            pdf_path=pdf_path, dpi=settings.dpi, thread_count=thread_count
+        )
+        return [(_encode_image(image, settings), image.size) for image in images]
+
+
+class PdftoppmRenderer(Renderer):
+    """
+    pdftoppm writes PNG or JPEG files directly, the pages are read back
+    without decoding. Pages are split into ranges, one process per thread.
+    The page count the ranges are based on is an estimate: the last range
+    is open-ended, and if a range lies beyond the end of the document, the
+    file is rendered again by a single process.
+    """
+
+    max_threads = None
+
+    def _page_ranges(
+        self, pdf_path: Path, thread_count: int
+    ) -> list[tuple[int, int | None] | None]:
+        page_count = read_page_count(pdf_path)
+        if not page_count or thread_count <= 1:
+            return [None]
+        thread_count = min(thread_count, page_count)
+        size, rest = divmod(page_count, thread_count)
+        ranges = []
+        first = 1
+        for i in range(thread_count):
+            last = first + size - 1 + (1 if i < rest else 0)
+            ranges.append((first, last))
+            first = last + 1
+        # Pages beyond an undercounted page count go to the last process.
+        ranges[-1] = (ranges[-1][0], None)
+        return ranges
+
+    def _render(
+        self,
+        pdf_path: Path,
+        output_prefix: str,
+        args: list[str],
+        page_ranges: list[tuple[int, int | None] | None],
+    ) -> list[str]:
+        """Runs one pdftoppm process per range, returns their error messages."""
+        processes = []
+        try:
+            for page_range in page_ranges:
+                range_args = []
+                if page_range:
+                    range_args += ["-f", str(page_range[0])]
+                    if page_range[1] is not None:
+                        range_args += ["-l", str(page_range[1])]
+                processes.append(
+                    subprocess.Popen(
+                        [*args, *range_args, str(pdf_path), output_prefix],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.PIPE,
+                    )
+                )
+        except FileNotFoundError:
+            raise RuntimeError(
+                "pdftoppm is not installed or not on PATH, install poppler "
+                "or datex[pdfium] and use the pdfium renderer"
+            )
+        finally:
+            errors = []
+            for process in processes:
+                _, stderr = process.communicate()
+                if process.returncode:
+                    errors.append(stderr.decode(errors="replace").strip())
+        return errors
+
+    def __call__(
+        self, pdf_path: Path, settings: RenderSettings, thread_count: int
+    ) -> list[RenderedPage]:
+        if settings.image_format == ImageFormat.JPEG:
+            format_args = ["-jpeg", "-jpegopt", f"quality={settings.jpeg_quality}"]
+        else:
+            format_args = ["-png"]
+        args = ["pdftoppm", "-r", str(settings.dpi), *format_args]
+
+        with tempfile.TemporaryDirectory(prefix="datex-pdftoppm-") as output_dir:
+            output_prefix = str(Path(output_dir) / "page")
+            page_ranges = self._page_ranges(pdf_path, thread_count)
+            errors = self._render(pdf_path, output_prefix, args, page_ranges)
+            if errors and page_ranges != [None]:
+                # E.g. an overcounted page count, render the whole file at once.
+                for page_file in Path(output_dir).iterdir():
+                    page_file.unlink()
+                errors = self._render(pdf_path, output_prefix, args, [None])
+            if errors:
+                raise RuntimeError(f"pdftoppm failed: {'; '.join(errors)}")
+
+            # Files are named page-<n>.<ext>, zero padded to the page count.
+            page_files = sorted(
+                Path(output_dir).iterdir(),
+                key=lambda path: int(path.stem.rsplit("-", 1)[1]),
+            )
+            pages = []
+            for page_file in page_files:
+                data = page_file.read_bytes()
+                # Only the header is read to get the size.
+                with Image.open(BytesIO(data)) as image:
+                    pages.append((data, image.size))
+            return pages
+
+
+# pdfium must not be called from several threads at once, not even for
+# different documents.
+_pdfium_lock = threading.Lock()
+
+
+class PdfiumRenderer(Renderer):
+    """
+    Renders in process with pypdfium2 into a bitmap buffer and encodes it
+    once. Needs the `pdfium` extra.
+    """
+
+    max_threads = 1
+
+    def __call__(
+        self, pdf_path: Path, settings: RenderSettings, thread_count: int
+    ) -> list[RenderedPage]:
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            raise RuntimeError(
+                "The pdfium renderer needs pypdfium2, install datex[pdfium]"
+            )
+
+        pages = []
+        with _pdfium_lock:
+            document = pdfium.PdfDocument(pdf_path)
+        try:
+            for index in range(len(document)):
+                with _pdfium_lock:
+                    page = document[index]
+                    bitmap = page.render(scale=settings.dpi / 72)
+                    page.close()
+                try:
+                    # The image shares the bitmap buffer, encoding runs
+                    # outside the lock while other threads render.
+                    image = bitmap.to_pil()
+                    pages.append((_encode_image(image, settings), image.size))
+                finally:
+                    with _pdfium_lock:
+                        bitmap.close()
+        finally:
+            with _pdfium_lock:
+                document.close()
+        return pages
+
+
+class RendererStrategy(Enum):
+    PDF2IMAGE = (RendererBackend.PDF2IMAGE, Pdf2ImageRenderer)
+    PDFTOPPM = (RendererBackend.PDFTOPPM, PdftoppmRenderer)
+    PDFIUM = (RendererBackend.PDFIUM, PdfiumRenderer)
+
+    def __new__(cls, value: RendererBackend, renderer_class: Type[Renderer]):
+        member = object.__new__(cls)
+        member._value_ = value
+        member.renderer_class = renderer_class
+        return member
@@ -0,0 +1,62 @@
+import os
+import threading
+
+
+class CpuBudget:
+    """
+    Process-wide pool of CPU tokens. Every running renderer process or thread
+    holds one token, so nested thread pools and concurrent conversions together never
+    run more renderers than there are CPUs.
+    """
+
+    def __init__(self, total: int):
+        self.total = max(1, total)
+        self.available = self.total
+        self.condition = threading.Condition()
+
+    def acquire(self, wanted: int) -> int:
+        """
+        Blocks until at least one token is free, then takes up to `wanted`.
+
+        Returns:
+            The number of tokens taken.
+        """
+        wanted = max(1, min(wanted, self.total))
+        with self.condition:
+            self.condition.wait_for(lambda: self.available > 0)
+            taken = min(wanted, self.available)
+            self.available -= taken
+            return taken
+
+    def release(self, tokens: int):
+        with self.condition:
+            self.available += tokens
+            self.condition.notify_all()
+
+    def file_workers(self, n_files: int) -> int:
+        """Number of files to convert at once, never more than the budget."""
+        return max(1, min(n_files, self.total))
+
+    def page_threads(self, pages: int | None, n_files: int) -> int:
+        """
+        Splits the budget between files and pages: a few large PDFs get
+        several renderers each, many small PDFs one each.
+        """
+        share = max(1, self.total // max(1, n_files))
+        return max(1, min(pages or 1, share))
+
+
+_cpu_budget: CpuBudget | None = None
+_cpu_budget_lock = threading.Lock()
+
+
+def get_cpu_budget() -> CpuBudget:
+    """Returns the process-wide budget, sized by DATEX_CPUS or the available CPUs."""
+    global _cpu_budget
+    with _cpu_budget_lock:
+        if _cpu_budget is None:
+            total = os.environ.get("DATEX_CPUS")
+            _cpu_budget = CpuBudget(
+                int(total) if total else (os.process_cpu_count() or 1)
+            )
+        return _cpu_budget
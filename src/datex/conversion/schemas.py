@@ -1,9 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from enum import Enum
 from datetime import datetime
 from typing import Literal
-from datex.conversion.strategies import ConversionStrategy
 from pathlib import Path
+import functools
+import hashlib
+import importlib.util
+import shutil
 
 
 class PartType(str, Enum):
@@ -11,10 +14,72 @@ class PartType(str, Enum):
     TEXT = "text"
 
 
+class ImageFormat(str, Enum):
+    PNG = "png"
+    JPEG = "jpeg"
+
+
+class RendererBackend(str, Enum):
+    PDF2IMAGE = "pdf2image"
+    PDFTOPPM = "pdftoppm"
+    PDFIUM = "pdfium"
+
+
+@functools.cache
+def _pdfium_replaces_poppler() -> bool:
+    """Whether poppler's pdftoppm is missing and pypdfium2 can stand in."""
+    if shutil.which("pdftoppm") or importlib.util.find_spec("pypdfium2") is None:
+        return False
+    print("pdftoppm is not installed, rendering with pdfium instead.")
+    return True
+
+
+class RenderSettings(BaseModel):
+    renderer: RendererBackend = RendererBackend.PDFTOPPM
+    dpi: int = Field(default=200, gt=0)
+    image_format: ImageFormat = ImageFormat.PNG
+    jpeg_quality: int = Field(default=85, ge=1, le=95)
+
+    def resolved(self) -> "RenderSettings":
+        """
+        Returns the settings with the renderer that is available here. The
+        poppler renderers fall back to pdfium if pdftoppm is not installed.
+        """
+        if self.renderer != RendererBackend.PDFIUM and _pdfium_replaces_poppler():
+            return self.model_copy(update={"renderer": RendererBackend.PDFIUM})
+        return self
+
+
+class SpillRef(BaseModel):
+    """Location of a part's content that was moved from memory to a spill file."""
+
+    path: str
+    offset: int
+    length: int
+
+
 class Part(BaseModel):
     type: PartType
     content: str
     metadata: dict = Field(default={})
+    spill: SpillRef | None = None
+    _content_hash: str | None = PrivateAttr(default=None)
+
+    def load_content(self) -> str:
+        """Returns the content, reading it back from the spill file if it was spilled."""
+        if self.spill is None:
+            return self.content
+        from datex.conversion.spill import read_spilled
+
+        return read_spilled(self.spill)
+
+    def content_hash(self) -> str:
+        """SHA-256 of the content, computed once per part."""
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(
+                self.load_content().encode("utf-8")
+            ).hexdigest()
+        return self._content_hash
 
 
 class ConvertedFile(BaseModel):
@@ -30,7 +95,13 @@ class ConversionResult(BaseModel):
     errors: list[str]
 
 
+# Imported after the models above because the strategies module depends on them.
+from datex.conversion.strategies import ConversionStrategy  # noqa: E402
+
+
 class ConversionTask(BaseModel):
     file_paths: list[Path]
     requested_at: datetime
     strategy: ConversionStrategy
+    render_settings: RenderSettings = Field(default_factory=RenderSettings)
+    use_cache: bool = True
@@ -0,0 +1,127 @@
+from pathlib import Path
+import mmap
+import os
+import tempfile
+import threading
+from datex.conversion.schemas import ConvertedFile, PartType, SpillRef
+
+_maps: dict[str, mmap.mmap] = {}
+_maps_lock = threading.Lock()
+
+
+def read_spilled(ref: SpillRef) -> str:
+    """
+    Reads spilled content back through a memory map of its spill file. The
+    map avoids reading the whole file, but the returned string is a copy of
+    the part's content that lives as long as the caller keeps it.
+    """
+    with _maps_lock:
+        data = _maps.get(ref.path)
+        if data is None:
+            with open(ref.path, "rb") as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            _maps[ref.path] = data
+    return str(memoryview(data)[ref.offset : ref.offset + ref.length], "ascii")
+
+
+def _close_map(path: str):
+    with _maps_lock:
+        data = _maps.pop(path, None)
+    if data is not None:
+        try:
+            data.close()
+        except BufferError:
+            pass  # A reader still holds a view, the map closes with it.
+
+
+class Reservation:
+    """Bytes that one converted file holds in memory and on disk."""
+
+    def __init__(
+        self, memory: int = 0, spilled: int = 0, spill_path: str | None = None
+    ):
+        self.memory = memory
+        self.spilled = spilled
+        self.spill_path = spill_path
+
+
+class ByteBudget:
+    """
+    Caps the encoded bytes of converted files that are waiting for or in
+    extraction. Up to max_memory_bytes stay in memory, the rest is spilled
+    to temp files. Once max_in_flight_bytes are reached, admit() blocks until
+    finished files are released, which pauses the conversion.
+
+    Files are admitted once they are fully converted, so on top of the
+    budget the pages of the file in conversion are held, and a request
+    holds its spilled pages while it is sent.
+
+        budget = ByteBudget(max_memory_bytes=512 * 2**20)
+        reservation = budget.admit(converted_file)  # may block and spill
+        ...
+        budget.release(reservation)
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int,
+        max_in_flight_bytes: int | None = None,
+        spill_dir: Path | None = None,
+    ):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_in_flight_bytes = max_in_flight_bytes or 8 * max_memory_bytes
+        self.spill_dir = spill_dir
+        self.memory = 0
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def admit(self, converted_file: ConvertedFile) -> Reservation:
+        """
+        Waits until the file fits into the in-flight budget, then spills its
+        images that do not fit into the memory budget.
+        """
+        images = [p for p in converted_file.parts if p.type == PartType.IMG]
+        size = sum(len(p.content) for p in images)
+        with self.condition:
+            # A file larger than the whole budget is admitted alone.
+            self.condition.wait_for(
+                lambda: self.in_flight == 0
+                or self.in_flight + size <= self.max_in_flight_bytes
+            )
+            self.in_flight += size
+            in_memory = 0
+            to_spill = []
+            for part in images:
+                if self.memory + in_memory + len(part.content) <= self.max_memory_bytes:
+                    in_memory += len(part.content)
+                else:
+                    to_spill.append(part)
+            self.memory += in_memory
+
+        reservation = Reservation(memory=in_memory, spilled=size - in_memory)
+        if to_spill:
+            reservation.spill_path = self._spill(to_spill)
+        return reservation
+
+    def _spill(self, parts) -> str:
+        fd, spill_path = tempfile.mkstemp(
+            prefix="datex-spill-", suffix=".b64", dir=self.spill_dir
+        )
+        offset = 0
+        with os.fdopen(fd, "wb") as file:
+            for part in parts:
+                data = part.content.encode("ascii")
+                file.write(data)
+                part.spill = SpillRef(path=spill_path, offset=offset, length=len(data))
+                part.content = ""
+                offset += len(data)
+        return spill_path
+
+    def release(self, reservation: Reservation):
+        if reservation.spill_path:
+            _close_map(reservation.spill_path)
+            Path(reservation.spill_path).unlink(missing_ok=True)
+        with self.condition:
+            self.memory -= reservation.memory
+            self.in_flight -= reservation.memory + reservation.spilled
+            self.condition.notify_all()
@@ -0,0 +1,3 @@
+from datex.evaluation.pipeline import run_evaluation
+
+__all__ = ["run_evaluation"]
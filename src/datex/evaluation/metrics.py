@@ -0,0 +1,87 @@
+import numpy as np
+
+
+def normalize_text(value: str) -> str:
+    return " ".join(value.split()).casefold()
+
+
+def _string_owners(strings: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encodes all strings into one UTF-32 buffer.
+
+    Returns:
+        The code points and, for each code point, the index of its string.
+    """
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    codes = np.frombuffer("".join(strings).encode("utf-32-le"), dtype=np.uint32)
+    owners = np.repeat(np.arange(len(strings)), lengths)
+    return codes.astype(np.int64), owners
+
+
+def multiset_intersection(
+    rows: np.ndarray, sides: np.ndarray, codes: np.ndarray, n_rows: int
+) -> np.ndarray:
+    """
+    Counts, per row, how many items of side 0 also occur on side 1 (with
+    multiplicity).
+
+    Args:
+        rows: Row index of every item.
+        sides: 0 or 1 for every item.
+        codes: Integer code of every item.
+        n_rows: Number of rows.
+    """
+    if len(codes) == 0:
+        return np.zeros(n_rows)
+    _, dense_codes = np.unique(codes, return_inverse=True)
+    n_codes = int(dense_codes.max()) + 1
+    keys = rows.astype(np.int64) * n_codes + dense_codes
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    count_a = np.bincount(inverse, weights=sides == 0, minlength=len(unique_keys))
+    count_b = np.bincount(inverse, weights=sides == 1, minlength=len(unique_keys))
+    return np.bincount(
+        unique_keys // n_codes,
+        weights=np.minimum(count_a, count_b),
+        minlength=n_rows,
+    )
+
+
+def bigram_dice(a: list[str], b: list[str]) -> np.ndarray:
+    """
+    Computes the Dice coefficient of the character bigram multisets of every
+    pair (a[i], b[i]) without a Python loop over characters or pairs.
+    Strings without bigrams score 1.0 if equal and 0.0 otherwise.
+    """
+    equal = np.array(a, dtype=object) == np.array(b, dtype=object)
+    scores = equal.astype(float)
+    different = np.nonzero(~equal)[0]
+    n = len(different)
+    if n == 0:
+        return scores
+    a = [a[i] for i in different]
+    b = [b[i] for i in different]
+    codes, owners = _string_owners(a + b)
+
+    # A bigram starts at every code point that is followed by one of the same string.
+    starts = np.nonzero(owners[:-1] == owners[1:])[0]
+    bigrams = (codes[starts] << 21) | codes[starts + 1]
+    bigram_owners = owners[starts]
+
+    bigram_counts = np.bincount(bigram_owners, minlength=2 * n)
+    total = bigram_counts[:n] + bigram_counts[n:]
+    intersection = multiset_intersection(
+        bigram_owners % n, bigram_owners // n, bigrams, n
+    )
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores[different] = np.where(total > 0, 2 * intersection / total, 0.0)
+    return scores
+
+
+def numeric_close(
+    extracted: np.ndarray, expected: np.ndarray, rtol: float, atol: float
+) -> np.ndarray:
+    """1.0 if both values are numbers within tolerance, 0.0 if not, NaN if not numeric."""
+    comparable = ~np.isnan(extracted) & ~np.isnan(expected)
+    close = np.abs(extracted - expected) <= atol + rtol * np.abs(expected)
+    return np.where(comparable, close.astype(float), np.nan)
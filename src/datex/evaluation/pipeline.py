@@ -0,0 +1,340 @@
+from datex.evaluation.schemas import (
+    DocumentMetrics,
+    EvaluationResult,
+    EvaluationTask,
+    FieldMetrics,
+)
+from datex.evaluation.metrics import (
+    bigram_dice,
+    multiset_intersection,
+    normalize_text,
+    numeric_close,
+)
+from pathlib import Path
+from typing import Any
+import json
+import math
+import numpy as np
+
+MISSING = object()
+
+
+def schema_fields(schema: dict[str, Any], prefix: str = "") -> list[tuple[str, bool]]:
+    """
+    Lists the leaf fields of an object schema as (dotted path, is list) tuples.
+    Nested objects are flattened, arrays are compared as a whole.
+    """
+    fields = []
+    for name, props in schema.get("properties", {}).items():
+        path = f"{prefix}{name}"
+        if props.get("type") == "object" and "properties" in props:
+            fields.extend(schema_fields(props, prefix=f"{path}."))
+        else:
+            fields.append((path, props.get("type") == "array"))
+    return fields
+
+
+def inferred_fields(expected: dict[str, dict[str, Any]]) -> list[tuple[str, bool]]:
+    """Derives the fields from the expected results if no schema is available."""
+    fields: dict[str, bool] = {}
+
+    def visit(data: dict[str, Any], prefix: str):
+        for name, value in data.items():
+            path = f"{prefix}{name}"
+            if isinstance(value, dict):
+                visit(value, f"{path}.")
+            else:
+                fields[path] = fields.get(path, False) or isinstance(value, list)
+
+    for data in expected.values():
+        visit(data, "")
+    return list(fields.items())
+
+
+def get_path(data: Any, keys: list[str]) -> Any:
+    for key in keys:
+        if not isinstance(data, dict) or key not in data:
+            return MISSING
+        data = data[key]
+    return data
+
+
+def canonical(value: Any) -> str:
+    """
+    Normalized text form used for exact matching. None and empty strings are
+    treated as equal, as are numbers with the same value.
+    """
+    value_type = type(value)
+    if value_type is str:
+        return normalize_text(value)
+    if value is None or value is MISSING:
+        return ""
+    if value_type is bool:
+        return "true" if value else "false"
+    if value_type is float and value.is_integer():
+        return str(int(value))
+    if value_type in (int, float):
+        return str(value)
+    if value_type is dict:
+        return json.dumps({k: canonical(v) for k, v in value.items()}, sort_keys=True)
+    return json.dumps([canonical(v) for v in value])
+
+
+NUMBER_START = set("0123456789+-.")
+
+
+def as_number(value: Any) -> float:
+    value_type = type(value)
+    if value_type in (int, float):
+        return float(value)
+    if value_type is str and value[:1] in NUMBER_START:
+        try:
+            return float(value)
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+class ComparisonTable:
+    """
+    Columnar comparison of extracted and expected values with one row per
+    document and field that has an expected value. Metric columns hold NaN
+    where a metric does not apply to a row.
+    """
+
+    def __init__(
+        self,
+        documents: list[str],
+        fields: list[tuple[str, bool]],
+        errors: dict[str, str],
+        doc_index: np.ndarray,
+        field_index: np.ndarray,
+        extracted: np.ndarray,
+        expected: np.ndarray,
+        exact: np.ndarray,
+        similarity: np.ndarray,
+        numeric: np.ndarray,
+        precision: np.ndarray,
+        recall: np.ndarray,
+    ):
+        self.documents = documents
+        self.fields = fields
+        self.errors = errors
+        self.doc_index = doc_index
+        self.field_index = field_index
+        self.extracted = extracted
+        self.expected = expected
+        self.exact = exact
+        self.similarity = similarity
+        self.numeric = numeric
+        self.precision = precision
+        self.recall = recall
+
+    def __len__(self) -> int:
+        return len(self.doc_index)
+
+    @staticmethod
+    def _mean_by(index: np.ndarray, values: np.ndarray, n: int) -> list[float | None]:
+        valid = ~np.isnan(values)
+        sums = np.bincount(index[valid], weights=values[valid], minlength=n)
+        counts = np.bincount(index[valid], minlength=n)
+        return [float(s / c) if c else None for s, c in zip(sums, counts)]
+
+    def field_metrics(self) -> list[FieldMetrics]:
+        n = len(self.fields)
+        counts = np.bincount(self.field_index, minlength=n)
+        columns = {
+            "exact_match": self._mean_by(self.field_index, self.exact, n),
+            "similarity": self._mean_by(self.field_index, self.similarity, n),
+            "numeric_match": self._mean_by(self.field_index, self.numeric, n),
+            "precision": self._mean_by(self.field_index, self.precision, n),
+            "recall": self._mean_by(self.field_index, self.recall, n),
+        }
+        return [
+            FieldMetrics(
+                field=name,
+                kind="list" if is_list else "scalar",
+                count=int(counts[i]),
+                **{metric: values[i] for metric, values in columns.items()},
+            )
+            for i, (name, is_list) in enumerate(self.fields)
+        ]
+
+    def evaluation_result(self) -> EvaluationResult:
+        return EvaluationResult(
+            exact_match=float(np.nanmean(self.exact)) if len(self) else None,
+            fields=self.field_metrics(),
+            documents=self.document_metrics(),
+        )
+
+    def document_metrics(self) -> list[DocumentMetrics]:
+        n = len(self.documents)
+        counts = np.bincount(self.doc_index, minlength=n)
+        exact = self._mean_by(self.doc_index, self.exact, n)
+        return [
+            DocumentMetrics(
+                file_name=name,
+                count=int(counts[i]),
+                exact_match=exact[i],
+                error=self.errors.get(name),
+            )
+            for i, name in enumerate(self.documents)
+        ]
+
+
+def build_comparison_table(task: EvaluationTask) -> ComparisonTable:
+    """
+    Flattens the extracted and expected results into columns and scores all
+    rows at once.
+    """
+    extracted_by_name = {
+        Path(f.file_path).name: f for f in task.extraction_result.files
+    }
+    documents = sorted(task.expected)
+    if task.output_schema:
+        fields = schema_fields(task.output_schema)
+    else:
+        fields = inferred_fields(task.expected)
+    errors = {
+        name: extracted_by_name[name].error
+        for name in documents
+        if name in extracted_by_name and extracted_by_name[name].error
+    }
+
+    field_keys = list(enumerate(path.split(".") for path, _ in fields))
+    doc_index, field_index = [], []
+    extracted_values, expected_values = [], []
+    for d, name in enumerate(documents):
+        expected_data = task.expected[name]
+        extracted_file = extracted_by_name.get(name)
+        extracted_data = extracted_file.data if extracted_file else None
+        for f, keys in field_keys:
+            expected_value = get_path(expected_data, keys)
+            if expected_value is MISSING:
+                continue
+            doc_index.append(d)
+            field_index.append(f)
+            extracted_values.append(get_path(extracted_data, keys))
+            expected_values.append(expected_value)
+
+    n = len(doc_index)
+    doc_index_arr = np.array(doc_index, dtype=np.int64)
+    field_index_arr = np.array(field_index, dtype=np.int64)
+    field_is_list = np.array([is_list for _, is_list in fields], dtype=bool)
+    is_list_arr = field_is_list[field_index_arr]
+    extracted_arr = np.empty(n, dtype=object)
+    extracted_arr[:] = [None if v is MISSING else v for v in extracted_values]
+    expected_arr = np.empty(n, dtype=object)
+    expected_arr[:] = expected_values
+
+    exact = np.full(n, np.nan)
+    similarity = np.full(n, np.nan)
+    numeric = np.full(n, np.nan)
+    precision = np.full(n, np.nan)
+    recall = np.full(n, np.nan)
+
+    # Scalars: exact match and string similarity on the normalized text,
+    # tolerance check where both sides are numbers.
+    scalar_rows = np.nonzero(~is_list_arr)[0]
+    texts: dict[Any, str] = {}
+
+    def cached_canonical(value):
+        # Values repeat a lot across documents (units, nulls, enums).
+        if type(value) is str:
+            if value not in texts:
+                texts[value] = canonical(value)
+            return texts[value]
+        return canonical(value)
+
+    extracted_text = [cached_canonical(extracted_values[i]) for i in scalar_rows]
+    expected_text = [cached_canonical(expected_values[i]) for i in scalar_rows]
+    exact[scalar_rows] = np.array(extracted_text, dtype=object) == np.array(
+        expected_text, dtype=object
+    )
+    similarity[scalar_rows] = bigram_dice(extracted_text, expected_text)
+    numeric[scalar_rows] = numeric_close(
+        np.array([as_number(extracted_values[i]) for i in scalar_rows]),
+        np.array([as_number(expected_values[i]) for i in scalar_rows]),
+        rtol=task.numeric_rtol,
+        atol=task.numeric_atol,
+    )
+
+    # Lists: items are compared as multisets of their normalized text.
+    list_rows = np.nonzero(is_list_arr)[0]
+    item_codes: dict[str, int] = {}
+    rows, sides, codes = [], [], []
+    lengths = np.zeros((len(list_rows), 2))
+    for r, i in enumerate(list_rows):
+        for side, value in enumerate((extracted_values[i], expected_values[i])):
+            items = value if isinstance(value, list) else []
+            lengths[r, side] = len(items)
+            for item in items:
+                rows.append(r)
+                sides.append(side)
+                codes.append(item_codes.setdefault(canonical(item), len(item_codes)))
+    matched = multiset_intersection(
+        np.array(rows, dtype=np.int64),
+        np.array(sides, dtype=np.int64),
+        np.array(codes, dtype=np.int64),
+        len(list_rows),
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        both_empty = (lengths[:, 0] == 0) & (lengths[:, 1] == 0)
+        precision[list_rows] = np.where(
+            both_empty,
+            1.0,
+            np.where(lengths[:, 0] > 0, matched / lengths[:, 0], np.nan),
+        )
+        recall[list_rows] = np.where(
+            both_empty,
+            1.0,
+            np.where(lengths[:, 1] > 0, matched / lengths[:, 1], np.nan),
+        )
+    exact[list_rows] = (matched == lengths[:, 0]) & (matched == lengths[:, 1])
+
+    # A document without extracted data (failed, or missing from the result)
+    # misses every field, also those whose expected value is empty and would
+    # otherwise match the missing data. Schema-invalid answers keep their data
+    # and are scored as usual.
+    failed = np.array(
+        [
+            name not in extracted_by_name or extracted_by_name[name].data is None
+            for name in documents
+        ],
+        dtype=bool,
+    )[doc_index_arr]
+    exact[failed] = 0.0
+    for column in (similarity, numeric):
+        column[failed & ~np.isnan(column)] = 0.0
+    failed_lists = failed & is_list_arr
+    precision[failed_lists] = 0.0
+    recall[failed_lists] = 0.0
+
+    return ComparisonTable(
+        documents=documents,
+        fields=fields,
+        errors=errors,
+        doc_index=doc_index_arr,
+        field_index=field_index_arr,
+        extracted=extracted_arr,
+        expected=expected_arr,
+        exact=exact,
+        similarity=similarity,
+        numeric=numeric,
+        precision=precision,
+        recall=recall,
+    )
+
+
+def run_evaluation(task: EvaluationTask) -> EvaluationResult:
+    """
+    Scores extracted results against the expected results field by field.
+
+    Args:
+        task: An EvaluationTask with the extraction result, the expected results
+            keyed by file name and, optionally, the output schema.
+
+    Returns:
+        An EvaluationResult with metrics per field and per document.
+    """
+    return build_comparison_table(task).evaluation_result()
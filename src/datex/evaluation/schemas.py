@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Literal
+from datex.extraction.schemas import ExtractionResult
+
+
+class FieldMetrics(BaseModel):
+    field: str
+    kind: Literal["scalar", "list"]
+    count: int
+    exact_match: float | None = None
+    similarity: float | None = None
+    numeric_match: float | None = None
+    precision: float | None = None
+    recall: float | None = None
+
+
+class DocumentMetrics(BaseModel):
+    file_name: str
+    count: int
+    exact_match: float | None = None
+    error: str | None = None
+
+
+class EvaluationResult(BaseModel):
+    exact_match: float | None
+    fields: list[FieldMetrics]
+    documents: list[DocumentMetrics]
+
+
+class EvaluationTask(BaseModel):
+    extraction_result: ExtractionResult
+    expected: Dict[str, Dict[str, Any]]
+    output_schema: Dict[str, Any] | None = None
+    numeric_rtol: float = Field(default=0.0, ge=0)
+    numeric_atol: float = Field(default=0.0, ge=0)
@@ -0,0 +1,115 @@
+from pathlib import Path
+from typing import Awaitable, Callable
+import asyncio
+import concurrent.futures
+import os
+import threading
+from datex import jsonio
+
+FILE_ID_CACHE_PATH = Path(".cache/datex/file_ids.jsonl")
+
+
+class FileIdCache:
+    """
+    Persistent mapping of content hashes to file ids returned by a provider's
+    files endpoint, so that every page is uploaded only once per account.
+    Changes are appended to a JSON lines log off the event loop, a file id of
+    null removes the key. The log is compacted when it is loaded.
+
+    Background runs share the cache, each on its own event loop in its own
+    thread, so uploads in progress are tracked with thread-safe futures
+    rather than locks bound to one loop.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.file_ids: dict[str, str] = {}
+        # Key -> upload in progress, resolves to the file id or None on failure.
+        self.pending: dict[str, concurrent.futures.Future] = {}
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        if path.exists():
+            self._load()
+
+    def _load(self):
+        records = 0
+        with open(self.path, "rb") as file:
+            for line in file:
+                try:
+                    record = jsonio.loads(line)
+                except jsonio.JSONDecodeError:
+                    continue  # Torn last line of an interrupted run.
+                records += 1
+                if record["file_id"] is None:
+                    self.file_ids.pop(record["key"], None)
+                else:
+                    self.file_ids[record["key"]] = record["file_id"]
+        if records > 2 * len(self.file_ids):
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as file:
+                file.writelines(
+                    jsonio.dumps({"key": key, "file_id": file_id}) + b"\n"
+                    for key, file_id in self.file_ids.items()
+                )
+            os.replace(tmp_path, self.path)
+
+    def _append(self, changes: dict[str, str | None]):
+        with self.write_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as file:
+                file.writelines(
+                    jsonio.dumps({"key": key, "file_id": file_id}) + b"\n"
+                    for key, file_id in changes.items()
+                )
+
+    async def get_or_upload(
+        self, key: str, upload: Callable[[], Awaitable[str]]
+    ) -> str:
+        """
+        Returns the cached file id for `key` or calls `upload` once to create it,
+        even if several requests ask for the same key concurrently.
+        """
+        while True:
+            with self.lock:
+                if key in self.file_ids:
+                    return self.file_ids[key]
+                pending = self.pending.get(key)
+                if pending is None:
+                    pending = self.pending[key] = concurrent.futures.Future()
+                    break
+            # Shielded, a cancelled waiter must not cancel the upload.
+            file_id = await asyncio.shield(asyncio.wrap_future(pending))
+            if file_id is not None:
+                return file_id
+            # The upload failed, the next waiter tries again.
+
+        file_id = None
+        try:
+            file_id = await upload()
+            with self.lock:
+                self.file_ids[key] = file_id
+        finally:
+            with self.lock:
+                del self.pending[key]
+            pending.set_result(file_id)
+        await asyncio.to_thread(self._append, {key: file_id})
+        return file_id
+
+    async def invalidate(self, keys: list[str]):
+        with self.lock:
+            for key in keys:
+                self.file_ids.pop(key, None)
+        await asyncio.to_thread(self._append, dict.fromkeys(keys))
+
+
+_caches: dict[Path, FileIdCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_file_id_cache(path: Path = FILE_ID_CACHE_PATH) -> FileIdCache:
+    """Returns one shared cache per path, so concurrent strategies reuse uploads."""
+    path = path.resolve()
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = FileIdCache(path)
+        return _caches[path]
@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+
+class RateBudget:
+    """
+    Limits concurrent requests and, optionally, requests per minute. One budget
+    can be shared by several extraction runs so that they stay within the same
+    provider limits together.
+
+        budget = RateBudget(max_concurrency=16, requests_per_minute=500)
+        async with budget:
+            ...
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        requests_per_minute: float | None = None,
+    ):
+        self.semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self.interval = 60 / requests_per_minute if requests_per_minute else 0.0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def _wait_for_slot(self):
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aenter__(self):
+        if self.semaphore:
+            await self.semaphore.acquire()
+        if self.interval:
+            try:
+                await self._wait_for_slot()
+            except BaseException:
+                # Cancelled while waiting, __aexit__ will not run.
+                if self.semaphore:
+                    self.semaphore.release()
+                raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.semaphore:
+            self.semaphore.release()
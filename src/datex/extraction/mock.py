@@ -0,0 +1,106 @@
+import math
+import random
+from typing import Any
+from datex.extraction.schemas import LatencyDistribution, MockSettings
+
+
+class MockProviderError(Exception):
+    status_code = 500
+
+
+class MockRateLimitError(MockProviderError):
+    status_code = 429
+
+
+WORDS = [
+    "alpha",
+    "bravo",
+    "charlie",
+    "delta",
+    "echo",
+    "foxtrot",
+    "golf",
+    "hotel",
+]
+
+
+def sample_latency(settings: MockSettings, rng: random.Random) -> float:
+    """
+    Draws a response latency in seconds from the configured distribution.
+    """
+    mean = settings.latency_mean
+    stddev = settings.latency_stddev
+    match settings.latency_distribution:
+        case LatencyDistribution.CONSTANT:
+            latency = mean
+        case LatencyDistribution.UNIFORM:
+            latency = rng.uniform(
+                mean - stddev * math.sqrt(3), mean + stddev * math.sqrt(3)
+            )
+        case LatencyDistribution.NORMAL:
+            latency = rng.gauss(mean, stddev)
+        case LatencyDistribution.LOGNORMAL:
+            if mean <= 0:
+                return 0.0
+            sigma = math.sqrt(math.log(1 + (stddev / mean) ** 2))
+            latency = rng.lognormvariate(math.log(mean) - sigma**2 / 2, sigma)
+        case LatencyDistribution.EXPONENTIAL:
+            latency = rng.expovariate(1 / mean) if mean > 0 else 0.0
+    return max(latency, 0.0)
+
+
+def generate_from_schema(
+    schema: dict[str, Any], rng: random.Random, root: dict[str, Any] | None = None
+) -> Any:
+    """
+    Generates a value that conforms to a JSON schema.
+
+    Only the subset of JSON schema used for structured outputs is supported:
+    $ref, anyOf/oneOf, enum, const and the basic types.
+    """
+    root = root if root is not None else schema
+
+    if "$ref" in schema:
+        target: Any = root
+        for key in schema["$ref"].removeprefix("#/").split("/"):
+            target = target[key]
+        return generate_from_schema(target, rng, root)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            return generate_from_schema(rng.choice(schema[key]), rng, root)
+
+    schema_type = schema.get("type", "string")
+    if isinstance(schema_type, list):
+        non_null = [t for t in schema_type if t != "null"] or ["null"]
+        schema_type = rng.choice(non_null)
+
+    match schema_type:
+        case "object":
+            return {
+                name: generate_from_schema(prop, rng, root)
+                for name, prop in schema.get("properties", {}).items()
+            }
+        case "array":
+            min_items = schema.get("minItems", 1)
+            max_items = schema.get("maxItems", max(min_items, 3))
+            return [
+                generate_from_schema(schema.get("items", {}), rng, root)
+                for _ in range(rng.randint(min_items, max_items))
+            ]
+        case "integer":
+            return rng.randint(schema.get("minimum", 0), schema.get("maximum", 1000))
+        case "number":
+            value = rng.uniform(schema.get("minimum", 0), schema.get("maximum", 1000))
+            return round(value, 2)
+        case "boolean":
+            return rng.random() < 0.5
+        case "null":
+            return None
+        case _:
+            if schema.get("format") == "date":
+                return f"{rng.randint(2000, 2030)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
@@ -0,0 +1,212 @@
+from datex.extraction.mock import generate_from_schema, sample_latency
+from datex.extraction.schemas import MockSettings
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from datetime import datetime, timezone
+import json
+import random
+import time
+import uuid
+
+
+class MockServer:
+    """
+    In-process stand-in server speaking the subset of the OpenAI (files and
+    responses) and Ollama (chat) wire formats used by the extraction strategies.
+
+        with MockServer(MockSettings(latency_mean=0.2)) as server:
+            config.base_url = server.openai_url
+
+    Latency, errors and 429s follow the given MockSettings. The counters allow
+    checking how many uploads and requests reached the server.
+    """
+
+    def __init__(self, settings: MockSettings | None = None, port: int = 0):
+        self.settings = settings or MockSettings()
+        self.rng = random.Random(self.settings.seed)
+        self.lock = Lock()
+        self.files: dict[str, int] = {}
+        self.counters = {"uploads": 0, "requests": 0, "rate_limited": 0, "errors": 0}
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.thread = Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def __enter__(self) -> "MockServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _roll(self) -> tuple[float, int | None]:
+        """Returns the latency and an injected HTTP status code, if any."""
+        with self.lock:
+            latency = sample_latency(self.settings, self.rng)
+            roll = self.rng.random()
+        if roll < self.settings.rate_limit_rate:
+            return latency, 429
+        if roll < self.settings.rate_limit_rate + self.settings.error_rate:
+            return latency, 500
+        return latency, None
+
+    def _generate(self, schema: dict) -> str:
+        with self.lock:
+            return json.dumps(generate_from_schema(schema, self.rng))
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: dict):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _error(self, status: int, message: str):
+                self._send(status, {"error": {"message": message, "code": status}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                routes = {
+                    "/v1/files": self._files,
+                    "/v1/responses": self._responses,
+                    "/api/chat": self._chat,
+                }
+                route = routes.get(self.path.split("?")[0])
+                if route is None:
+                    self._error(404, f"Unknown path {self.path}")
+                    return
+                route(body)
+
+            def _files(self, body: bytes):
+                header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n"
+                message = BytesParser(policy=HTTP).parsebytes(
+                    header.encode("utf-8") + body
+                )
+                upload = next(
+                    (p for p in message.iter_parts() if p.get_filename()), None
+                )
+                if upload is None:
+                    self._error(400, "No file in upload.")
+                    return
+                content = upload.get_payload(decode=True)
+                file_id = f"file-{uuid.uuid4().hex}"
+                with server.lock:
+                    server.files[file_id] = len(content)
+                    server.counters["uploads"] += 1
+                self._send(
+                    200,
+                    {
+                        "id": file_id,
+                        "object": "file",
+                        "bytes": len(content),
+                        "created_at": int(time.time()),
+                        "filename": upload.get_filename(),
+                        "purpose": "vision",
+                        "status": "processed",
+                    },
+                )
+
+            def _check(self) -> bool:
+                latency, status = server._roll()
+                time.sleep(latency)
+                with server.lock:
+                    server.counters["requests"] += 1
+                    if status == 429:
+                        server.counters["rate_limited"] += 1
+                    elif status:
+                        server.counters["errors"] += 1
+                if status == 429:
+                    self._error(429, "Rate limit exceeded.")
+                    return False
+                if status:
+                    self._error(status, "Internal server error.")
+                    return False
+                return True
+
+            def _responses(self, body: bytes):
+                request = json.loads(body)
+                for message in request.get("input", []):
+                    content = message.get("content")
+                    for item in content if isinstance(content, list) else []:
+                        file_id = item.get("file_id")
+                        if file_id and file_id not in server.files:
+                            self._error(400, f"Unknown file id {file_id}.")
+                            return
+                if not self._check():
+                    return
+                schema = request.get("text", {}).get("format", {}).get("schema", {})
+                output = server._generate(schema)
+                self._send(
+                    200,
+                    {
+                        "id": f"resp_{uuid.uuid4().hex}",
+                        "object": "response",
+                        "created_at": int(time.time()),
+                        "status": "completed",
+                        "model": request.get("model"),
+                        "output": [
+                            {
+                                "type": "message",
+                                "id": f"msg_{uuid.uuid4().hex}",
+                                "role": "assistant",
+                                "status": "completed",
+                                "content": [
+                                    {
+                                        "type": "output_text",
+                                        "text": output,
+                                        "annotations": [],
+                                    }
+                                ],
+                            }
+                        ],
+                        "parallel_tool_calls": False,
+                        "tool_choice": "auto",
+                        "tools": [],
+                        "usage": {
+                            "input_tokens": len(body) // 4,
+                            "input_tokens_details": {"cached_tokens": 0},
+                            "output_tokens": len(output) // 4,
+                            "output_tokens_details": {"reasoning_tokens": 0},
+                            "total_tokens": (len(body) + len(output)) // 4,
+                        },
+                    },
+                )
+
+            def _chat(self, body: bytes):
+                request = json.loads(body)
+                if not self._check():
+                    return
+                output = server._generate(request.get("format") or {})
+                self._send(
+                    200,
+                    {
+                        "model": request.get("model"),
+                        "created_at": datetime.now(timezone.utc).isoformat(),
+                        "message": {"role": "assistant", "content": output},
+                        "done": True,
+                        "done_reason": "stop",
+                        "prompt_eval_count": len(body) // 4,
+                        "eval_count": len(output) // 4,
+                    },
+                )
+
+        return Handler
@@ -0,0 +1,160 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable
+import threading
+from datex.conversion.schemas import Part, PartType
+from datex.extraction.schemas import ImageDetail
+
+DEFAULT_MAX_PAYLOAD_BYTES = 256 * 2**20
+
+
+class PayloadCache:
+    """
+    Byte-bounded LRU cache of provider payload fragments, keyed by the
+    provider format and the content hash of a part. Fragments embed the
+    base64 image, so they are the multi-megabyte strings of a request.
+    Fragments of spilled parts are never cached, they would take the memory
+    the spill freed, and neither are fragments built under uncached_payloads.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_PAYLOAD_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.entries: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_or_build(self, key: tuple, build: Callable[[], Any], size: int) -> Any:
+        """Returns the cached fragment for `key` or builds and caches it."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+        fragment = build()
+        if size > self.max_bytes:
+            return fragment
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = (fragment, size)
+                self.bytes += size
+            self._evict()
+        return fragment
+
+    def _evict(self):
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+
+_payload_cache: PayloadCache | None = None
+
+
+def get_payload_cache() -> PayloadCache:
+    """Returns the process-wide cache, shared by all strategies and configs."""
+    global _payload_cache
+    if _payload_cache is None:
+        _payload_cache = PayloadCache()
+    return _payload_cache
+
+
+_caching = ContextVar("payload_caching", default=True)
+
+
+@contextmanager
+def uncached_payloads():
+    """
+    Builds fragments without the cache in this block and in the tasks started
+    from it, e.g. for a run whose memory is bounded by a byte budget that
+    cached copies of the pages would escape.
+    """
+    token = _caching.set(False)
+    try:
+        yield
+    finally:
+        _caching.reset(token)
+
+
+class RequestBuilder:
+    """
+    Converts parts into provider payload fragments. Image fragments are
+    built once per part content and reused by retries, repeated requests and
+    every config of a sweep, text fragments are cheap and built each time.
+    """
+
+    def __init__(self, cache: PayloadCache | None = None):
+        self.cache = cache or get_payload_cache()
+
+    def openai_image(
+        self, part: Part, detail: ImageDetail = ImageDetail.AUTO
+    ) -> dict[str, str]:
+        image_format = part.metadata.get("format", "png")
+
+        def build() -> dict[str, str]:
+            fragment = {
+                "type": "input_image",
+                "image_url": f"data:image/{image_format};base64,{part.load_content()}",
+            }
+            if detail != ImageDetail.AUTO:
+                fragment["detail"] = detail.value
+            return fragment
+
+        if part.spill is not None or not _caching.get():
+            return build()
+        return self.cache.get_or_build(
+            ("openai", image_format, detail.value, part.content_hash()),
+            build,
+            size=len(part.content),
+        )
+
+    def openai_content(
+        self,
+        parts: list[Part],
+        file_ids: dict[str, str] | None = None,
+        details: list[ImageDetail] | None = None,
+    ) -> list[dict[str, str]]:
+        """
+        Builds the Responses API content of the parts. Images are referenced
+        by file id if `file_ids` maps their content hash, inlined otherwise.
+        `details` holds the detail level of every image part in order.
+        """
+        details = iter(details or [])
+        content = []
+        for part in parts:
+            if part.type == PartType.IMG:
+                detail = next(details, ImageDetail.AUTO)
+            if part.type == PartType.IMG and file_ids:
+                fragment = {
+                    "type": "input_image",
+                    "file_id": file_ids[part.content_hash()],
+                }
+                if detail != ImageDetail.AUTO:
+                    fragment["detail"] = detail.value
+                content.append(fragment)
+            elif part.type == PartType.IMG:
+                content.append(self.openai_image(part, detail))
+            elif part.type == PartType.TEXT:
+                content.append({"type": "input_text", "text": part.content})
+        return content
+
+    def ollama_messages(self, parts: list[Part], first_message: dict) -> list[dict]:
+        """
+        Groups the parts into user messages, starting with `first_message`.
+        Ollama attaches images to a message rather than interleaving them with
+        text, so every text part starts a new user message.
+        """
+        messages = []
+        message = first_message
+        for part in parts:
+            if part.type == PartType.IMG:
+                # The base64 content is the payload as is.
+                message["images"].append(part.load_content())
+            elif part.type == PartType.TEXT:
+                messages.append(message)
+                message = {"role": "user", "content": part.content, "images": []}
+        messages.append(message)
+        return messages
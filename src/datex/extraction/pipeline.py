@@ -1,16 +1,110 @@
-from datex.extraction.schemas import ExtractionTask, ExtractionResult, ExtractedFile
-from datex.extraction.strategies import ExtractionStrategy
-import json
+from datex.extraction.schemas import (
+    BatchSettings,
+    ExtractionTask,
+    ExtractionResult,
+    ExtractedFile,
+    ImageDetail,
+    Usage,
+)
+from datex.extraction.strategies import Extraction, ExtractionStrategy
+from datex.extraction.tokens import estimate_file_tokens, resolve_image_details
+from datex.extraction.limits import RateBudget
+from datex.extraction.scheduling import schedule_batches, schedule_files
+from datex.conversion.schemas import ConvertedFile, Part, PartType
+from datex.schema import CompiledSchema, compile_schema
+from typing import Any, Callable
+from datex import jsonio
 import asyncio
 from datetime import datetime
 
 
-async def run_extractions(task: ExtractionTask) -> ExtractionResult:
+def build_batches(
+    files: list[ConvertedFile], settings: BatchSettings
+) -> list[list[ConvertedFile]]:
+    """
+    Greedily packs files into batches that respect the file, page and token
+    limits. Files that exceed a limit on their own end up in a batch of one.
+    """
+    batches: list[list[ConvertedFile]] = []
+    batch: list[ConvertedFile] = []
+    batch_pages = 0
+    batch_tokens = 0
+    for file in files:
+        pages = len(file.parts)
+        tokens = estimate_file_tokens(file) if settings.max_tokens else 0
+        fits = (
+            len(batch) < settings.max_files
+            and batch_pages + pages <= settings.max_pages
+            and (
+                not settings.max_tokens or batch_tokens + tokens <= settings.max_tokens
+            )
+        )
+        if batch and not fits:
+            batches.append(batch)
+            batch, batch_pages, batch_tokens = [], 0, 0
+        batch.append(file)
+        batch_pages += pages
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def create_batch_schema(
+    output_schema: dict[str, Any], document_ids: list[str]
+) -> dict[str, Any]:
+    """
+    Wraps the output schema into an object with one property per document.
+    Definitions are hoisted to the root so that "#/$defs/..." references
+    still resolve.
+    """
+    document_schema = {k: v for k, v in output_schema.items() if k != "$defs"}
+    batch_schema: dict[str, Any] = {
+        "type": "object",
+        "properties": {document_id: document_schema for document_id in document_ids},
+        "required": document_ids,
+        "additionalProperties": False,
+    }
+    if "$defs" in output_schema:
+        batch_schema["$defs"] = output_schema["$defs"]
+    return batch_schema
+
+
+def create_batch_input(
+    files: list[ConvertedFile], document_ids: list[str]
+) -> list[Part]:
+    input_data = [
+        Part(
+            type=PartType.TEXT,
+            content=(
+                f"The input contains {len(files)} documents. Each document starts "
+                "with a 'Document <id>:' marker. Extract the information for every "
+                "document separately and return it under its document id."
+            ),
+        )
+    ]
+    for document_id, file in zip(document_ids, files):
+        input_data.append(Part(type=PartType.TEXT, content=f"Document {document_id}:"))
+        input_data.extend(file.parts)
+    return input_data
+
+
+async def run_extractions(
+    task: ExtractionTask,
+    rate_budget: RateBudget | None = None,
+    extractor: Extraction | None = None,
+    on_result: Callable[[ExtractedFile], None] | None = None,
+) -> ExtractionResult:
     """
     Runs the extraction process based on the strategy and data defined in the task.
 
     Args:
         task: An ExtractionTask object containing the config, schema, and converted files.
+        rate_budget: Optional budget shared with other runs. Overrides task.max_concurrency.
+        extractor: Optional strategy instance to reuse, e.g. with warm clients.
+            Must have been created for task.config and task.output_schema.
+        on_result: Optional callback, called with every ExtractedFile as soon as
+            it is done.
 
     Returns:
         An ExtractionResult object with the outcome of the extraction.
@@ -18,41 +112,179 @@ async def run_extractions(task: ExtractionTask) -> ExtractionResult:
     print(f"Extracting data using provider: {task.config.provider.value}...")
     start_time = datetime.now()
 
+    if extractor is None:
+        try:
+            strategy_enum = ExtractionStrategy(task.config.provider)
+            extractor = strategy_enum.strategy_class(
+                config=task.config, output_schema=task.output_schema
+            )
+        except ValueError:
+            raise ValueError(f"Provider {task.config.provider} not supported.")
+
+    limiter = rate_budget or RateBudget(max_concurrency=task.max_concurrency)
+    usages: list[Usage] = []
     try:
-        strategy_enum = ExtractionStrategy(task.config.provider)
-        extractor = strategy_enum.strategy_class(
-            config=task.config, output_schema=task.output_schema
+        compiled_schema: CompiledSchema | None = compile_schema(task.output_schema)
+    except Exception as e:
+        print(f"Output schema cannot be compiled, results are not validated: {e}")
+        compiled_schema = None
+
+    def escalate(file_to_extract) -> bool:
+        # Only worth a retry if adaptive detail sent some pages at low detail.
+        return (
+            task.config.image_detail == ImageDetail.ADAPTIVE
+            and ImageDetail.LOW
+            in resolve_image_details(file_to_extract.parts, task.config)
+        )
+
+    def validated(file_path, data) -> ExtractedFile:
+        # Invalid output is kept for inspection but reported as an error.
+        error_message = compiled_schema.validate(data) if compiled_schema else None
+        if error_message:
+            print(f"{file_path}: {error_message}")
+        return ExtractedFile(
+            file_path=str(file_path),
+            data=data,
+            error=error_message,
+            invalid=bool(error_message),
         )
-    except ValueError:
-        raise ValueError(f"Provider {task.config.provider} not supported.")
 
     async def extract_file(file_to_extract):
+        extracted_file = await _extract_file(file_to_extract)
+        if on_result:
+            on_result(extracted_file)
+        return extracted_file
+
+    def parsed(file_path, response) -> ExtractedFile:
         try:
-            result_str = await extractor(input_data=file_to_extract.parts)
-            return ExtractedFile(
-                file_path=file_to_extract.file_path, data=json.loads(result_str)
-            )
-        except json.JSONDecodeError as e:
+            extracted_file = validated(file_path, jsonio.loads(response.output))
+        except jsonio.JSONDecodeError as e:
             error_message = f"Error decoding JSON: {e}"
-            print(f"{file_to_extract.file_path}: {error_message}")
-            return ExtractedFile(
-                file_path=file_to_extract.file_path, error=error_message
+            print(f"{file_path}: {error_message}")
+            extracted_file = ExtractedFile(
+                file_path=str(file_path), error=error_message
             )
+        extracted_file.usage = response.usage
+        return extracted_file
+
+    async def _extract_file(file_to_extract):
+        try:
+            async with limiter:
+                response = await extractor(input_data=file_to_extract.parts)
+            usages.append(response.usage)
+            extracted_file = parsed(file_to_extract.file_path, response)
+            if extracted_file.error and escalate(file_to_extract):
+                # Small print may have been unreadable, retry once at high detail.
+                print(f"{file_to_extract.file_path}: Retrying with high image detail.")
+                async with limiter:
+                    retry_response = await extractor(
+                        input_data=file_to_extract.parts,
+                        image_detail=ImageDetail.HIGH,
+                    )
+                usages.append(retry_response.usage)
+                extracted_file = parsed(file_to_extract.file_path, retry_response)
+                extracted_file.usage = response.usage + retry_response.usage
+            return extracted_file
         except Exception as e:
             error_message = f"An error occurred during extraction: {e}"
             print(f"{file_to_extract.file_path}: {error_message}")
             return ExtractedFile(
-                file_path=file_to_extract.file_path, error=error_message
+                file_path=str(file_to_extract.file_path), error=error_message
             )
 
-    extraction_coroutines = [extract_file(f) for f in task.files]
-    extracted_files = await asyncio.gather(*extraction_coroutines)
+    async def extract_batch(files_to_extract):
+        if len(files_to_extract) == 1:
+            return [await extract_file(files_to_extract[0])]
+        extracted_files = await _extract_batch(files_to_extract)
+        if on_result:
+            for extracted_file in extracted_files:
+                on_result(extracted_file)
+        return extracted_files
+
+    async def _extract_batch(files_to_extract):
+        document_ids = [f"doc_{i}" for i in range(1, len(files_to_extract) + 1)]
+        try:
+            async with limiter:
+                response = await extractor(
+                    input_data=create_batch_input(files_to_extract, document_ids),
+                    output_schema=create_batch_schema(task.output_schema, document_ids),
+                )
+            usages.append(response.usage)
+            batch_data = jsonio.loads(response.output)
+        except jsonio.JSONDecodeError as e:
+            batch_error = f"Error decoding JSON: {e}"
+        except Exception as e:
+            batch_error = f"An error occurred during extraction: {e}"
+        else:
+            batch_error = None
+
+        extracted_files = []
+        for document_id, file in zip(document_ids, files_to_extract):
+            if batch_error:
+                error_message = batch_error
+            elif isinstance(batch_data, dict) and isinstance(
+                batch_data.get(document_id), dict
+            ):
+                extracted_files.append(
+                    validated(file.file_path, batch_data[document_id])
+                )
+                continue
+            else:
+                error_message = f"Document {document_id} missing in batch response"
+            print(f"{file.file_path}: {error_message}")
+            extracted_files.append(
+                ExtractedFile(file_path=str(file.file_path), error=error_message)
+            )
+        return extracted_files
+
+    files = task.files
+    if task.config.page_selection:
+        # Loads the imaging libraries only when pages are selected.
+        from datex.extraction.selection import schema_keywords, select_pages
+
+        keywords = schema_keywords(task.output_schema)
+        files = await asyncio.gather(
+            *[
+                asyncio.to_thread(select_pages, f, task.config.page_selection, keywords)
+                for f in task.files
+            ]
+        )
+        total_parts = sum(len(f.parts) for f in task.files)
+        selected_parts = sum(len(f.parts) for f in files)
+        print(f"Page selection kept {selected_parts} of {total_parts} parts.")
+
+    # Requests enter the rate budget in the order they are started.
+    if task.batching:
+        batches = schedule_batches(
+            build_batches(
+                schedule_files(files, task.schedule, task.priorities), task.batching
+            ),
+            task.schedule,
+            task.priorities,
+        )
+        batch_results = await asyncio.gather(*[extract_batch(b) for b in batches])
+        extracted_files = [f for batch in batch_results for f in batch]
+    else:
+        extractions = {
+            id(f): asyncio.ensure_future(extract_file(f))
+            for f in schedule_files(files, task.schedule, task.priorities)
+        }
+        # Results keep the input order.
+        extracted_files = await asyncio.gather(*[extractions[id(f)] for f in files])
 
     end_time = datetime.now()
     duration = int((end_time - start_time).total_seconds())
 
+    usage = sum(usages, Usage())
+    print(
+        f"Usage: {usage.requests} requests, {usage.input_tokens} input tokens "
+        f"({usage.cached_tokens} cached, {usage.cache_hit_rate:.1%} hit rate), "
+        f"{usage.output_tokens} output tokens."
+    )
+
     return ExtractionResult(
         status="success",
         duration=duration,
         files=extracted_files,
+        usage=usage,
     )
@@ -0,0 +1,90 @@
+from datex.extraction.schemas import (
+    ExtractionConfig,
+    ExtractionResponse,
+    ImageDetail,
+    RequestLayout,
+    Usage,
+)
+from datex.extraction.strategies import Extraction, create_static_prefix
+from datex.extraction.tokens import (
+    estimate_input_tokens,
+    resolve_image_details,
+    CHARS_PER_TOKEN,
+)
+from datex.conversion.schemas import Part
+from datex.extraction.mock import (
+    MockProviderError,
+    MockRateLimitError,
+    generate_from_schema,
+    sample_latency,
+)
+from typing import Any
+import asyncio
+import json
+import random
+
+
+class MockStrategy(Extraction):
+    """
+    Offline stand-in for a provider. Answers with random, schema-conforming JSON
+    after a simulated latency and injects errors and 429s at the configured rates.
+    """
+
+    def __init__(
+        self,
+        config: ExtractionConfig,
+        output_schema: dict[str, Any],
+    ):
+        self.config = config
+        self.output_schema = output_schema
+
+        self.rng = random.Random(config.mock.seed)
+        self.seen_prefixes: set[str] = set()
+
+    def _simulate_usage(
+        self, input_data: list[Part], output: str, image_detail: ImageDetail | None
+    ) -> Usage:
+        # Mimics provider prompt caching: an identical prefix of at least 1024
+        # tokens is served from cache in blocks of 128 tokens.
+        prefix = create_static_prefix(self.config, self.output_schema)
+        prefix_tokens = sum(len(text) for text in prefix) // CHARS_PER_TOKEN
+        details = resolve_image_details(input_data, self.config, image_detail)
+        input_tokens = prefix_tokens + estimate_input_tokens(input_data, details)
+        if self.config.request_layout == RequestLayout.DEFAULT:
+            schema = json.dumps(self.output_schema)
+            input_tokens += len(schema) // CHARS_PER_TOKEN
+
+        prefix_key = "\0".join(prefix)
+        cached_tokens = 0
+        if prefix_key in self.seen_prefixes and prefix_tokens >= 1024:
+            cached_tokens = prefix_tokens // 128 * 128
+        self.seen_prefixes.add(prefix_key)
+
+        return Usage(
+            requests=1,
+            input_tokens=input_tokens,
+            cached_tokens=cached_tokens,
+            output_tokens=len(output) // CHARS_PER_TOKEN,
+        )
+
+    async def __call__(
+        self,
+        input_data: list[Part],
+        output_schema: dict[str, Any] | None = None,
+        image_detail: ImageDetail | None = None,
+    ) -> ExtractionResponse:
+        settings = self.config.mock
+        await asyncio.sleep(sample_latency(settings, self.rng))
+
+        roll = self.rng.random()
+        if roll < settings.rate_limit_rate:
+            raise MockRateLimitError("Rate limit exceeded (429).")
+        if roll < settings.rate_limit_rate + settings.error_rate:
+            raise MockProviderError("Internal server error (500).")
+
+        output = json.dumps(
+            generate_from_schema(output_schema or self.output_schema, self.rng)
+        )
+        return ExtractionResponse(
+            output=output, usage=self._simulate_usage(input_data, output, image_detail)
+        )
@@ -0,0 +1,64 @@
+from ollama import AsyncClient
+from datex.extraction.schemas import (
+    ExtractionConfig,
+    ExtractionResponse,
+    ImageDetail,
+    RequestLayout,
+    Usage,
+)
+from datex.extraction.strategies import Extraction, create_schema_description
+from datex.extraction.payloads import RequestBuilder
+from datex.conversion.schemas import Part
+from typing import Any
+
+
+class OllamaStrategy(Extraction):
+    def __init__(
+        self,
+        config: ExtractionConfig,
+        output_schema: dict[str, Any],
+    ):
+        self.config = config
+        self.output_schema = output_schema
+
+        self.client = AsyncClient(host=config.base_url)
+        self.request_builder = RequestBuilder()
+        self.schema_description = create_schema_description(output_schema)
+
+    def _create_ollama_messages(self, input_data):
+        messages = [{"role": "system", "content": self.config.system_prompt}]
+        message = {"role": "user", "content": self.config.user_prompt, "images": []}
+        if self.config.request_layout == RequestLayout.CACHE_FRIENDLY:
+            # Keep images out of the static prefix, Ollama reuses the KV cache
+            # of an identical message prefix.
+            message["content"] += "\n\n" + self.schema_description
+            messages.append(message)
+            message = {"role": "user", "content": "", "images": []}
+        return messages + self.request_builder.ollama_messages(input_data, message)
+
+    async def __call__(
+        self,
+        input_data: list[Part],
+        output_schema: dict[str, Any] | None = None,
+        image_detail: ImageDetail | None = None,
+    ) -> ExtractionResponse:
+        ollama_response = await self.client.chat(
+            model=self.config.model_name,
+            messages=self._create_ollama_messages(input_data),
+            stream=False,
+            format=output_schema or self.output_schema,
+            options={
+                "temperature": self.config.temperature,
+                "top_p": self.config.top_p,
+            },
+        )
+
+        # Ollama does not report cached prompt tokens.
+        usage = Usage(
+            requests=1,
+            input_tokens=ollama_response.get("prompt_eval_count") or 0,
+            output_tokens=ollama_response.get("eval_count") or 0,
+        )
+        return ExtractionResponse(
+            output=ollama_response["message"]["content"] or "", usage=usage
+        )
@@ -0,0 +1,194 @@
+from openai import AsyncOpenAI, BadRequestError, NotFoundError
+from datex.extraction.schemas import (
+    ExtractionConfig,
+    ExtractionResponse,
+    ImageDetail,
+    ImageTransport,
+    RequestLayout,
+    Usage,
+)
+from datex.extraction.strategies import (
+    Extraction,
+    create_schema_description,
+    create_static_prefix,
+)
+from datex.extraction.files import get_file_id_cache
+from datex.extraction.payloads import RequestBuilder
+from datex.extraction.tokens import resolve_image_details
+from datex.conversion.schemas import Part, PartType
+from typing import Any
+import asyncio
+import base64
+import hashlib
+
+# Error codes and messages of requests that reference an unknown file id.
+MISSING_FILE_CODES = {"file_not_found", "invalid_file_id", "invalid_file"}
+MISSING_FILE_MESSAGES = ("no such file", "file not found", "does not exist")
+
+
+def _missing_files(
+    error: BadRequestError | NotFoundError, file_ids: dict[str, str]
+) -> list[str]:
+    """
+    Returns the hashes of the files the error reports as missing, all of them
+    if it does not name one. Other errors, e.g. an invalid schema or an
+    exceeded context length, return an empty list.
+    """
+    message = str(error).lower()
+    named = [h for h, file_id in file_ids.items() if file_id.lower() in message]
+    if named:
+        return named
+    if getattr(error, "code", None) in MISSING_FILE_CODES or (
+        "file" in message and any(phrase in message for phrase in MISSING_FILE_MESSAGES)
+    ):
+        return list(file_ids)
+    return []
+
+
+class OpenAIStrategy(Extraction):
+    def __init__(
+        self,
+        config: ExtractionConfig,
+        output_schema: dict[str, Any],
+    ):
+        self.config = config
+        self.output_schema = output_schema
+
+        self.client = AsyncOpenAI(api_key=config.api_key, base_url=config.base_url)
+        self.request_builder = RequestBuilder()
+        self.schema_description = create_schema_description(output_schema)
+        self.file_id_cache = get_file_id_cache()
+        # File ids are only valid for the account and endpoint they were created on.
+        self.file_scope = hashlib.sha256(
+            f"{self.client.base_url}\0{config.api_key}".encode("utf-8")
+        ).hexdigest()[:16]
+
+        prefix = [config.model_name, *create_static_prefix(config, output_schema)]
+        self.prompt_cache_key = hashlib.sha256(
+            "\0".join(prefix).encode("utf-8")
+        ).hexdigest()[:32]
+
+    def _file_key(self, part_hash: str) -> str:
+        return f"{self.file_scope}:{part_hash}"
+
+    async def _upload_images(self, input_data) -> dict[str, str]:
+        """Uploads all images not yet known to the provider, returns hash -> file id."""
+
+        async def upload(part, part_hash):
+            image_format = part.metadata.get("format", "png")
+            file = await self.client.files.create(
+                file=(
+                    f"{part_hash[:16]}.{image_format}",
+                    base64.b64decode(part.load_content()),
+                    f"image/{image_format}",
+                ),
+                purpose="vision",
+            )
+            return file.id
+
+        parts = {i.content_hash(): i for i in input_data if i.type == PartType.IMG}
+        file_ids = await asyncio.gather(
+            *[
+                self.file_id_cache.get_or_upload(
+                    self._file_key(part_hash),
+                    lambda p=part, h=part_hash: upload(p, h),
+                )
+                for part_hash, part in parts.items()
+            ]
+        )
+        return dict(zip(parts, file_ids))
+
+    def _create_openai_input(self, input_data, file_ids=None, image_details=None):
+        if self.config.request_layout == RequestLayout.CACHE_FRIENDLY:
+            return [
+                {"role": "system", "content": self.config.system_prompt},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "input_text", "text": self.config.user_prompt},
+                        {"type": "input_text", "text": self.schema_description},
+                    ],
+                },
+                {
+                    "role": "user",
+                    "content": self._create_openai_content(
+                        input_data, file_ids, image_details
+                    ),
+                },
+            ]
+        return [
+            {"role": "system", "content": self.config.system_prompt},
+            {
+                "role": "user",
+                "content": self._create_openai_user_prompt(
+                    input_data, file_ids, image_details
+                ),
+            },
+        ]
+
+    def _create_openai_user_prompt(self, input_data, file_ids=None, image_details=None):
+        user_content = []
+        user_content.append({"type": "input_text", "text": self.config.user_prompt})
+        user_content.extend(
+            self._create_openai_content(input_data, file_ids, image_details)
+        )
+        return user_content
+
+    def _create_openai_content(self, input_data, file_ids=None, image_details=None):
+        return self.request_builder.openai_content(input_data, file_ids, image_details)
+
+    async def _create_response(
+        self, input_data, output_schema, file_ids, image_details
+    ):
+        extra_body = None
+        if self.config.request_layout == RequestLayout.CACHE_FRIENDLY:
+            extra_body = {"prompt_cache_key": self.prompt_cache_key}
+
+        return await self.client.responses.create(
+            model=self.config.model_name,
+            input=self._create_openai_input(input_data, file_ids, image_details),
+            extra_body=extra_body,
+            temperature=self.config.temperature,
+            top_p=self.config.top_p,
+            text={
+                "format": {
+                    "type": "json_schema",
+                    "name": "product_data",
+                    "schema": output_schema or self.output_schema,
+                }
+            },
+        )
+
+    async def __call__(
+        self,
+        input_data: list[Part],
+        output_schema: dict[str, Any] | None = None,
+        image_detail: ImageDetail | None = None,
+    ) -> ExtractionResponse:
+        image_details = resolve_image_details(input_data, self.config, image_detail)
+        file_ids = None
+        if self.config.image_transport == ImageTransport.FILE:
+            file_ids = await self._upload_images(input_data)
+
+        try:
+            response = await self._create_response(
+                input_data, output_schema, file_ids, image_details
+            )
+        except (BadRequestError, NotFoundError) as e:
+            missing = _missing_files(e, file_ids) if file_ids else None
+            if not missing:
+                raise
+            # Uploaded files may have expired or been deleted, upload them again.
+            await self.file_id_cache.invalidate([self._file_key(h) for h in missing])
+            file_ids = await self._upload_images(input_data)
+            response = await self._create_response(
+                input_data, output_schema, file_ids, image_details
+            )
+
+        usage = Usage(requests=1)
+        if response.usage:
+            usage.input_tokens = response.usage.input_tokens
+            usage.output_tokens = response.usage.output_tokens
+            details = response.usage.input_tokens_details
+            usage.cached_tokens = details.cached_tokens if details else 0
+        return ExtractionResponse(output=response.output_text or "", usage=usage)
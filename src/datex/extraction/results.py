@@ -0,0 +1,132 @@
+from pathlib import Path
+from typing import Iterator
+import mmap
+import os
+import struct
+import threading
+import zlib
+from datex import jsonio
+from datex.extraction.schemas import ExtractedFile, ExtractionResult, Usage
+
+BINARY_RESULT_SUFFIX = ".dtxr"
+MAGIC = b"DTXR\x01"
+# Offset and length of the index, followed by the magic again.
+TRAILER = struct.Struct(">QQ")
+
+
+def write_binary_result(path: Path, result: ExtractionResult):
+    """
+    Writes a result as one zlib-compressed JSON record per file, followed by
+    an index of the records, so that single files can be read without
+    loading the whole run.
+    """
+    path = Path(path)
+    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    files = []
+    with open(tmp_path, "wb") as file:
+        file.write(MAGIC)
+        offset = len(MAGIC)
+        for extracted_file in result.files:
+            record = zlib.compress(
+                jsonio.dumps(extracted_file.model_dump(mode="json")), 6
+            )
+            file.write(record)
+            files.append([extracted_file.file_path, offset, len(record)])
+            offset += len(record)
+        index = zlib.compress(
+            jsonio.dumps(
+                {
+                    "status": result.status,
+                    "duration": result.duration,
+                    "usage": result.usage.model_dump(mode="json"),
+                    "files": files,
+                }
+            )
+        )
+        file.write(index)
+        file.write(TRAILER.pack(offset, len(index)))
+        file.write(MAGIC)
+    os.replace(tmp_path, path)
+
+
+class BinaryResultReader:
+    """
+    Lazy reader for results written by write_binary_result(). Only the index
+    is read on open; files are decompressed when they are accessed.
+
+        with BinaryResultReader(path) as reader:
+            extracted_file = reader.get("datasheet.pdf")
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        end = len(self.data) - len(MAGIC)
+        if self.data[: len(MAGIC)] != MAGIC or self.data[end:] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a binary result file")
+        index_offset, index_length = TRAILER.unpack(self.data[end - TRAILER.size : end])
+        index = jsonio.loads(
+            zlib.decompress(self.data[index_offset : index_offset + index_length])
+        )
+        self.status = index["status"]
+        self.duration = index["duration"]
+        self.usage = Usage.model_validate(index["usage"])
+        self.records = {
+            file_path: (offset, length) for file_path, offset, length in index["files"]
+        }
+        self.names = {Path(file_path).name: file_path for file_path in self.records}
+
+    def __enter__(self) -> "BinaryResultReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def file_paths(self) -> list[str]:
+        return list(self.records)
+
+    def get(self, file: str) -> ExtractedFile | None:
+        """Reads one file by its path or its file name."""
+        file_path = file if file in self.records else self.names.get(file)
+        if file_path is None:
+            return None
+        offset, length = self.records[file_path]
+        return ExtractedFile.model_validate(
+            jsonio.loads(zlib.decompress(self.data[offset : offset + length]))
+        )
+
+    def __iter__(self) -> Iterator[ExtractedFile]:
+        for file_path in self.records:
+            yield self.get(file_path)
+
+    def result(self) -> ExtractionResult:
+        return ExtractionResult(
+            status=self.status,
+            duration=self.duration,
+            usage=self.usage,
+            files=list(self),
+        )
+
+
+def save_result(path: Path, result: ExtractionResult):
+    """Writes the binary format for .dtxr paths, indented JSON otherwise."""
+    if Path(path).suffix == BINARY_RESULT_SUFFIX:
+        write_binary_result(path, result)
+    else:
+        jsonio.dump(result.model_dump(mode="json"), path, indent=True)
+
+
+def load_result(path: Path) -> ExtractionResult:
+    if Path(path).suffix == BINARY_RESULT_SUFFIX:
+        with BinaryResultReader(path) as reader:
+            return reader.result()
+    return ExtractionResult.model_validate(jsonio.load(path))
@@ -0,0 +1,84 @@
+from pathlib import Path
+from typing import Callable, TypeVar
+from datex.conversion.schemas import ConvertedFile
+from datex.extraction.schemas import ScheduleOrder
+from datex.extraction.tokens import estimate_file_tokens
+from datex.manifest import read_page_count
+
+T = TypeVar("T")
+
+
+def schedule(
+    items: list[T],
+    order: ScheduleOrder,
+    cost: Callable[[T], int],
+    priority: Callable[[T], int] = lambda item: 0,
+) -> list[T]:
+    """
+    Sorts items by descending priority, then by cost as the order demands.
+    Ties keep their input order.
+    """
+    if order == ScheduleOrder.LONGEST_FIRST:
+        return sorted(items, key=lambda item: (-priority(item), -cost(item)))
+    if order == ScheduleOrder.SHORTEST_FIRST:
+        return sorted(items, key=lambda item: (-priority(item), cost(item)))
+    return sorted(items, key=lambda item: -priority(item))
+
+
+def schedule_files(
+    files: list[ConvertedFile],
+    order: ScheduleOrder,
+    priorities: dict[str, int] | None = None,
+) -> list[ConvertedFile]:
+    """Orders converted files by their estimated input tokens."""
+    priorities = priorities or {}
+    return schedule(
+        files,
+        order,
+        cost=estimate_file_tokens,
+        priority=lambda file: priorities.get(str(file.file_path), 0),
+    )
+
+
+def schedule_batches(
+    batches: list[list[ConvertedFile]],
+    order: ScheduleOrder,
+    priorities: dict[str, int] | None = None,
+) -> list[list[ConvertedFile]]:
+    """Orders batches by their total tokens and the highest file priority."""
+    priorities = priorities or {}
+    return schedule(
+        batches,
+        order,
+        cost=lambda batch: sum(estimate_file_tokens(file) for file in batch),
+        priority=lambda batch: max(
+            priorities.get(str(file.file_path), 0) for file in batch
+        ),
+    )
+
+
+def schedule_paths(
+    file_paths: list[Path],
+    order: ScheduleOrder,
+    priorities: dict[str, int] | None = None,
+) -> list[Path]:
+    """
+    Orders PDFs before conversion by their page count. Files whose page
+    count cannot be read count as one page.
+    """
+    priorities = priorities or {}
+    if order == ScheduleOrder.INPUT and not priorities:
+        return list(file_paths)
+
+    def page_count(path: Path) -> int:
+        try:
+            return read_page_count(Path(path)) or 1
+        except OSError:
+            return 1
+
+    return schedule(
+        list(file_paths),
+        order,
+        cost=page_count,
+        priority=lambda path: priorities.get(str(path), 0),
+    )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, model_validator, ConfigDict
+from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
 from enum import Enum
 import os
 from typing import Any, Dict, Literal
@@ -8,6 +8,107 @@ from datex.conversion.schemas import ConvertedFile
 class Provider(str, Enum):
     OPENAI = "openai"
     OLLAMA = "ollama"
+    MOCK = "mock"
+
+
+class LatencyDistribution(str, Enum):
+    CONSTANT = "constant"
+    UNIFORM = "uniform"
+    NORMAL = "normal"
+    LOGNORMAL = "lognormal"
+    EXPONENTIAL = "exponential"
+
+
+class MockSettings(BaseModel):
+    """Behaviour of the local mock provider. Latencies are given in seconds."""
+
+    latency_distribution: LatencyDistribution = LatencyDistribution.CONSTANT
+    latency_mean: float = Field(default=0.0, ge=0)
+    latency_stddev: float = Field(default=0.0, ge=0)
+    error_rate: float = Field(default=0.0, ge=0, le=1)
+    rate_limit_rate: float = Field(default=0.0, ge=0, le=1)
+    seed: int | None = None
+
+
+class RequestLayout(str, Enum):
+    """
+    DEFAULT sends the user prompt together with the document content.
+    CACHE_FRIENDLY sends a byte-identical prefix of system prompt, user prompt
+    and schema description first and the document content last, so providers
+    can reuse their prompt cache across requests.
+    """
+
+    DEFAULT = "default"
+    CACHE_FRIENDLY = "cache_friendly"
+
+
+class ImageTransport(str, Enum):
+    """
+    INLINE embeds every page as a base64 data URL. FILE uploads each page once
+    through the provider's files endpoint and references it by file id.
+    """
+
+    INLINE = "inline"
+    FILE = "file"
+
+
+class ImageDetail(str, Enum):
+    """
+    Detail level of page images. AUTO leaves the choice to the provider.
+    ADAPTIVE sends pages at high detail in page order while their estimated
+    tokens fit into the image token budget and the rest at low detail; if
+    the answer is not valid JSON or fails the schema, the file is retried
+    once at HIGH detail.
+    """
+
+    AUTO = "auto"
+    LOW = "low"
+    HIGH = "high"
+    ADAPTIVE = "adaptive"
+
+
+class PageSelection(BaseModel):
+    """
+    Which pages of a converted file are sent to the model. Ranges such as
+    "1-3,5,10-" are applied first, then blank and near-duplicate pages are
+    dropped. If more than max_pages remain, the first ones are kept, or with
+    keyword_scoring the pages whose text layer mentions the most schema field
+    names and descriptions.
+    """
+
+    pages: str | None = None
+    max_pages: int | None = Field(default=None, gt=0)
+    skip_blank: bool = True
+    # Share of dark pixels below which a page counts as blank.
+    blank_ink_ratio: float = Field(default=0.001, ge=0, le=1)
+    skip_duplicates: bool = True
+    # Maximum Hamming distance of the 256 bit dHashes of near-duplicate pages.
+    duplicate_distance: int = Field(default=16, ge=0, le=256)
+    keyword_scoring: bool = False
+
+    @field_validator("pages")
+    @classmethod
+    def check_pages(cls, pages: str | None) -> str | None:
+        if pages is not None:
+            cls.parse_pages(pages)
+        return pages
+
+    @staticmethod
+    def parse_pages(pages: str) -> list[tuple[int, int | None]]:
+        """Parses "1-3,5,10-" into [(1, 3), (5, 5), (10, None)]."""
+        ranges = []
+        for item in pages.split(","):
+            first, separator, last = item.strip().partition("-")
+            if not first.strip().isdigit() or (
+                last.strip() and not last.strip().isdigit()
+            ):
+                raise ValueError(f"Invalid page range: {item.strip()!r}")
+            start = int(first)
+            end = (int(last) if last.strip() else None) if separator else start
+            if start < 1 or (end is not None and end < start):
+                raise ValueError(f"Invalid page range: {item.strip()!r}")
+            ranges.append((start, end))
+        return ranges
 
 
 class ExtractionConfig(BaseModel):
@@ -20,10 +121,18 @@ class ExtractionConfig(BaseModel):
     temperature: float = Field(lt=1, gt=0)
     top_p: float = Field(lt=1, gt=0)
     api_key: str = Field(default="")
+    mock: MockSettings = Field(default_factory=MockSettings)
+    request_layout: RequestLayout = RequestLayout.DEFAULT
+    image_transport: ImageTransport = ImageTransport.INLINE
+    image_detail: ImageDetail = ImageDetail.AUTO
+    # Image input tokens per request for ImageDetail.ADAPTIVE.
+    image_token_budget: int = Field(default=2500, gt=0)
+    base_url: str | None = None
+    page_selection: PageSelection | None = None
 
     @model_validator(mode="after")
     def check_for_api_key(self):
-        none_key_provider = [Provider.OLLAMA]
+        none_key_provider = [Provider.OLLAMA, Provider.MOCK]
         if not self.api_key and self.provider not in none_key_provider:
             api_key = os.getenv("OPENAI_API_KEY")
             if api_key:
@@ -35,19 +144,76 @@ class ExtractionConfig(BaseModel):
         return self
 
 
+class BatchSettings(BaseModel):
+    """
+    Limits for packing several small files into one request. Files that exceed
+    max_pages or max_tokens on their own are extracted individually.
+    """
+
+    max_files: int = Field(default=8, gt=1)
+    max_pages: int = Field(default=8, gt=0)
+    max_tokens: int | None = Field(default=None, gt=0)
+
+
+class ScheduleOrder(str, Enum):
+    """
+    Order in which files are started when concurrency is limited. Within the
+    same priority, LONGEST_FIRST minimizes the total wall time of batch runs,
+    SHORTEST_FIRST the mean latency per document.
+    """
+
+    INPUT = "input"
+    LONGEST_FIRST = "longest_first"
+    SHORTEST_FIRST = "shortest_first"
+
+
+class Usage(BaseModel):
+    requests: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def __add__(self, other: "Usage") -> "Usage":
+        return Usage(
+            requests=self.requests + other.requests,
+            input_tokens=self.input_tokens + other.input_tokens,
+            cached_tokens=self.cached_tokens + other.cached_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+        )
+
+
+class ExtractionResponse(BaseModel):
+    output: str
+    usage: Usage = Field(default_factory=Usage)
+
+
 class ExtractedFile(BaseModel):
     file_path: str
     data: Dict[str, Any] | None = None
     error: str | None = None
+    # The model answered, but the answer does not match the output schema.
+    # The data is kept and retrying the request is not expected to help.
+    invalid: bool = False
+    usage: Usage | None = None
 
 
 class ExtractionResult(BaseModel):
     status: Literal["pending", "running", "failed", "success"]
     duration: int
     files: list[ExtractedFile]
+    usage: Usage = Field(default_factory=Usage)
 
 
 class ExtractionTask(BaseModel):
     config: ExtractionConfig
     output_schema: Dict[str, Any]
     files: list[ConvertedFile]
+    max_concurrency: int | None = Field(default=None, gt=0)
+    batching: BatchSettings | None = None
+    schedule: ScheduleOrder = ScheduleOrder.INPUT
+    # File path -> priority, files with higher priority start first.
+    priorities: Dict[str, int] = Field(default_factory=dict)
@@ -0,0 +1,178 @@
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+import base64
+import re
+import subprocess
+import numpy as np
+from PIL import Image
+from datex.conversion.schemas import ConvertedFile, Part, PartType
+from datex.extraction.schemas import PageSelection
+
+# Pages are analysed at this width, enough to see a single line of text.
+ANALYSIS_WIDTH = 256
+# Text pages of one layout look alike at 8x8, so hashes have 16x16 bits.
+HASH_SIZE = 16
+STOP_WORDS = set(
+    "the and for with from that this are not has its was were which "
+    "value values field number string given".split()
+)
+WORD = re.compile(r"[a-z0-9]+")
+CAMEL_CASE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def schema_keywords(output_schema: dict[str, Any]) -> set[str]:
+    """Collects the words of all property names, titles and descriptions."""
+    keywords: set[str] = set()
+
+    def add(text: str):
+        keywords.update(
+            word
+            for word in WORD.findall(CAMEL_CASE.sub(" ", text).lower())
+            if len(word) > 2 and word not in STOP_WORDS
+        )
+
+    def visit(node: Any):
+        if isinstance(node, dict):
+            for name in node.get("properties", {}):
+                add(name.replace("_", " "))
+            for key in ("title", "description"):
+                if isinstance(node.get(key), str):
+                    add(node[key])
+            for child in node.values():
+                visit(child)
+        elif isinstance(node, list):
+            for child in node:
+                visit(child)
+
+    visit(output_schema)
+    return keywords
+
+
+def read_page_texts(pdf_path: Path) -> list[str]:
+    """
+    Reads the text layer of every page with pdftotext. Returns an empty list
+    if the file has no readable text layer.
+    """
+    try:
+        completed = subprocess.run(
+            ["pdftotext", "-enc", "UTF-8", str(pdf_path), "-"],
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    # Pages are separated by form feeds, the last page is followed by one.
+    return completed.stdout.decode("utf-8", errors="replace").split("\f")[:-1]
+
+
+def _analysis_image(part: Part) -> np.ndarray:
+    image = Image.open(BytesIO(base64.b64decode(part.load_content())))
+    # JPEGs can be decoded at a fraction of their size.
+    image.draft("L", (ANALYSIS_WIDTH, ANALYSIS_WIDTH * 2))
+    image = image.convert("L")
+    height = max(1, round(image.height * ANALYSIS_WIDTH / image.width))
+    return np.asarray(image.resize((ANALYSIS_WIDTH, height), Image.Resampling.BOX))
+
+
+def ink_ratio(pixels: np.ndarray) -> float:
+    """Share of pixels clearly darker than the page background."""
+    background = np.median(pixels)
+    return float(np.mean(pixels < background - 48))
+
+
+def dhash(pixels: np.ndarray, size: int = HASH_SIZE) -> int:
+    """
+    Difference hash of size * size bits, robust against scaling and
+    compression noise.
+    """
+    small = np.asarray(
+        Image.fromarray(pixels).resize((size + 1, size), Image.Resampling.BOX),
+        dtype=np.int16,
+    )
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _page_number(index: int, part: Part) -> int:
+    return part.metadata.get("page", index + 1)
+
+
+def select_pages(
+    converted_file: ConvertedFile,
+    settings: PageSelection,
+    keywords: set[str] | None = None,
+) -> ConvertedFile:
+    """
+    Returns a copy of the file with only the selected image parts. Text parts
+    are always kept, and at least one page is kept of every file.
+
+    Args:
+        converted_file: The converted file.
+        settings: The page selection settings.
+        keywords: Schema keywords for keyword_scoring, see schema_keywords().
+    """
+    images = [
+        (_page_number(index, part), part)
+        for index, part in enumerate(
+            p for p in converted_file.parts if p.type == PartType.IMG
+        )
+    ]
+    selected = images
+
+    if settings.pages:
+        ranges = PageSelection.parse_pages(settings.pages)
+        selected = [
+            (page, part)
+            for page, part in selected
+            if any(
+                first <= page and (last is None or page <= last)
+                for first, last in ranges
+            )
+        ]
+
+    if settings.skip_blank or settings.skip_duplicates:
+        kept = []
+        hashes: list[int] = []
+        for page, part in selected:
+            try:
+                pixels = _analysis_image(part)
+            except Exception:
+                kept.append((page, part))
+                continue
+            if settings.skip_blank and ink_ratio(pixels) < settings.blank_ink_ratio:
+                continue
+            if settings.skip_duplicates:
+                page_hash = dhash(pixels)
+                if any(
+                    (page_hash ^ other).bit_count() <= settings.duplicate_distance
+                    for other in hashes
+                ):
+                    continue
+                hashes.append(page_hash)
+            kept.append((page, part))
+        selected = kept
+
+    if settings.max_pages and len(selected) > settings.max_pages:
+        scores = {}
+        if settings.keyword_scoring and keywords:
+            texts = read_page_texts(Path(converted_file.file_path))
+            for page, _ in selected:
+                if page <= len(texts):
+                    words = set(WORD.findall(texts[page - 1].lower()))
+                    scores[page] = len(keywords & words)
+        # Best scores first, ties and pages without text in page order.
+        ranked = sorted(selected, key=lambda item: (-scores.get(item[0], 0), item[0]))
+        best = {page for page, _ in ranked[: settings.max_pages]}
+        selected = [(page, part) for page, part in selected if page in best]
+
+    if not selected and images:
+        selected = images[:1]
+
+    kept_parts = {id(part) for _, part in selected}
+    parts = [
+        part
+        for part in converted_file.parts
+        if part.type != PartType.IMG or id(part) in kept_parts
+    ]
+    return converted_file.model_copy(update={"parts": parts})
@@ -1,104 +1,66 @@
-from ollama import AsyncClient
-from openai import AsyncOpenAI
-from datex.extraction.schemas import ExtractionConfig, Provider
-from datex.conversion.schemas import Part, PartType
+from datex.extraction.schemas import (
+    ExtractionConfig,
+    ExtractionResponse,
+    ImageDetail,
+    Provider,
+    RequestLayout,
+)
+from datex.conversion.schemas import Part
 from enum import Enum
 from typing import Protocol, Any, Type
+import importlib
+import json
 
 
 class Extraction(Protocol):
     def __init__(self, config: ExtractionConfig, output_schema: dict[str, Any]): ...
-    async def __call__(self, input_data: list[Part]) -> str: ...
-
-
-class OpenAIStrategy(Extraction):
-    def __init__(
+    async def __call__(
         self,
-        config: ExtractionConfig,
-        output_schema: dict[str, Any],
-    ):
-        self.config = config
-        self.output_schema = output_schema
-
-        self.client = AsyncOpenAI(api_key=config.api_key)
-
-    def _create_openai_user_prompt(self, input_data):
-        user_content = []
-        user_content.append({"type": "input_text", "text": self.config.user_prompt})
-        user_content.extend(
-            [
-                {
-                    "type": "input_image",
-                    "image_url": f"data:image/png;base64,{i.input_content}",
-                }
-                for i in input_data
-                if i.input_type == PartType.IMG
-            ]
-        )
-        return user_content
-
-    async def __call__(self, input_data: list[Part]) -> str:
-        user_content = self._create_openai_user_prompt(input_data)
-
-        response = await self.client.responses.create(
-            model=self.config.model_name,
-            input=[
-                {"role": "system", "content": self.config.system_prompt},
-                {"role": "user", "content": user_content},
-            ],
-            temperature=self.config.temperature,
-            top_p=self.config.top_p,
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "product_data",
-                    "schema": self.output_schema,
-                }
-            },
-        )
-        return response.output_text or ""
-
-
-# TODO: correctly convert text input_data
-
-
-class OllamaStrategy(Extraction):
-    def __init__(
-        self,
-        config: ExtractionConfig,
-        output_schema: dict[str, Any],
-    ):
-        self.config = config
-        self.output_schema = output_schema
-
-        self.client = AsyncClient()
-
-    async def __call__(self, input_data: list[Part]) -> str:
-        ollama_response = await self.client.chat(
-            model=self.config.model_name,
-            messages=[
-                {"role": "system", "content": self.config.system_prompt},
-                {
-                    "role": "user",
-                    "content": self.config.user_prompt,
-                    "images": [i.content for i in input_data if i.type == PartType.IMG],
-                },
-            ],
-            stream=False,
-            format=self.output_schema,
-            options={
-                "temperature": self.config.temperature,
-                "top_p": self.config.top_p,
-            },
-        )
-
-        return ollama_response["message"]["content"] or ""
+        input_data: list[Part],
+        output_schema: dict[str, Any] | None = None,
+        image_detail: ImageDetail | None = None,
+    ) -> ExtractionResponse:
+        """
+        Extracts the data of one request. `image_detail` overrides the
+        config's detail level, providers without detail levels ignore it.
+        """
+        ...
+
+
+def create_schema_description(output_schema: dict[str, Any]) -> str:
+    """Serializes the schema deterministically so that prompt prefixes stay identical."""
+    schema = json.dumps(output_schema, sort_keys=True, separators=(",", ":"))
+    return f"Answer with JSON that matches this schema:\n{schema}"
+
+
+def create_static_prefix(config: ExtractionConfig, output_schema: dict[str, Any]):
+    """Returns the texts every request of a run starts with."""
+    if config.request_layout == RequestLayout.CACHE_FRIENDLY:
+        return [
+            config.system_prompt,
+            config.user_prompt,
+            create_schema_description(output_schema),
+        ]
+    return [config.system_prompt, config.user_prompt]
 
 
 class ExtractionStrategy(Enum):
-    OPENAI = (Provider.OPENAI, OpenAIStrategy)
-    OLLAMA = (Provider.OLLAMA, OllamaStrategy)
-
-    def __init__(self, provider: Provider, strategy_class: Type[Extraction]):
-        self._value_ = provider
-        self.strategy_class = strategy_class
+    """
+    Provider strategies by dotted path, so that a provider's client library
+    is only imported once its strategy is used.
+    """
+
+    OPENAI = (Provider.OPENAI, "datex.extraction.providers.openai:OpenAIStrategy")
+    OLLAMA = (Provider.OLLAMA, "datex.extraction.providers.ollama:OllamaStrategy")
+    MOCK = (Provider.MOCK, "datex.extraction.providers.mock:MockStrategy")
+
+    def __new__(cls, provider: Provider, strategy_path: str):
+        member = object.__new__(cls)
+        member._value_ = provider
+        member.strategy_path = strategy_path
+        return member
+
+    @property
+    def strategy_class(self) -> Type[Extraction]:
+        module_name, _, class_name = self.strategy_path.partition(":")
+        return getattr(importlib.import_module(module_name), class_name)
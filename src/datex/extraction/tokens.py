@@ -0,0 +1,99 @@
+import base64
+import math
+import struct
+from datex.conversion.schemas import ConvertedFile, Part, PartType
+from datex.extraction.schemas import ExtractionConfig, ImageDetail
+
+# Token accounting of high detail images: the image is scaled to fit into
+# 2048x2048, then its shortest side to 768px, and billed per 512px tile.
+IMAGE_BASE_TOKENS = 85
+IMAGE_TILE_TOKENS = 170
+# Low detail images are scaled to 512x512 and cost the base tokens only.
+LOW_DETAIL_TOKENS = IMAGE_BASE_TOKENS
+CHARS_PER_TOKEN = 4
+
+
+def image_size(part: Part) -> tuple[int, int] | None:
+    """
+    Returns (width, height) of an image part from its metadata or, for PNGs,
+    from the IHDR chunk without decoding the image.
+    """
+    if "width" in part.metadata and "height" in part.metadata:
+        return part.metadata["width"], part.metadata["height"]
+    try:
+        header = base64.b64decode(part.load_content()[:32])
+    except ValueError:
+        return None
+    if header[:8] == b"\x89PNG\r\n\x1a\n" and len(header) >= 24:
+        return struct.unpack(">II", header[16:24])
+    return None
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return IMAGE_BASE_TOKENS + IMAGE_TILE_TOKENS * tiles
+
+
+def estimate_part_tokens(part: Part) -> int:
+    if part.type == PartType.TEXT:
+        return math.ceil(len(part.content) / CHARS_PER_TOKEN)
+    return estimate_high_detail_tokens(part)
+
+
+def estimate_high_detail_tokens(part: Part) -> int:
+    size = image_size(part)
+    if size is None:
+        # Unknown size, assume a full page at the default resolution.
+        return estimate_image_tokens(1654, 2339)
+    return estimate_image_tokens(*size)
+
+
+def estimate_file_tokens(file: ConvertedFile) -> int:
+    return sum(estimate_part_tokens(part) for part in file.parts)
+
+
+def choose_image_details(parts: list[Part], budget: int) -> list[ImageDetail]:
+    """
+    Picks the detail level of every image part for ImageDetail.ADAPTIVE.
+    All images are reserved at low detail, then upgraded to high detail in
+    page order as long as the extra tokens fit into `budget`.
+    """
+    images = [part for part in parts if part.type == PartType.IMG]
+    remaining = budget - LOW_DETAIL_TOKENS * len(images)
+    details = []
+    for part in images:
+        extra = estimate_high_detail_tokens(part) - LOW_DETAIL_TOKENS
+        if extra <= remaining:
+            remaining -= extra
+            details.append(ImageDetail.HIGH)
+        else:
+            details.append(ImageDetail.LOW)
+    return details
+
+
+def resolve_image_details(
+    parts: list[Part],
+    config: ExtractionConfig,
+    image_detail: ImageDetail | None = None,
+) -> list[ImageDetail]:
+    """Detail level of every image part, `image_detail` overrides the config."""
+    image_detail = image_detail or config.image_detail
+    if image_detail == ImageDetail.ADAPTIVE:
+        return choose_image_details(parts, config.image_token_budget)
+    return [image_detail] * sum(part.type == PartType.IMG for part in parts)
+
+
+def estimate_input_tokens(parts: list[Part], details: list[ImageDetail]) -> int:
+    """Tokens of the parts with images at the given detail levels."""
+    details = iter(details)
+    tokens = 0
+    for part in parts:
+        if part.type == PartType.IMG and next(details) == ImageDetail.LOW:
+            tokens += LOW_DETAIL_TOKENS
+        else:
+            tokens += estimate_part_tokens(part)
+    return tokens
@@ -0,0 +1,514 @@
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+from enum import Enum
+from pathlib import Path
+from typing import Any
+import argparse
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from datex import jsonio
+from datex.extraction import run_extractions
+from datex.extraction.limits import RateBudget
+from datex.extraction.schemas import (
+    ExtractedFile,
+    ExtractionConfig,
+    ExtractionResult,
+    ExtractionTask,
+    Usage,
+)
+from datex.conversion import run_conversions
+from datex.conversion.schemas import ConversionTask, ConvertedFile, RenderSettings
+from datex.conversion.strategies import ConversionStrategy
+
+load_dotenv()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_runs (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES queue_runs(id),
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs(status, lease_expires);
+CREATE INDEX IF NOT EXISTS jobs_run ON jobs(run_id, kind, status);
+"""
+
+
+def _to_json(value: Any) -> str:
+    return jsonio.dumps(value).decode("utf-8")
+
+
+class JobKind(str, Enum):
+    CONVERT = "convert"
+    EXTRACT = "extract"
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class QueueRun(BaseModel):
+    """Everything a worker needs to process the files of one run, without the API key."""
+
+    config: dict[str, Any]
+    output_schema: dict[str, Any]
+    strategy: str = ConversionStrategy.PDF2IMG.value
+    render_settings: RenderSettings = Field(default_factory=RenderSettings)
+
+
+class Job(BaseModel):
+    id: int
+    run_id: str
+    kind: JobKind
+    payload: dict[str, Any]
+    attempts: int
+
+
+class LeaseLostError(Exception):
+    """Raised when a job's lease expired and another worker took it over."""
+
+
+class JobQueue:
+    """
+    Queue of conversion and extraction jobs in a SQLite file that several
+    worker processes, also on different machines with a shared filesystem,
+    can drain together.
+
+    Workers claim a job with a lease and extend it with heartbeats. Jobs
+    whose lease expires, because their worker died, are claimed again until
+    max_attempts is reached. Converted files are passed from conversion to
+    extraction jobs as artifacts next to the queue file.
+    """
+
+    def __init__(self, path: Path, lease_seconds: float = 60.0):
+        self.path = path
+        self.artifacts_path = path.parent / f"{path.stem}_artifacts"
+        self.lease_seconds = lease_seconds
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.artifacts_path.mkdir(exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def enqueue_run(
+        self, run: QueueRun, file_paths: list[Path], max_attempts: int = 3
+    ) -> str:
+        """
+        Adds one conversion job per file.
+
+        Returns:
+            The id of the run, used to wait for its result.
+        """
+        run_id = uuid.uuid4().hex
+        payload = run.model_dump(mode="json")
+        payload["config"] = {
+            k: v for k, v in payload["config"].items() if k != "api_key"
+        }
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute(
+                "INSERT INTO queue_runs (id, payload, created_at) VALUES (?, ?, ?)",
+                (run_id, _to_json(payload), now),
+            )
+            self.connection.executemany(
+                "INSERT INTO jobs (run_id, kind, payload, status, max_attempts, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        JobKind.CONVERT.value,
+                        _to_json({"file_path": str(path.resolve())}),
+                        JobStatus.PENDING.value,
+                        max_attempts,
+                        now,
+                    )
+                    for path in file_paths
+                ],
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return run_id
+
+    def load_run(self, run_id: str) -> QueueRun:
+        (payload,) = self.connection.execute(
+            "SELECT payload FROM queue_runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        return QueueRun.model_validate_json(payload)
+
+    def claim(self, worker_id: str) -> Job | None:
+        """Leases the oldest pending job or a job whose lease expired."""
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs of dead workers that used up their attempts are not retried.
+            self.connection.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(error, ?), "
+                "updated_at = ? WHERE status = ? AND lease_expires < ? "
+                "AND attempts >= max_attempts",
+                (
+                    JobStatus.FAILED.value,
+                    "Worker lease expired",
+                    now,
+                    JobStatus.RUNNING.value,
+                    now,
+                ),
+            )
+            row = self.connection.execute(
+                """
+                UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status = ? OR (status = ? AND lease_expires < ?)
+                    ORDER BY id LIMIT 1
+                )
+                RETURNING id, run_id, kind, payload, attempts
+                """,
+                (
+                    JobStatus.RUNNING.value,
+                    worker_id,
+                    now + self.lease_seconds,
+                    now,
+                    JobStatus.PENDING.value,
+                    JobStatus.RUNNING.value,
+                    now,
+                ),
+            ).fetchone()
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job_id, run_id, kind, payload, attempts = row
+        return Job(
+            id=job_id,
+            run_id=run_id,
+            kind=kind,
+            payload=jsonio.loads(payload),
+            attempts=attempts,
+        )
+
+    def heartbeat(self, job: Job, worker_id: str):
+        cursor = self.connection.execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = ?",
+            (
+                time.time() + self.lease_seconds,
+                time.time(),
+                job.id,
+                worker_id,
+                JobStatus.RUNNING.value,
+            ),
+        )
+        if cursor.rowcount == 0:
+            raise LeaseLostError(f"Lease of job {job.id} lost")
+
+    def complete(
+        self,
+        job: Job,
+        worker_id: str,
+        result: dict[str, Any],
+        next_jobs: list[tuple[JobKind, dict[str, Any]]] = (),
+    ):
+        """Stores the result of a job and enqueues its follow-up jobs atomically."""
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, "
+                "lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = ?",
+                (
+                    JobStatus.DONE.value,
+                    _to_json(result),
+                    now,
+                    job.id,
+                    worker_id,
+                    JobStatus.RUNNING.value,
+                ),
+            )
+            if cursor.rowcount == 0:
+                raise LeaseLostError(f"Lease of job {job.id} lost")
+            self.connection.executemany(
+                "INSERT INTO jobs (run_id, kind, payload, status, max_attempts, "
+                "updated_at) SELECT run_id, ?, ?, ?, max_attempts, ? "
+                "FROM jobs WHERE id = ?",
+                [
+                    (
+                        kind.value,
+                        _to_json(payload),
+                        JobStatus.PENDING.value,
+                        now,
+                        job.id,
+                    )
+                    for kind, payload in next_jobs
+                ],
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+    def fail(self, job: Job, worker_id: str, error: str):
+        """Releases a job for another attempt or marks it failed for good."""
+        self.connection.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts "
+            "THEN ? ELSE ? END, error = ?, lease_owner = NULL, "
+            "lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = ?",
+            (
+                JobStatus.FAILED.value,
+                JobStatus.PENDING.value,
+                error,
+                time.time(),
+                job.id,
+                worker_id,
+                JobStatus.RUNNING.value,
+            ),
+        )
+
+    def run_counts(self, run_id: str) -> dict[str, int]:
+        rows = self.connection.execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY status",
+            (run_id,),
+        ).fetchall()
+        return dict(rows)
+
+    def has_open_jobs(self) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM jobs WHERE status IN (?, ?) LIMIT 1",
+            (JobStatus.PENDING.value, JobStatus.RUNNING.value),
+        ).fetchone()
+        return row is not None
+
+    def is_finished(self, run_id: str) -> bool:
+        counts = self.run_counts(run_id)
+        return not counts.get(JobStatus.PENDING.value) and not counts.get(
+            JobStatus.RUNNING.value
+        )
+
+    def collect(self, run_id: str) -> ExtractionResult:
+        """
+        Aggregates the extracted files of a finished run. Files whose
+        conversion or extraction failed for good are reported with their error.
+        """
+        (created_at,) = self.connection.execute(
+            "SELECT created_at FROM queue_runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        rows = self.connection.execute(
+            "SELECT kind, status, payload, result, error, updated_at FROM jobs "
+            "WHERE run_id = ? ORDER BY id",
+            (run_id,),
+        ).fetchall()
+
+        files = []
+        finished_at = created_at
+        for kind, status, payload, result, error, updated_at in rows:
+            finished_at = max(finished_at, updated_at)
+            file_path = jsonio.loads(payload)["file_path"]
+            if kind == JobKind.EXTRACT.value and status == JobStatus.DONE.value:
+                files.append(ExtractedFile.model_validate_json(result))
+            elif status == JobStatus.FAILED.value:
+                files.append(ExtractedFile(file_path=file_path, error=error))
+
+        files.sort(key=lambda f: f.file_path)
+        return ExtractionResult(
+            status="success",
+            duration=int(finished_at - created_at),
+            files=files,
+            usage=sum((f.usage for f in files if f.usage), Usage()),
+        )
+
+
+async def wait_for_run(
+    queue: JobQueue, run_id: str, poll_interval: float = 1.0
+) -> ExtractionResult:
+    while not queue.is_finished(run_id):
+        await asyncio.sleep(poll_interval)
+    return queue.collect(run_id)
+
+
+class Worker:
+    """Claims jobs from a queue and runs them, up to max_concurrency at a time."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        worker_id: str | None = None,
+        max_concurrency: int = 4,
+        requests_per_minute: float | None = None,
+        poll_interval: float = 1.0,
+    ):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.max_concurrency = max_concurrency
+        self.poll_interval = poll_interval
+        self.rate_budget = RateBudget(
+            max_concurrency=max_concurrency, requests_per_minute=requests_per_minute
+        )
+        self.runs: dict[str, QueueRun] = {}
+
+    def _run(self, run_id: str) -> QueueRun:
+        if run_id not in self.runs:
+            self.runs[run_id] = self.queue.load_run(run_id)
+        return self.runs[run_id]
+
+    async def _convert(self, job: Job) -> tuple[dict, list]:
+        run = self._run(job.run_id)
+        conversion_task = ConversionTask(
+            file_paths=[Path(job.payload["file_path"])],
+            strategy=ConversionStrategy(run.strategy),
+            render_settings=run.render_settings,
+            requested_at=datetime.now(),
+        )
+        conversion_result = await asyncio.to_thread(run_conversions, conversion_task)
+        if not conversion_result.files:
+            raise RuntimeError("; ".join(conversion_result.errors) or "No output")
+
+        artifact_path = self.queue.artifacts_path / f"{job.id}.json"
+        tmp_path = artifact_path.with_suffix(".tmp")
+        tmp_path.write_text(conversion_result.files[0].model_dump_json())
+        os.replace(tmp_path, artifact_path)
+        next_job = {
+            "file_path": job.payload["file_path"],
+            "artifact": artifact_path.name,
+        }
+        return {"artifact": artifact_path.name}, [(JobKind.EXTRACT, next_job)]
+
+    async def _extract(self, job: Job) -> tuple[dict, list]:
+        run = self._run(job.run_id)
+        artifact_path = self.queue.artifacts_path / job.payload["artifact"]
+        converted_file = ConvertedFile.model_validate_json(artifact_path.read_text())
+        extraction_task = ExtractionTask(
+            config=ExtractionConfig.model_validate(run.config),
+            output_schema=run.output_schema,
+            files=[converted_file],
+            max_concurrency=1,
+        )
+        extraction_result = await run_extractions(
+            task=extraction_task, rate_budget=self.rate_budget
+        )
+        extracted_file = extraction_result.files[0]
+        # Answers that fail the schema are stored with their error, a retry
+        # would only pay for the same answer again.
+        if extracted_file.error and not extracted_file.invalid:
+            raise RuntimeError(extracted_file.error)
+        return extracted_file.model_dump(mode="json"), []
+
+    async def _heartbeat(self, job: Job):
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            self.queue.heartbeat(job, self.worker_id)
+
+    async def process(self, job: Job):
+        handler = self._convert if job.kind == JobKind.CONVERT else self._extract
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        work = asyncio.create_task(handler(job))
+        done, _ = await asyncio.wait(
+            {heartbeat, work}, return_when=asyncio.FIRST_COMPLETED
+        )
+        heartbeat.cancel()
+        if work not in done:
+            # The heartbeat failed, another worker owns the job now.
+            work.cancel()
+            print(f"Job {job.id}: {heartbeat.exception()}")
+            return
+        try:
+            result, next_jobs = work.result()
+            self.queue.complete(job, self.worker_id, result, next_jobs)
+            if job.kind == JobKind.EXTRACT:
+                (self.queue.artifacts_path / job.payload["artifact"]).unlink(
+                    missing_ok=True
+                )
+        except LeaseLostError as e:
+            print(f"Job {job.id}: {e}")
+        except Exception as e:
+            print(f"Job {job.id} failed (attempt {job.attempts}): {e}")
+            self.queue.fail(job, self.worker_id, str(e))
+
+    async def run(self, stop_when_empty: bool = False):
+        """
+        Processes jobs until stopped. With stop_when_empty the worker returns
+        once no job is left to claim and its own jobs are done.
+        """
+        print(f"Worker {self.worker_id} started.")
+        running: set[asyncio.Task] = set()
+        while True:
+            while len(running) < self.max_concurrency:
+                job = self.queue.claim(self.worker_id)
+                if job is None:
+                    break
+                task = asyncio.create_task(self.process(job))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            if stop_when_empty and not running and not self.queue.has_open_jobs():
+                break
+            await asyncio.sleep(self.poll_interval)
+        print(f"Worker {self.worker_id} stopped.")
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Process conversion and extraction jobs from a shared queue."
+    )
+    parser.add_argument("queue_path", type=Path)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--requests-per-minute", type=float, default=None)
+    parser.add_argument("--lease-seconds", type=float, default=60.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument(
+        "--stop-when-empty",
+        action="store_true",
+        help="Exit once the queue has no jobs left instead of waiting for more.",
+    )
+
+    args = parser.parse_args()
+    with JobQueue(args.queue_path, lease_seconds=args.lease_seconds) as queue:
+        worker = Worker(
+            queue,
+            max_concurrency=args.max_concurrency,
+            requests_per_minute=args.requests_per_minute,
+            poll_interval=args.poll_interval,
+        )
+        await worker.run(stop_when_empty=args.stop_when_empty)
+
+
+def cli():
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    cli()
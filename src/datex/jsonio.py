@@ -0,0 +1,43 @@
+from pathlib import Path
+from typing import Any
+import json
+import os
+import threading
+
+try:
+    import orjson
+except ImportError:  # The `fast` extra is not installed.
+    orjson = None
+
+# Raised for invalid JSON by both backends, orjson's error subclasses it.
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value: Any, indent: bool = False) -> bytes:
+    """Serializes to UTF-8 JSON, indented by two spaces if `indent` is set."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass  # E.g. non-string keys or integers beyond 64 bit.
+    return json.dumps(value, indent=2 if indent else None, ensure_ascii=False).encode(
+        "utf-8"
+    )
+
+
+def load(path: Path) -> Any:
+    return loads(Path(path).read_bytes())
+
+
+def dump(value: Any, path: Path, indent: bool = False):
+    """Writes the file atomically, readers never see a partial file."""
+    path = Path(path)
+    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(dumps(value, indent=indent))
+    os.replace(tmp_path, path)
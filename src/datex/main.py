@@ -1,11 +1,22 @@
 from dotenv import load_dotenv
 from pathlib import Path
-import json
+from datex import jsonio
 from datex.extraction import run_extractions
-from datex.extraction.schemas import ExtractionConfig, ExtractionTask
+from datex.extraction.schemas import (
+    BatchSettings,
+    ExtractionConfig,
+    ExtractionTask,
+    ScheduleOrder,
+)
+from datex.extraction.scheduling import schedule_paths
+from datex.extraction.results import save_result
 from datex.conversion import run_conversions
-from datex.conversion.schemas import ConversionTask
+from datex.conversion.schemas import ConversionTask, RenderSettings, RendererBackend
 from datex.conversion.strategies import ConversionStrategy
+from datex.manifest import update_manifest
+from datex.jobs import JobQueue, QueueRun, wait_for_run
+from datex.streaming import run_streaming_pipeline
+from datex.conversion.spill import ByteBudget
 import asyncio
 import argparse
 from datetime import datetime
@@ -14,20 +25,28 @@ load_dotenv()
 
 
 def load_config(path: Path) -> ExtractionConfig:
-    with open(path, "r") as file:
-        config_file = json.load(file)
-
-    config = ExtractionConfig.model_validate(config_file)
+    config = ExtractionConfig.model_validate(jsonio.load(path))
 
     return config
 
 
 def prepare_dataset(path: Path) -> list[Path]:
-    pdf_paths = []
-    for file in path.iterdir():
-        if file.suffix == ".pdf":
-            pdf_paths.append(file)
-    return pdf_paths
+    manifest = update_manifest(dataset_path=path)
+    return manifest.file_paths(dataset_path=path)
+
+
+def add_renderer_argument(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--renderer",
+        choices=[backend.value for backend in RendererBackend],
+        default=RenderSettings().renderer.value,
+        help="PDF renderer. pdftoppm and pdf2image need poppler and fall back "
+        "to pdfium if it is not installed.",
+    )
+
+
+def render_settings(args: argparse.Namespace) -> RenderSettings:
+    return RenderSettings(renderer=RendererBackend(args.renderer))
 
 
 async def run_pipeline(
@@ -35,27 +54,74 @@ async def run_pipeline(
     output_schema_path: Path,
     dataset_path: Path,
     expected_result_path: Path,
+    max_concurrency: int | None = None,
+    batching: BatchSettings | None = None,
+    queue_path: Path | None = None,
+    max_memory_bytes: int | None = None,
+    schedule: ScheduleOrder = ScheduleOrder.INPUT,
+    render_settings: RenderSettings | None = None,
 ):
+    if queue_path and (batching or max_concurrency or max_memory_bytes):
+        # Queued files are extracted one by one by the workers, which set
+        # their own concurrency.
+        raise ValueError(
+            "queue_path cannot be combined with batching, max_concurrency "
+            "or max_memory_bytes"
+        )
     config = load_config(path=config_path)
+    render_settings = render_settings or RenderSettings()
+
+    expected_result = jsonio.load(expected_result_path)
+
+    # Conversion, queued jobs and streaming follow the page counts, in-memory
+    # extraction re-orders by estimated tokens.
+    pdf_paths = schedule_paths(prepare_dataset(path=dataset_path), schedule)
+
+    if queue_path:
+        # Workers started with `datex-worker <queue_path>` do the work.
+        output_schema = jsonio.load(output_schema_path)
+        with JobQueue(queue_path) as queue:
+            run_id = queue.enqueue_run(
+                QueueRun(
+                    config=config.model_dump(mode="json"),
+                    output_schema=output_schema,
+                    render_settings=render_settings,
+                ),
+                file_paths=pdf_paths,
+            )
+            print(f"Enqueued {len(pdf_paths)} files as run {run_id}.")
+            extraction_results = await wait_for_run(queue, run_id)
+        return (extraction_results, expected_result)
 
-    with open(expected_result_path, mode="r", encoding="utf-8") as file:
-        expected_result = json.load(file)
-
-    pdf_paths = prepare_dataset(path=dataset_path)
     conversion_task = ConversionTask(
         file_paths=pdf_paths,
         strategy=ConversionStrategy.PDF2IMG,
+        render_settings=render_settings,
         requested_at=datetime.now(),
     )
-    conversion_result = run_conversions(conversion_task)
 
-    with open(output_schema_path, "r") as file:
-        output_schema = json.load(file)
+    output_schema = jsonio.load(output_schema_path)
+
+    if max_memory_bytes:
+        # Converts and extracts file by file within the byte budget.
+        extraction_results = await run_streaming_pipeline(
+            conversion_task=conversion_task,
+            config=config,
+            output_schema=output_schema,
+            byte_budget=ByteBudget(max_memory_bytes=max_memory_bytes),
+            max_concurrency=max_concurrency,
+        )
+        return (extraction_results, expected_result)
+
+    conversion_result = run_conversions(conversion_task)
 
     extraction_task = ExtractionTask(
         config=config,
         output_schema=output_schema,
         files=conversion_result.files,
+        max_concurrency=max_concurrency,
+        batching=batching,
+        schedule=schedule,
     )
 
     extraction_results = await run_extractions(task=extraction_task)
@@ -85,17 +151,82 @@ async def main():
     parser.add_argument("output_schema_path", type=file_path)
     parser.add_argument("dataset_path", type=dir_path)
     parser.add_argument("expected_result_path", type=file_path)
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Pack several small documents into one request.",
+    )
+    parser.add_argument("--batch-max-files", type=int, default=8)
+    parser.add_argument("--batch-max-pages", type=int, default=8)
+    parser.add_argument("--batch-max-tokens", type=int, default=None)
+    parser.add_argument(
+        "--queue",
+        type=Path,
+        default=None,
+        help="Enqueue the dataset into this job queue and wait for the workers.",
+    )
+    parser.add_argument(
+        "--max-memory-mb",
+        type=int,
+        default=None,
+        help="Stream files through conversion and extraction, keeping at most "
+        "this much encoded page data in memory and spilling the rest to disk. "
+        "The file being converted comes on top.",
+    )
+
+    parser.add_argument(
+        "--schedule",
+        choices=[order.value for order in ScheduleOrder],
+        default=ScheduleOrder.LONGEST_FIRST.value,
+        help="Start order of the files. longest_first minimizes the total run "
+        "time, shortest_first the mean time until a file is done.",
+    )
+    add_renderer_argument(parser)
+
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Save the extraction result to this file instead of printing it, "
+        "as JSON or, for a .dtxr suffix, in the compact binary format.",
+    )
 
     args = parser.parse_args()
+    if args.queue and (args.batch or args.max_memory_mb):
+        parser.error(
+            "--queue cannot be combined with --batch or --max-memory-mb, "
+            "start the workers with datex-worker --max-concurrency instead"
+        )
+    batching = None
+    if args.batch:
+        batching = BatchSettings(
+            max_files=args.batch_max_files,
+            max_pages=args.batch_max_pages,
+            max_tokens=args.batch_max_tokens,
+        )
     result = await run_pipeline(
         config_path=args.config_path,
         output_schema_path=args.output_schema_path,
         dataset_path=args.dataset_path,
         expected_result_path=args.expected_result_path,
+        batching=batching,
+        queue_path=args.queue,
+        max_memory_bytes=args.max_memory_mb * 2**20 if args.max_memory_mb else None,
+        schedule=ScheduleOrder(args.schedule),
+        render_settings=render_settings(args),
     )
 
-    print(result)
+    if args.output:
+        extraction_result, _ = result
+        save_result(args.output, extraction_result)
+        print(f"Result saved to {args.output}")
+    else:
+        print(result)
 
 
-if __name__ == "__main__":
+def cli():
     asyncio.run(main())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,212 @@
+from pydantic import BaseModel, Field
+from pathlib import Path
+import functools
+import hashlib
+import mmap
+import os
+import re
+import threading
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+ROOT_REF = re.compile(rb"/Root\s+(\d+)\s+(\d+)\s+R")
+PAGES_REF = re.compile(rb"/Pages\s+(\d+)\s+(\d+)\s+R")
+PAGE_COUNT = re.compile(rb"/Count\s+(\d+)")
+
+
+class ManifestEntry(BaseModel):
+    size: int
+    mtime_ns: int
+    sha256: str
+    page_count: int | None = None
+
+
+class DatasetManifest(BaseModel):
+    """Content hashes and page counts of the PDFs in a dataset, keyed by file name."""
+
+    files: dict[str, ManifestEntry] = Field(default_factory=dict)
+
+    def file_paths(self, dataset_path: Path) -> list[Path]:
+        return [dataset_path / name for name in sorted(self.files)]
+
+    def find_by_hash(self, sha256: str) -> str | None:
+        for name, entry in self.files.items():
+            if entry.sha256 == sha256:
+                return name
+        return None
+
+
+def hash_file(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(1024 * 1024):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _last_object(data: mmap.mmap, number: bytes, generation: bytes) -> bytes | None:
+    """Body of the newest definition of an object, None if it is compressed."""
+    pattern = re.compile(
+        rb"(?<![0-9])%s\s+%s\s+obj\b(.*?)\bendobj" % (number, generation), re.DOTALL
+    )
+    body = None
+    for match in pattern.finditer(data):
+        body = match.group(1)
+    return body
+
+
+def _root_page_count(data: mmap.mmap) -> int | None:
+    """
+    Follows the /Root of the last trailer to the root of the page tree.
+    Incremental updates append newer trailers and objects, so the last
+    occurrence of each is the current one.
+    """
+    root = None
+    for match in ROOT_REF.finditer(data):
+        root = match.groups()
+    catalog = _last_object(data, *root) if root else None
+    pages = PAGES_REF.search(catalog) if catalog else None
+    pages_node = _last_object(data, *pages.groups()) if pages else None
+    count = PAGE_COUNT.search(pages_node) if pages_node else None
+    return int(count.group(1)) if count else None
+
+
+def hash_files(file_paths: list[Path]) -> dict[Path, str]:
+    """
+    Content hashes of the files, taken from the manifest of their folder
+    where size and modification time still match, computed otherwise.
+    Unreadable files are left out.
+    """
+    manifests: dict[Path, DatasetManifest] = {}
+    hashes = {}
+    for file_path in file_paths:
+        path = Path(file_path)
+        try:
+            stat = path.stat()
+            if path.parent not in manifests:
+                manifests[path.parent] = _current_manifest(path.parent)
+            known = manifests[path.parent].files.get(path.name)
+            if (
+                known
+                and known.size == stat.st_size
+                and known.mtime_ns == stat.st_mtime_ns
+            ):
+                hashes[file_path] = known.sha256
+            else:
+                hashes[file_path] = hash_file(path)
+        except OSError:
+            continue
+    return hashes
+
+
+def _current_manifest(dataset_path: Path) -> DatasetManifest:
+    """
+    The manifest of a folder, parsed once per version of the file. Callers
+    convert files one at a time, so reparsing it on every call would be
+    quadratic in the size of the dataset. The result is shared, read only.
+    """
+    manifest_path = dataset_path / MANIFEST_FILE_NAME
+    try:
+        stat = manifest_path.stat()
+    except OSError:
+        return DatasetManifest()
+    return _parsed_manifest(manifest_path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=16)
+def _parsed_manifest(manifest_path: Path, mtime_ns: int, size: int) -> DatasetManifest:
+    return load_manifest(manifest_path.parent)
+
+
+def read_page_count(path: Path) -> int | None:
+    """
+    Reads the page count without rendering: first from the root of the page
+    tree in the raw file, then, for PDFs with compressed object streams, from
+    pdfinfo or pdfium, whichever is installed.
+    """
+    with open(path, "rb") as file:
+        if not os.fstat(file.fileno()).st_size:
+            return None
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            count = _root_page_count(data)
+    if count is not None:
+        return count
+
+    try:
+        from pdf2image import pdfinfo_from_path
+
+        return int(pdfinfo_from_path(str(path))["Pages"])
+    except Exception:
+        pass
+    try:
+        import pypdfium2 as pdfium
+        from datex.conversion.renderers import _pdfium_lock
+
+        with _pdfium_lock:
+            document = pdfium.PdfDocument(path)
+            try:
+                return len(document)
+            finally:
+                document.close()
+    except Exception:
+        return None
+
+
+def load_manifest(dataset_path: Path) -> DatasetManifest:
+    manifest_path = dataset_path / MANIFEST_FILE_NAME
+    if not manifest_path.exists():
+        return DatasetManifest()
+    try:
+        return DatasetManifest.model_validate_json(manifest_path.read_bytes())
+    except ValueError:
+        return DatasetManifest()
+
+
+def save_manifest(dataset_path: Path, manifest: DatasetManifest):
+    manifest_path = dataset_path / MANIFEST_FILE_NAME
+    # Concurrent sessions update the same manifest, every writer has its own file.
+    tmp_path = manifest_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(manifest.model_dump_json(indent=2), encoding="utf-8")
+    os.replace(tmp_path, manifest_path)
+
+
+def update_manifest(dataset_path: Path) -> DatasetManifest:
+    """
+    Brings the manifest of a dataset up to date. Only files whose size or
+    modification time changed are hashed and counted again.
+
+    Args:
+        dataset_path: Directory containing the PDFs.
+
+    Returns:
+        The updated DatasetManifest, which is also written to the dataset.
+    """
+    manifest = load_manifest(dataset_path)
+    files: dict[str, ManifestEntry] = {}
+    changed = False
+    with os.scandir(dataset_path) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".pdf") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            known = manifest.files.get(entry.name)
+            if (
+                known
+                and known.size == stat.st_size
+                and known.mtime_ns == stat.st_mtime_ns
+            ):
+                files[entry.name] = known
+                continue
+            path = Path(entry.path)
+            files[entry.name] = ManifestEntry(
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                sha256=hash_file(path),
+                page_count=read_page_count(path),
+            )
+            changed = True
+
+    if changed or files.keys() != manifest.files.keys():
+        manifest = DatasetManifest(files=files)
+        save_manifest(dataset_path, manifest)
+    return manifest
@@ -0,0 +1,434 @@
+from pydantic import BaseModel
+from pathlib import Path
+from typing import Any
+from datetime import datetime
+import hashlib
+import json
+import sqlite3
+from datex import jsonio
+from datex.evaluation.pipeline import (
+    build_comparison_table,
+    get_path,
+    inferred_fields,
+    schema_fields,
+    MISSING,
+)
+from datex.evaluation.schemas import EvaluationTask
+from datex.extraction.schemas import ExtractedFile, ExtractionResult
+from datex.extraction.results import (
+    BINARY_RESULT_SUFFIX,
+    BinaryResultReader,
+)
+
+RUN_STORE_FILE_NAME = "runs.sqlite"
+RESULT_FILE_NAMES = [
+    "extraction_result.json",
+    f"extraction_result{BINARY_RESULT_SUFFIX}",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS configs (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    config TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    config_id INTEGER REFERENCES configs(id),
+    status TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    exact_match REAL,
+    source TEXT UNIQUE
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    file_path TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    data TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS field_values (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    value TEXT,
+    expected TEXT,
+    exact_match INTEGER,
+    similarity REAL
+);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs(created_at);
+CREATE INDEX IF NOT EXISTS files_run ON files(run_id);
+CREATE INDEX IF NOT EXISTS field_values_field ON field_values(field, file_id);
+CREATE INDEX IF NOT EXISTS field_values_file ON field_values(file_id);
+"""
+
+
+class RunSummary(BaseModel):
+    id: int
+    name: str
+    created_at: datetime
+    files: int
+    errors: int
+    exact_match: float | None
+    config: dict[str, Any] | None
+
+
+class FieldAccuracy(BaseModel):
+    run_id: int
+    run_name: str
+    created_at: datetime
+    field: str
+    count: int
+    exact_match: float | None
+
+
+def _to_json(value: Any) -> str:
+    return jsonio.dumps(value).decode("utf-8")
+
+
+class RunStore:
+    """
+    Run history of a dataset in one SQLite database with tables for runs,
+    configs, files and field values.
+
+        store = RunStore(dataset_path / RUN_STORE_FILE_NAME)
+        store.save_run(result, config, expected, output_schema)
+        store.field_accuracy("voltage", last=20)
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "RunStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _config_id(self, config: dict[str, Any]) -> int:
+        config = {k: v for k, v in config.items() if k != "api_key"}
+        config_json = json.dumps(config, sort_keys=True)
+        config_hash = hashlib.sha256(config_json.encode("utf-8")).hexdigest()
+        self.connection.execute(
+            "INSERT OR IGNORE INTO configs (hash, config) VALUES (?, ?)",
+            (config_hash, config_json),
+        )
+        (config_id,) = self.connection.execute(
+            "SELECT id FROM configs WHERE hash = ?", (config_hash,)
+        ).fetchone()
+        return config_id
+
+    @staticmethod
+    def _field_rows(
+        result: ExtractionResult,
+        expected: dict[str, dict[str, Any]] | None,
+        output_schema: dict[str, Any] | None,
+    ) -> dict[str, list[tuple]]:
+        """Returns (field, value, expected, exact match, similarity) rows per file name."""
+        rows: dict[str, list[tuple]] = {}
+        if expected:
+            table = build_comparison_table(
+                EvaluationTask(
+                    extraction_result=result,
+                    expected=expected,
+                    output_schema=output_schema,
+                )
+            )
+            for i in range(len(table)):
+                exact = table.exact[i]
+                similarity = table.similarity[i]
+                rows.setdefault(table.documents[table.doc_index[i]], []).append(
+                    (
+                        table.fields[table.field_index[i]][0],
+                        _to_json(table.extracted[i]),
+                        _to_json(table.expected[i]),
+                        None if exact != exact else int(exact),
+                        None if similarity != similarity else float(similarity),
+                    )
+                )
+
+        data_by_name = {Path(f.file_path).name: f.data for f in result.files}
+        if output_schema:
+            fields = schema_fields(output_schema)
+        else:
+            fields = inferred_fields({k: v for k, v in data_by_name.items() if v})
+        for name, data in data_by_name.items():
+            if name in rows or not data:
+                continue
+            rows[name] = [
+                (path, _to_json(value), None, None, None)
+                for path, _ in fields
+                if (value := get_path(data, path.split("."))) is not MISSING
+            ]
+        return rows
+
+    def save_run(
+        self,
+        result: ExtractionResult,
+        config: dict[str, Any],
+        expected: dict[str, dict[str, Any]] | None = None,
+        output_schema: dict[str, Any] | None = None,
+        name: str | None = None,
+        created_at: datetime | None = None,
+        source: str | None = None,
+    ) -> int:
+        """
+        Stores a run with all its files and field values in one transaction.
+
+        Args:
+            result: The ExtractionResult of the run.
+            config: The extraction config used, the API key is never stored.
+            expected: Expected results keyed by file name, used to store matches.
+            output_schema: Output schema of the dataset, used to flatten fields.
+            name: Display name, defaults to the timestamp.
+            created_at: Defaults to now.
+            source: Unique origin of imported runs, e.g. their folder.
+
+        Returns:
+            The id of the new run.
+        """
+        created_at = created_at or datetime.now()
+        field_rows = self._field_rows(result, expected, output_schema)
+        exact_values = [
+            r[3] for rows in field_rows.values() for r in rows if r[3] is not None
+        ]
+        exact_match = sum(exact_values) / len(exact_values) if exact_values else None
+
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (name, created_at, config_id, status, duration, "
+                "exact_match, source) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    name or created_at.strftime("%Y-%m-%d_%H-%M-%S"),
+                    created_at.isoformat(),
+                    self._config_id(config),
+                    result.status,
+                    result.duration,
+                    exact_match,
+                    source,
+                ),
+            )
+            run_id = cursor.lastrowid
+            values = []
+            for file in result.files:
+                file_name = Path(file.file_path).name
+                cursor = self.connection.execute(
+                    "INSERT INTO files (run_id, file_path, file_name, data, error) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        run_id,
+                        file.file_path,
+                        file_name,
+                        _to_json(file.data) if file.data is not None else None,
+                        file.error,
+                    ),
+                )
+                file_id = cursor.lastrowid
+                values.extend((file_id, *row) for row in field_rows.get(file_name, []))
+            self.connection.executemany(
+                "INSERT INTO field_values (file_id, field, value, expected, "
+                "exact_match, similarity) VALUES (?, ?, ?, ?, ?, ?)",
+                values,
+            )
+        return run_id
+
+    def list_runs(self, last: int = 20) -> list[RunSummary]:
+        rows = self.connection.execute(
+            """
+            SELECT r.id, r.name, r.created_at, r.exact_match, c.config,
+                (SELECT COUNT(*) FROM files f WHERE f.run_id = r.id),
+                (SELECT COUNT(*) FROM files f
+                 WHERE f.run_id = r.id AND f.error IS NOT NULL)
+            FROM runs r LEFT JOIN configs c ON c.id = r.config_id
+            ORDER BY r.created_at DESC LIMIT ?
+            """,
+            (last,),
+        ).fetchall()
+        return [
+            RunSummary(
+                id=run_id,
+                name=name,
+                created_at=created_at,
+                exact_match=exact_match,
+                config=jsonio.loads(config) if config else None,
+                files=files,
+                errors=errors,
+            )
+            for run_id, name, created_at, exact_match, config, files, errors in rows
+        ]
+
+    def field_accuracy(self, field: str, last: int = 20) -> list[FieldAccuracy]:
+        """Exact-match rate of one field in each of the last runs, newest first."""
+        rows = self.connection.execute(
+            """
+            WITH recent AS (
+                SELECT id, name, created_at FROM runs
+                ORDER BY created_at DESC LIMIT ?
+            )
+            SELECT r.id, r.name, r.created_at, COUNT(v.exact_match),
+                AVG(v.exact_match)
+            FROM recent r
+            JOIN files f ON f.run_id = r.id
+            JOIN field_values v ON v.file_id = f.id AND v.field = ?
+            GROUP BY r.id ORDER BY r.created_at DESC
+            """,
+            (last, field),
+        ).fetchall()
+        return [
+            FieldAccuracy(
+                run_id=run_id,
+                run_name=name,
+                created_at=created_at,
+                field=field,
+                count=count,
+                exact_match=exact_match,
+            )
+            for run_id, name, created_at, count, exact_match in rows
+        ]
+
+    def run_field_accuracy(self, run_id: int) -> list[FieldAccuracy]:
+        """Exact-match rate of every field in one run."""
+        rows = self.connection.execute(
+            """
+            SELECT r.id, r.name, r.created_at, v.field, COUNT(v.exact_match),
+                AVG(v.exact_match)
+            FROM runs r
+            JOIN files f ON f.run_id = r.id
+            JOIN field_values v ON v.file_id = f.id
+            WHERE r.id = ?
+            GROUP BY v.field ORDER BY v.field
+            """,
+            (run_id,),
+        ).fetchall()
+        return [
+            FieldAccuracy(
+                run_id=run_id,
+                run_name=name,
+                created_at=created_at,
+                field=field,
+                count=count,
+                exact_match=exact_match,
+            )
+            for run_id, name, created_at, field, count, exact_match in rows
+        ]
+
+    def fields(self) -> list[str]:
+        rows = self.connection.execute(
+            "SELECT DISTINCT field FROM field_values ORDER BY field"
+        ).fetchall()
+        return [field for (field,) in rows]
+
+    def load_run(self, run_id: int) -> ExtractionResult:
+        status, duration = self.connection.execute(
+            "SELECT status, duration FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        files = self.connection.execute(
+            "SELECT file_path, data, error FROM files WHERE run_id = ? ORDER BY id",
+            (run_id,),
+        ).fetchall()
+        return ExtractionResult(
+            status=status,
+            duration=duration,
+            files=[
+                ExtractedFile(
+                    file_path=file_path,
+                    data=jsonio.loads(data) if data is not None else None,
+                    error=error,
+                )
+                for file_path, data, error in files
+            ],
+        )
+
+    def has_source(self, source: str) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM runs WHERE source = ?", (source,)
+        ).fetchone()
+        return row is not None
+
+
+def read_run_folder(run_folder_path: Path) -> tuple[ExtractionResult, dict[str, Any]]:
+    """
+    Reads a run folder with extraction_result.json or extraction_result.dtxr
+    and config.json. Both the ExtractionResult layout and the older mapping
+    of file names to data are supported.
+    """
+    binary_result_path = run_folder_path / RESULT_FILE_NAMES[1]
+    if binary_result_path.exists():
+        with BinaryResultReader(binary_result_path) as reader:
+            result = reader.result()
+    else:
+        raw_result = jsonio.load(run_folder_path / RESULT_FILE_NAMES[0])
+        if isinstance(raw_result, dict) and isinstance(raw_result.get("files"), list):
+            result = ExtractionResult.model_validate(raw_result)
+        else:
+            result = ExtractionResult(
+                status="success",
+                duration=0,
+                files=[
+                    ExtractedFile(file_path=name, data=data)
+                    for name, data in (raw_result or {}).items()
+                ],
+            )
+
+    config = {}
+    config_path = run_folder_path / "config.json"
+    if config_path.exists():
+        config = jsonio.load(config_path)
+    return result, config
+
+
+def import_run_folders(
+    store: RunStore,
+    dataset_path: Path,
+    expected: dict[str, dict[str, Any]] | None = None,
+    output_schema: dict[str, Any] | None = None,
+) -> list[int]:
+    """
+    Imports the run folders under <dataset>/runs into the store. Folders that
+    were imported before are skipped.
+
+    Returns:
+        The ids of the imported runs.
+    """
+    run_ids = []
+    runs_path = dataset_path / "runs"
+    if not runs_path.exists():
+        return run_ids
+    result_paths = {
+        result_path.parent: result_path
+        for name in RESULT_FILE_NAMES
+        for result_path in runs_path.rglob(name)
+    }
+    for run_folder_path, result_path in sorted(result_paths.items()):
+        source = run_folder_path.relative_to(dataset_path).as_posix()
+        if store.has_source(source):
+            continue
+        result, config = read_run_folder(run_folder_path)
+        timestamp_folder = next(
+            (p for p in run_folder_path.relative_to(runs_path).parts), ""
+        )
+        try:
+            created_at = datetime.strptime(timestamp_folder[:19], "%Y-%m-%d_%H-%M-%S")
+        except ValueError:
+            created_at = datetime.fromtimestamp(result_path.stat().st_mtime)
+        run_ids.append(
+            store.save_run(
+                result=result,
+                config=config,
+                expected=expected,
+                output_schema=output_schema,
+                name=run_folder_path.relative_to(runs_path).as_posix(),
+                created_at=created_at,
+                source=source,
+            )
+        )
+    return run_ids
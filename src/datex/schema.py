@@ -0,0 +1,102 @@
+from pydantic import BaseModel, ValidationError, create_model
+from typing import Any, Dict, List, Optional, Tuple, Type
+import hashlib
+import json
+import threading
+
+type_map: Dict[str, Type[Any]] = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "object": dict,
+}
+
+
+def schema_hash(schema: dict[str, Any]) -> str:
+    schema_json = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(schema_json.encode("utf-8")).hexdigest()
+
+
+def parse_field(
+    name: str, info: Dict[str, Any], required: bool = True
+) -> Tuple[str, Tuple[Any, Any]]:
+    """
+    Converts a schema field into a (field name, (type, default)) tuple.
+    """
+    t = info.get("type")
+    nullable = False
+    if isinstance(t, list):
+        nullable = "null" in t
+        t = next((x for x in t if x != "null"), None)
+
+    if t == "array":
+        items_info = info.get("items", {})
+        item_type_str = items_info.get("type")
+
+        if item_type_str == "object" and "properties" in items_info:
+            py_type = List[build_model(items_info, f"{name}Item")]
+        else:
+            item_type = type_map.get(item_type_str, Any)
+            py_type = List[item_type]
+    elif t == "object" and "properties" in info:
+        py_type = build_model(info, f"{name}Object")
+    else:
+        py_type = type_map.get(t, Any)
+
+    if nullable:
+        py_type = Optional[py_type]
+    default = ... if required else None
+    return name, (py_type, default)
+
+
+def build_model(schema: dict[str, Any], name: str = "OutputModel") -> Type[BaseModel]:
+    """Builds a pydantic model from an object schema, nested objects included."""
+    required = set(schema.get("required", []))
+    fields = dict(
+        parse_field(field_name, info, required=field_name in required)
+        for field_name, info in schema.get("properties", {}).items()
+    )
+    return create_model(name, **fields)  # type: ignore
+
+
+class CompiledSchema:
+    """An output schema together with its pydantic model and validator."""
+
+    def __init__(self, schema: dict[str, Any], key: str):
+        self.schema = schema
+        self.key = key
+        self.model = build_model(schema)
+        self.validator = self.model.__pydantic_validator__
+
+    def validate(self, data: Any) -> str | None:
+        """Returns a short error message if data does not match the schema."""
+        try:
+            self.validator.validate_python(data)
+        except ValidationError as e:
+            errors = ", ".join(
+                f"{'.'.join(str(p) for p in error['loc'])}: {error['msg']}"
+                for error in e.errors()[:5]
+            )
+            return f"Output does not match schema ({e.error_count()} errors): {errors}"
+        return None
+
+
+_compiled_schemas: dict[str, CompiledSchema] = {}
+_compiled_schemas_lock = threading.Lock()
+
+
+def compile_schema(schema: dict[str, Any]) -> CompiledSchema:
+    """
+    Returns the compiled model and validator of a schema. They are built once
+    per schema hash and shared by all callers in the process.
+    """
+    key = schema_hash(schema)
+    compiled = _compiled_schemas.get(key)
+    if compiled is None:
+        with _compiled_schemas_lock:
+            compiled = _compiled_schemas.get(key)
+            if compiled is None:
+                compiled = CompiledSchema(schema, key)
+                _compiled_schemas[key] = compiled
+    return compiled
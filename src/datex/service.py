@@ -0,0 +1,384 @@
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+from pathlib import Path
+from typing import Any, Literal
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import asyncio
+import itertools
+import shutil
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from datex import jsonio
+from datex.main import add_renderer_argument, file_path, load_config, render_settings
+from datex.extraction import run_extractions
+from datex.extraction.limits import RateBudget
+from datex.extraction.schemas import (
+    ExtractedFile,
+    ExtractionConfig,
+    ExtractionTask,
+    ScheduleOrder,
+)
+from datex.extraction.strategies import ExtractionStrategy
+from datex.conversion import run_conversions
+from datex.conversion.schemas import ConversionTask, RenderSettings
+from datex.conversion.strategies import ConversionStrategy
+from datex.manifest import read_page_count
+
+load_dotenv()
+
+REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class ServiceJob(BaseModel):
+    id: str
+    file_name: str
+    priority: int = 0
+    pages: int | None = None
+    status: Literal["queued", "running", "done", "failed"] = "queued"
+    submitted_at: datetime = Field(default_factory=datetime.now)
+    finished_at: datetime | None = None
+    result: ExtractedFile | None = None
+    error: str | None = None
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ExtractionService:
+    """
+    Long-running HTTP service that extracts single PDFs with one warm
+    extractor. Documents wait in a bounded queue; when it is full, new
+    submissions are rejected with 503 and a Retry-After header instead of
+    piling up. Queued documents start by priority, then in the schedule
+    order; SHORTEST_FIRST by page count minimizes the mean latency.
+
+        POST /v1/extract?name=invoice.pdf[&priority=1][&wait=30]   body: the PDF
+        GET  /v1/jobs/<id>
+        GET  /health
+    """
+
+    def __init__(
+        self,
+        config: ExtractionConfig,
+        output_schema: dict[str, Any],
+        workers: int = 4,
+        max_queue_size: int = 32,
+        requests_per_minute: float | None = None,
+        render_settings: RenderSettings | None = None,
+        max_body_bytes: int = 50 * 1024 * 1024,
+        max_finished_jobs: int = 1000,
+        schedule: ScheduleOrder = ScheduleOrder.INPUT,
+    ):
+        self.config = config
+        self.output_schema = output_schema
+        self.workers = workers
+        self.render_settings = render_settings or RenderSettings()
+        self.max_body_bytes = max_body_bytes
+        self.max_finished_jobs = max_finished_jobs
+        self.schedule = schedule
+
+        # Created once, so provider clients and their connections stay warm.
+        self.extractor = ExtractionStrategy(config.provider).strategy_class(
+            config=config, output_schema=output_schema
+        )
+        self.rate_budget = RateBudget(
+            max_concurrency=workers, requests_per_minute=requests_per_minute
+        )
+        self.queue: asyncio.PriorityQueue[tuple[tuple[int, int, int], ServiceJob]] = (
+            asyncio.PriorityQueue(maxsize=max_queue_size)
+        )
+        self.submitted = itertools.count()
+        self.jobs: OrderedDict[str, ServiceJob] = OrderedDict()
+        self.done_events: dict[str, asyncio.Event] = {}
+        self.upload_path = Path(tempfile.mkdtemp(prefix="datex-service-"))
+        self.running = 0
+        self.seconds_per_job = 1.0
+
+    def _finish(self, job: ServiceJob):
+        job.finished_at = datetime.now()
+        self.done_events.pop(job.id).set()
+        # Forget the oldest finished jobs once there are too many.
+        finished = [j for j in self.jobs.values() if j.finished_at]
+        for old_job in finished[: max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[old_job.id]
+
+    async def _process(self, job: ServiceJob):
+        pdf_path = self.upload_path / f"{job.id}.pdf"
+        try:
+            conversion_task = ConversionTask(
+                file_paths=[pdf_path],
+                strategy=ConversionStrategy.PDF2IMG,
+                render_settings=self.render_settings,
+                requested_at=datetime.now(),
+            )
+            conversion_result = await asyncio.to_thread(
+                run_conversions, conversion_task
+            )
+            if not conversion_result.files:
+                raise RuntimeError("; ".join(conversion_result.errors) or "No output")
+            extraction_task = ExtractionTask(
+                config=self.config,
+                output_schema=self.output_schema,
+                files=conversion_result.files,
+            )
+            extraction_result = await run_extractions(
+                task=extraction_task,
+                rate_budget=self.rate_budget,
+                extractor=self.extractor,
+            )
+            job.result = extraction_result.files[0].model_copy(
+                update={"file_path": job.file_name}
+            )
+            job.error = job.result.error
+            job.status = "failed" if job.error and not job.result.invalid else "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            pdf_path.unlink(missing_ok=True)
+
+    async def _worker(self):
+        while True:
+            _, job = await self.queue.get()
+            job.status = "running"
+            self.running += 1
+            start = time.monotonic()
+            try:
+                await self._process(job)
+            finally:
+                self.running -= 1
+                # Moving average used for the Retry-After estimate.
+                self.seconds_per_job = 0.8 * self.seconds_per_job + 0.2 * (
+                    time.monotonic() - start
+                )
+                self._finish(job)
+                self.queue.task_done()
+
+    def _sort_key(self, job: ServiceJob) -> tuple[int, int, int]:
+        pages = job.pages or 1
+        if self.schedule == ScheduleOrder.LONGEST_FIRST:
+            cost = -pages
+        elif self.schedule == ScheduleOrder.SHORTEST_FIRST:
+            cost = pages
+        else:
+            cost = 0
+        # Ties start in submission order.
+        return (-job.priority, cost, next(self.submitted))
+
+    def _check_capacity(self):
+        if self.queue.full():
+            retry_after = self.queue.qsize() * self.seconds_per_job / self.workers
+            raise HTTPError(503, f"Queue full, retry in {retry_after:.0f}s")
+
+    async def submit(
+        self, content: bytes, file_name: str, priority: int = 0
+    ) -> ServiceJob:
+        self._check_capacity()
+        job = ServiceJob(id=uuid.uuid4().hex, file_name=file_name, priority=priority)
+        pdf_path = self.upload_path / f"{job.id}.pdf"
+        # Writing and scanning bodies of up to max_body_bytes would block
+        # all other connections.
+        await asyncio.to_thread(pdf_path.write_bytes, content)
+        if self.schedule != ScheduleOrder.INPUT:
+            job.pages = await asyncio.to_thread(read_page_count, pdf_path)
+        try:
+            # Other uploads may have filled the queue in the meantime.
+            self._check_capacity()
+        except HTTPError:
+            pdf_path.unlink(missing_ok=True)
+            raise
+        self.jobs[job.id] = job
+        self.done_events[job.id] = asyncio.Event()
+        self.queue.put_nowait((self._sort_key(job), job))
+        return job
+
+    async def wait(self, job: ServiceJob, timeout: float) -> ServiceJob:
+        event = self.done_events.get(job.id)
+        if event:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except TimeoutError:
+                pass
+        return job
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> tuple[str, str, dict[str, str], bytes]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while line := (await reader.readline()).decode("latin-1").strip():
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "Content-Length must be an integer")
+        if length < 0:
+            raise HTTPError(400, "Content-Length must not be negative")
+        if length > self.max_body_bytes:
+            raise HTTPError(413, f"Body exceeds {self.max_body_bytes} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method, target, headers, body
+
+    @staticmethod
+    def _wait_timeout(query: dict[str, str]) -> float | None:
+        """Returns the ?wait= timeout in seconds, None if the client does not wait."""
+        if "wait" not in query:
+            return None
+        try:
+            timeout = float(query["wait"] or 300)
+        except ValueError:
+            raise HTTPError(400, "wait must be a number of seconds")
+        if not timeout >= 0:
+            raise HTTPError(400, "wait must not be negative")
+        return timeout
+
+    async def _route(
+        self, method: str, target: str, body: bytes
+    ) -> tuple[int, dict[str, Any]]:
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/health":
+            return 200, {
+                "status": "ok",
+                "queued": self.queue.qsize(),
+                "running": self.running,
+                "max_queue_size": self.queue.maxsize,
+            }
+
+        if url.path == "/v1/extract":
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            if not body.startswith(b"%PDF"):
+                raise HTTPError(400, "Body must be a PDF")
+            try:
+                priority = int(query.get("priority", 0))
+            except ValueError:
+                raise HTTPError(400, "priority must be an integer")
+            timeout = self._wait_timeout(query)
+            job = await self.submit(
+                body, file_name=query.get("name", "document.pdf"), priority=priority
+            )
+            if timeout is not None:
+                job = await self.wait(job, timeout=timeout)
+            status = 200 if job.finished_at else 202
+            return status, job.model_dump(mode="json")
+
+        if url.path.startswith("/v1/jobs/"):
+            job = self.jobs.get(url.path.removeprefix("/v1/jobs/"))
+            if job is None:
+                raise HTTPError(404, "Unknown job")
+            timeout = self._wait_timeout(query)
+            if timeout is not None:
+                job = await self.wait(job, timeout=timeout)
+            return 200, job.model_dump(mode="json")
+
+        raise HTTPError(404, "Not found")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await self._respond(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        headers = {}
+        try:
+            method, target, _, body = await self._read_request(reader)
+            status, payload = await self._route(method, target, body)
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+            if e.status == 503:
+                retry_after = self.queue.qsize() * self.seconds_per_job / self.workers
+                headers["Retry-After"] = str(max(1, round(retry_after)))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            raise
+        except Exception as e:
+            print(f"Request failed: {e!r}")
+            status, payload = 500, {"error": "Internal server error"}
+
+        content = jsonio.dumps(payload)
+        headers["Content-Type"] = "application/json"
+        headers["Content-Length"] = str(len(content))
+        headers["Connection"] = "close"
+        head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+        writer.write(head.encode("latin-1") + b"\r\n" + content)
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080):
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving on http://{host}:{port} with {self.workers} workers.")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            shutil.rmtree(self.upload_path, ignore_errors=True)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Serve extractions over HTTP.")
+    parser.add_argument("config_path", type=file_path)
+    parser.add_argument("output_schema_path", type=file_path)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-queue-size", type=int, default=32)
+    parser.add_argument("--requests-per-minute", type=float, default=None)
+    parser.add_argument(
+        "--schedule",
+        choices=[order.value for order in ScheduleOrder],
+        default=ScheduleOrder.INPUT.value,
+        help="Start order of queued documents of the same priority.",
+    )
+    add_renderer_argument(parser)
+
+    args = parser.parse_args()
+    output_schema = jsonio.load(args.output_schema_path)
+    service = ExtractionService(
+        config=load_config(path=args.config_path),
+        output_schema=output_schema,
+        workers=args.workers,
+        max_queue_size=args.max_queue_size,
+        requests_per_minute=args.requests_per_minute,
+        schedule=ScheduleOrder(args.schedule),
+        render_settings=render_settings(args),
+    )
+    await service.serve(host=args.host, port=args.port)
+
+
+def cli():
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,113 @@
+from pathlib import Path
+from typing import Any, Callable
+import asyncio
+from datetime import datetime
+from datex.extraction import run_extractions
+from datex.extraction.limits import RateBudget
+from datex.extraction.schemas import (
+    ExtractedFile,
+    ExtractionConfig,
+    ExtractionResult,
+    ExtractionTask,
+    Usage,
+)
+from datex.extraction.strategies import Extraction, ExtractionStrategy
+from datex.extraction.payloads import uncached_payloads
+from datex.conversion import run_conversions
+from datex.conversion.schemas import ConversionTask
+from datex.conversion.spill import ByteBudget
+
+
+async def run_streaming_pipeline(
+    conversion_task: ConversionTask,
+    config: ExtractionConfig,
+    output_schema: dict[str, Any],
+    byte_budget: ByteBudget,
+    max_concurrency: int | None = None,
+    on_result: Callable[[ExtractedFile], None] | None = None,
+    rate_budget: RateBudget | None = None,
+    extractor: Extraction | None = None,
+) -> ExtractionResult:
+    """
+    Converts and extracts files one by one, so that only the files between
+    conversion and finished extraction are held. Each converted file is
+    admitted to the byte budget, which spills it to disk beyond the memory
+    cap and pauses conversion beyond the in-flight cap. A file is admitted
+    after its conversion, so peak memory is the budget plus one fully
+    converted file.
+
+    Args:
+        conversion_task: The files to convert and the conversion settings.
+        config: The extraction config.
+        output_schema: The output schema.
+        byte_budget: Memory and in-flight limits for converted content.
+        max_concurrency: Maximum number of concurrent extraction requests.
+        on_result: Optional callback for every finished ExtractedFile.
+        rate_budget: Optional budget shared with other runs. Overrides
+            max_concurrency.
+        extractor: Optional strategy instance to reuse, e.g. with warm clients.
+
+    Returns:
+        An ExtractionResult with all files, including failed conversions.
+    """
+    start_time = datetime.now()
+    if extractor is None:
+        extractor = ExtractionStrategy(config.provider).strategy_class(
+            config=config, output_schema=output_schema
+        )
+    rate_budget = rate_budget or RateBudget(max_concurrency=max_concurrency)
+    extracted_files: list[ExtractedFile] = []
+
+    def add_result(extracted_file: ExtractedFile):
+        extracted_files.append(extracted_file)
+        if on_result:
+            on_result(extracted_file)
+
+    async def extract(converted_file, reservation):
+        try:
+            task = ExtractionTask(
+                config=config, output_schema=output_schema, files=[converted_file]
+            )
+            await run_extractions(
+                task=task,
+                rate_budget=rate_budget,
+                extractor=extractor,
+                on_result=add_result,
+            )
+        finally:
+            byte_budget.release(reservation)
+
+    def convert(file_path: Path):
+        return run_conversions(
+            conversion_task.model_copy(update={"file_paths": [file_path]})
+        )
+
+    extractions = []
+    # Cached payload fragments are copies of in-memory pages that the byte
+    # budget does not count. The extraction tasks inherit the context.
+    with uncached_payloads():
+        try:
+            for file_path in conversion_task.file_paths:
+                conversion_result = await asyncio.to_thread(convert, file_path)
+                for error in conversion_result.errors:
+                    add_result(ExtractedFile(file_path=str(file_path), error=error))
+                for converted_file in conversion_result.files:
+                    # Blocks while the budget is exhausted, extractions keep running.
+                    reservation = await asyncio.to_thread(
+                        byte_budget.admit, converted_file
+                    )
+                    extractions.append(
+                        asyncio.create_task(extract(converted_file, reservation))
+                    )
+                extractions = [t for t in extractions if not t.done()]
+            await asyncio.gather(*extractions)
+        finally:
+            for extraction in extractions:
+                extraction.cancel()
+
+    return ExtractionResult(
+        status="success",
+        duration=int((datetime.now() - start_time).total_seconds()),
+        files=extracted_files,
+        usage=sum((f.usage for f in extracted_files if f.usage), Usage()),
+    )
@@ -0,0 +1,141 @@
+import streamlit as st
+import json
+import math
+import numpy as np
+from pathlib import Path
+from datex.conversion.preconversion import PreconversionPool
+from datex.evaluation.pipeline import ComparisonTable
+
+
+@st.cache_resource
+def get_preconversion_pool() -> PreconversionPool:
+    """One background conversion pool for all pages and sessions."""
+    return PreconversionPool()
+
+
+def paginate(items: list, key: str, page_size: int = 20) -> list:
+    """Renders a page selector and returns the items of the selected page."""
+    n_pages = max(1, math.ceil(len(items) / page_size))
+    if n_pages == 1:
+        return items
+    # The page lives in the session state only, a default value next to it
+    # would make Streamlit warn whenever the clamp below sets it.
+    if key not in st.session_state:
+        st.session_state[key] = 1
+    # Filters can shrink the list below the page that was selected before.
+    elif st.session_state[key] > n_pages:
+        st.session_state[key] = n_pages
+
+    cols = st.columns([1, 3])
+    page = cols[0].number_input("Page", min_value=1, max_value=n_pages, step=1, key=key)
+    start = (page - 1) * page_size
+    cols[1].caption(
+        f"{start + 1}–{min(start + page_size, len(items))} of {len(items)} "
+        f"(page {page} of {n_pages})"
+    )
+    return items[start : start + page_size]
+
+
+def format_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def display_comparison(table: ComparisonTable, key: str, page_size: int = 50):
+    """
+    Displays the rows of a comparison table one page at a time, filtered by
+    file name, field and match status. Only the rows of the current page are
+    turned into widgets.
+    """
+    cols = st.columns([2, 3, 1])
+    file_filter = cols[0].text_input("File name contains", key=f"{key}_file")
+    field_names = [name for name, _ in table.fields]
+    selected_fields = cols[1].multiselect(
+        "Fields", field_names, key=f"{key}_fields", placeholder="All fields"
+    )
+    only_mismatches = cols[2].toggle("Only mismatches", key=f"{key}_mismatches")
+
+    mask = np.ones(len(table), dtype=bool)
+    if file_filter:
+        needle = file_filter.casefold()
+        doc_mask = np.array(
+            [needle in name.casefold() for name in table.documents], dtype=bool
+        )
+        mask &= doc_mask[table.doc_index]
+    if selected_fields:
+        field_mask = np.isin(field_names, selected_fields)
+        mask &= field_mask[table.field_index]
+    if only_mismatches:
+        mask &= table.exact != 1
+
+    rows = np.nonzero(mask)[0]
+    if not len(rows):
+        st.info("No rows match the filters.")
+        return
+
+    page_rows = paginate(rows, key=f"{key}_page", page_size=page_size)
+    st.dataframe(
+        [
+            {
+                "file": table.documents[table.doc_index[i]],
+                "field": field_names[table.field_index[i]],
+                "match": bool(table.exact[i] == 1),
+                "extracted": format_value(table.extracted[i]),
+                "expected": format_value(table.expected[i]),
+                "similarity": (
+                    None
+                    if math.isnan(table.similarity[i])
+                    else round(float(table.similarity[i]), 3)
+                ),
+                "error": table.errors.get(table.documents[table.doc_index[i]]),
+            }
+            for i in page_rows
+        ],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def display_extracted(files: dict[str, dict], key: str, page_size: int = 10):
+    """Displays extracted data without expected results, one page of files at a time."""
+    file_filter = st.text_input("File name contains", key=f"{key}_file")
+    names = sorted(name for name in files if file_filter.casefold() in name.casefold())
+    for name in paginate(names, key=f"{key}_page", page_size=page_size):
+        with st.expander(name):
+            st.json(files[name])
+
+
+def display_dataset_readiness(dataset_path: Path):
+    """Shows how many files of a dataset are converted, refreshing while conversions run."""
+
+    def readiness_indicator():
+        readiness = get_preconversion_pool().readiness(dataset_path)
+        if readiness.total == 0:
+            return
+        if readiness.ready:
+            st.success(f"Ready: all {readiness.total} files are converted.")
+        elif readiness.pending:
+            st.progress(
+                readiness.converted / readiness.total,
+                text=f"Converting in the background: "
+                f"{readiness.converted}/{readiness.total} files ready",
+            )
+        else:
+            st.info(
+                f"{readiness.converted}/{readiness.total} files converted. "
+                "The rest is converted when the run starts."
+            )
+        for error in readiness.failed:
+            st.error(error)
+        if st.session_state.get(f"{dataset_path}_converting") != bool(
+            readiness.pending
+        ):
+            # Start or stop polling.
+            st.session_state[f"{dataset_path}_converting"] = bool(readiness.pending)
+            st.rerun()
+
+    converting = st.session_state.get(f"{dataset_path}_converting", False)
+    st.fragment(run_every=1.0 if converting else None)(readiness_indicator)()
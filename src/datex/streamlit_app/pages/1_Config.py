@@ -1,6 +1,6 @@
 import streamlit as st
-import json
 from pathlib import Path
+from datex import jsonio
 from datex.extraction.schemas import Provider
 
 # Define the path to the config file
@@ -10,15 +10,13 @@ CONFIG_FILE = Path("config.json")
 # Function to load the config
 def load_config():
     if CONFIG_FILE.exists():
-        with open(CONFIG_FILE, "r") as f:
-            return json.load(f)
+        return jsonio.load(CONFIG_FILE)
     return {}
 
 
 # Function to save the config
 def save_config(config_data):
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config_data, f, indent=4)
+    jsonio.dump(config_data, CONFIG_FILE, indent=True)
 
 
 # Page title
@@ -1,44 +1,15 @@
 import streamlit as st
 from pathlib import Path
-import json
-from pydantic import create_model
-from typing import Dict, Any, Type, Tuple, List
 import copy
-
-type_map: Dict[str, Type[Any]] = {
-    "string": str,
-    "integer": int,
-    "number": float,
-    "boolean": bool,
-    "object": dict,
-}
-
-
-def parse_field(name: str, info: Dict[str, Any]) -> Tuple[str, Tuple[Any, Any]]:
-    """
-    Wandelt ein Schema-Feld in ein Tuple (Feldname, (Typ, Default)) um.
-    """
-    t = info["type"]
-    if t == "array":
-        items_info = info.get("items", {})
-        item_type_str = items_info.get("type")
-
-        if item_type_str == "object":
-            properties = items_info.get("properties", {})
-            nested_fields = {
-                prop_name: parse_field(prop_name, prop_info)[1]
-                for prop_name, prop_info in properties.items()
-            }
-            NestedModel = create_model(f"{name}Item", **nested_fields)  # type: ignore
-            py_type = List[NestedModel]
-        else:
-            item_type = type_map.get(item_type_str, Any)
-            py_type = List[item_type]
-    else:
-        py_type = type_map.get(t, Any)
-
-    default = ...
-    return name, (py_type, default)
+import hashlib
+from datex import jsonio
+from datex.manifest import update_manifest
+from datex.schema import compile_schema
+from datex.streamlit_app.components import (
+    display_dataset_readiness,
+    get_preconversion_pool,
+    paginate,
+)
 
 
 st.set_page_config(
@@ -126,6 +97,29 @@ def delete_file(file_path):
     file_path.unlink()
 
 
+def save_uploaded_files(dataset_path, uploaded_files):
+    """
+    Writes new uploads into the dataset, skipping files whose content is
+    already in it, and queues them for background conversion.
+    """
+    manifest = update_manifest(dataset_path=dataset_path)
+    saved, duplicates = 0, []
+    for uploaded_file in uploaded_files:
+        content = uploaded_file.getbuffer()
+        existing_name = manifest.find_by_hash(hashlib.sha256(content).hexdigest())
+        if existing_name == uploaded_file.name:
+            continue  # Saved on an earlier rerun
+        if existing_name:
+            duplicates.append((uploaded_file.name, existing_name))
+            continue
+        with open(dataset_path / uploaded_file.name, "wb") as f:
+            f.write(content)
+        saved += 1
+    if saved:
+        get_preconversion_pool().submit_dataset(dataset_path)
+    return saved, duplicates
+
+
 def update_selected_dataset():
     st.session_state.selected_dataset_name = st.session_state.dataset_selector
 
@@ -178,9 +172,9 @@ def save_schema(schema_file_path):
             "required": list(new_schema_dict.keys()),
             "additionalProperties": False,
         }
-        with open(schema_file_path, "w", encoding="utf-8") as f:
-            json.dump(final_schema, f, indent=2)
+        jsonio.dump(final_schema, schema_file_path, indent=True)
         st.success("Schema saved successfully!")
+        st.session_state.saved_output_schema = final_schema
         st.session_state.saved_schema_fields = copy.deepcopy(
             st.session_state.schema_fields
         )
@@ -278,12 +272,15 @@ if selected_dataset:
             key=f"uploader_{selected_dataset.name}",
         )
         if uploaded_files:
-            for uploaded_file in uploaded_files:
-                with open(selected_dataset / uploaded_file.name, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-            st.success(f"{len(uploaded_files)} file(s) uploaded successfully.")
+            saved, duplicates = save_uploaded_files(selected_dataset, uploaded_files)
+            if saved:
+                st.success(f"{saved} file(s) uploaded successfully.")
+            for name, existing_name in duplicates:
+                st.info(f"Skipped `{name}`: same content as `{existing_name}`.")
             # No need for manual rerun, Streamlit handles it
 
+        display_dataset_readiness(selected_dataset)
+
         st.markdown("---")
         files = list(selected_dataset.glob("*.pdf"))
         if not files:
@@ -305,41 +302,17 @@ if selected_dataset:
     output_schema_file_path = Path(selected_dataset / output_schema_file_name)
 
     # --- Pydantic Model Creation ---
-    current_schema_props = {}
-    if "saved_schema_fields" in st.session_state:
-        # Use the SAVED schema for the model
-        schema_fields_for_model = copy.deepcopy(
-            st.session_state.get("saved_schema_fields", [])
-        )
-
-        for field in schema_fields_for_model:
-            field_name = field.get("name")
-            if field_name:
-                field_props = field
-                del field_props["name"]
-                # Ensure properties are in dict format for parsing
-                if (
-                    field_props.get("type") == "array"
-                    and field_props.get("items", {}).get("type") == "object"
-                ):
-                    prop_list = field_props["items"].get("properties", [])
-                    field_props["items"]["properties"] = {
-                        p["prop_name"]: {
-                            "type": p.get("type"),
-                            "description": p.get("description"),
-                        }
-                        for p in prop_list
-                        if p.get("prop_name")
-                    }
-                current_schema_props[field_name] = field_props
+    # The model is compiled once per schema and reused across reruns.
+    if st.session_state.get("saved_output_schema_dataset") != selected_dataset.name:
+        st.session_state.saved_output_schema_dataset = selected_dataset.name
+        st.session_state.saved_output_schema = {}
+        if output_schema_file_path.exists():
+            st.session_state.saved_output_schema = jsonio.load(output_schema_file_path)
 
     OutputModel = None
-    if current_schema_props:
+    if st.session_state.saved_output_schema.get("properties"):
         try:
-            fields = dict(
-                parse_field(name, info) for name, info in current_schema_props.items()
-            )
-            OutputModel = create_model("OutputModel", **fields)  # type: ignore
+            OutputModel = compile_schema(st.session_state.saved_output_schema).model
         except Exception as e:
             st.error(f"Error creating data model from schema: {e}")
 
@@ -353,8 +326,7 @@ if selected_dataset:
         ):
             st.session_state.dataset_name = selected_dataset.name
             if output_schema_file_path.exists():
-                with open(output_schema_file_path, "r", encoding="utf-8") as f:
-                    loaded_schema = json.load(f)
+                loaded_schema = jsonio.load(output_schema_file_path)
                 schema_fields = []
                 for name, props in loaded_schema.get("properties", {}).items():
                     if (
@@ -495,19 +467,37 @@ if selected_dataset:
             or st.session_state.dataset_name != selected_dataset.name
         ):
             if expected_result_file_path.exists():
-                with open(expected_result_file_path, "r", encoding="utf-8") as f:
-                    st.session_state.expected_results = json.load(f)
+                st.session_state.expected_results = jsonio.load(
+                    expected_result_file_path
+                )
             else:
                 st.session_state.expected_results = {}
 
         if not OutputModel:
             st.info("Define a valid output schema to create expected results.")
         else:
-            pdf_files = [item.name for item in selected_dataset.glob("*.pdf")]
+            pdf_files = sorted(item.name for item in selected_dataset.glob("*.pdf"))
             for file_name in pdf_files:
                 if file_name not in st.session_state.expected_results:
                     st.session_state.expected_results[file_name] = {}
 
+            # Only one page of files is rendered as inputs.
+            f_cols = st.columns([3, 1])
+            file_filter = f_cols[0].text_input(
+                "File name contains", key="expected_results_file_filter"
+            )
+            only_empty = f_cols[1].toggle(
+                "Only files without results", key="expected_results_only_empty"
+            )
+            filtered_files = [
+                file_name
+                for file_name in pdf_files
+                if file_filter.casefold() in file_name.casefold()
+                and not (only_empty and st.session_state.expected_results[file_name])
+            ]
+            for file_name in paginate(
+                filtered_files, key="expected_results_page", page_size=10
+            ):
                 with st.expander(f"Edit results for: {file_name}", expanded=False):
                     current_data = st.session_state.expected_results[file_name]
                     for field_name, field_info in OutputModel.model_fields.items():
@@ -616,6 +606,9 @@ if selected_dataset:
 
             st.markdown("---")
             if st.button("Save Expected Results"):
-                with open(expected_result_file_path, "w", encoding="utf-8") as f:
-                    json.dump(st.session_state.expected_results, f, indent=2)
+                jsonio.dump(
+                    st.session_state.expected_results,
+                    expected_result_file_path,
+                    indent=True,
+                )
                 st.success("Expected results saved successfully!")
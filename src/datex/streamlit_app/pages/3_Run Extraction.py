@@ -1,190 +1,192 @@
 import streamlit as st
 from pathlib import Path
-import json
-import asyncio
-import shutil
-from datetime import datetime
-from datex.extraction import run_extractions
+from datex import jsonio
+from datex.background import BackgroundRun, RunRegistry
 from datex.extraction.schemas import ExtractionConfig
-from datex.conversion import run_conversions
+from datex.evaluation.pipeline import ComparisonTable, build_comparison_table
+from datex.evaluation.schemas import EvaluationResult, EvaluationTask
+from datex.extraction.schemas import ExtractionResult
+from datex.conversion.schemas import RenderSettings, RendererBackend
+from datex.manifest import update_manifest
+from datex.runs import RUN_STORE_FILE_NAME, RunStore, import_run_folders
+from datex.streamlit_app.components import (
+    display_comparison,
+    display_dataset_readiness,
+    display_extracted,
+)
 
 # --- Helper functions ---
 
 
 def load_config(path: Path) -> ExtractionConfig:
     """Loads extraction configuration from a JSON file."""
-    with open(path, "r") as file:
-        config_file = json.load(file)
+    config_file = jsonio.load(path)
     return ExtractionConfig.model_validate(config_file)
 
 
 def prepare_dataset(path: Path) -> list[Path]:
     """Returns a list of PDF paths in a dataset directory."""
-    pdf_paths = []
-    for file in path.iterdir():
-        if file.suffix == ".pdf":
-            pdf_paths.append(file)
-    return pdf_paths
-
-
-async def run_extraction_pipeline(
-    config: ExtractionConfig, output_schema_path: Path, dataset_path: Path
-):
-    """Runs the full conversion and extraction pipeline."""
-    pdf_paths = prepare_dataset(path=dataset_path)
-    if not pdf_paths:
-        return {}  # No files to process
-    conversion_result = run_conversions(paths=pdf_paths)
-    extraction_results = await run_extractions(
-        output_schema_path=output_schema_path,
-        config=config,
-        conversion_result=conversion_result,
-    )
-    return extraction_results
-
-
-def get_schema_fields(output_schema_path: Path) -> dict:
-    """Loads the output schema and returns its properties."""
-    if not output_schema_path.exists():
-        return {}
-    with open(output_schema_path, "r", encoding="utf-8") as f:
-        schema = json.load(f)
-    return schema.get("properties", {})
-
-
-def display_comparison_table(extracted_data, expected_data, schema_fields):
-    """Displays a side-by-side comparison table for a single file."""
-    st.markdown(
-        """
-    <style>
-    .stTable > table {
-        table-layout: auto;
-    }
-    .stTable th, .stTable td {
-        vertical-align: top;
-        border: 1px solid #444;
-        padding: 8px;
-    }
-    </style>
-    """,
-        unsafe_allow_html=True,
+    manifest = update_manifest(dataset_path=path)
+    return manifest.file_paths(dataset_path=path)
+
+
+def load_comparison_table(
+    dataset_path: Path, result: ExtractionResult
+) -> ComparisonTable | None:
+    """Compares a result with the expected results of the dataset, if there are any."""
+    expected_result_path = dataset_path / "expected_output.json"
+    if not expected_result_path.exists():
+        return None
+    expected_results = jsonio.load(expected_result_path)
+    output_schema = None
+    output_schema_path = dataset_path / "output_schema.json"
+    if output_schema_path.exists():
+        output_schema = jsonio.load(output_schema_path)
+    return build_comparison_table(
+        EvaluationTask(
+            extraction_result=result,
+            expected=expected_results,
+            output_schema=output_schema,
+        )
     )
 
-    header_cols = st.columns([1, 2, 2])
-    header_cols[0].markdown("**Field**")
-    header_cols[1].markdown("**Extracted Value**")
-    header_cols[2].markdown("**Expected Value**")
-    st.markdown("---")
-
-    for field, props in schema_fields.items():
-        row_cols = st.columns([1, 2, 2])
-        row_cols[0].markdown(f"**{field}**")
-
-        extracted_value = extracted_data.get(field)
-        expected_value = expected_data.get(field)
-
-        # Handle list comparisons
-        if props.get("type") == "array":
-            with row_cols[1]:
-                st.markdown("*List of items*")
-                if isinstance(extracted_value, list):
-                    for i, item in enumerate(extracted_value):
-                        st.markdown(f"**Item {i+1}**")
-                        if isinstance(item, (dict, list)):
-                            st.json(item)
-                        else:
-                            st.markdown(f"```{item}```")
-                        if i < len(extracted_value) - 1:
-                            st.markdown("---")
-                elif extracted_value is None:
-                    st.info("Not extracted.")
-                else:
-                    st.warning(
-                        f"Expected a list, but got: `{type(extracted_value).__name__}`"
-                    )
-                    st.json(extracted_value, expanded=True)
-
-            with row_cols[2]:
-                st.markdown("*List of items*")
-                if isinstance(expected_value, list):
-                    for i, item in enumerate(expected_value):
-                        st.markdown(f"**Item {i+1}**")
-                        if isinstance(item, (dict, list)):
-                            st.json(item)
-                        else:
-                            st.markdown(f"```{item}```")
-                        if i < len(expected_value) - 1:
-                            st.markdown("---")
-                elif expected_value is None:
-                    st.info("Not expected.")
-                else:
-                    st.warning(
-                        f"Expected a list, but got: `{type(expected_value).__name__}`"
-                    )
-                    st.json(expected_value, expanded=True)
-        else:
-            # Handle simple types
-            extracted_display = (
-                json.dumps(extracted_value, indent=2)
-                if isinstance(extracted_value, (dict))
-                else extracted_value
-            )
-            expected_display = (
-                json.dumps(expected_value, indent=2)
-                if isinstance(expected_value, (dict))
-                else expected_value
-            )
 
-            row_cols[1].markdown(
-                f"```\n{extracted_display}\n```"
-                if extracted_value is not None
-                else "N/A"
-            )
-            row_cols[2].markdown(
-                f"```\n{expected_display}\n```" if expected_value is not None else "N/A"
-            )
+@st.cache_resource
+def get_run_registry() -> RunRegistry:
+    """Background runs are shared by all sessions and survive reruns."""
+    return RunRegistry()
 
-        st.markdown("---")
+
+def display_metrics(evaluation_result: EvaluationResult):
+    """Displays the overall and per-field scores of a run."""
+    st.subheader("Metrics")
+    if evaluation_result.exact_match is not None:
+        st.metric("Exact match", f"{evaluation_result.exact_match:.1%}")
+    st.dataframe(
+        [field.model_dump() for field in evaluation_result.fields],
+        use_container_width=True,
+        hide_index=True,
+    )
 
 
-def display_results(extraction_results, expected_results, schema_fields):
-    """Displays extraction results, comparing with expected results if available."""
-    if not extraction_results and not expected_results:
-        st.info("There are no results to display.")
+def display_run_progress(run: BackgroundRun):
+    """Displays progress, throughput and the files finished so far of a run."""
+    files = run.snapshot()
+    if run.status == "converting":
+        st.progress(
+            run.converted / run.total,
+            text=f"Converting {run.converted}/{run.total} files...",
+        )
+    else:
+        st.progress(
+            len(files) / run.total,
+            text=f"Extracted {len(files)}/{run.total} files ({run.status})",
+        )
+    cols = st.columns(3)
+    cols[0].metric("Files done", f"{len(files)}/{run.total}")
+    cols[1].metric("Throughput", f"{run.files_per_minute:.1f} files/min")
+    cols[2].metric("Errors", sum(f.error is not None for f in files))
+
+    if run.finished:
+        if st.session_state.get("displayed_run_id") != run.id:
+            # Leave the fragment and render the final results once.
+            st.session_state.displayed_run_id = run.id
+            st.rerun()
         return
 
-    all_files = set(extraction_results.keys()) | set(
-        expected_results.keys() if expected_results else []
+    if st.button("Cancel Run"):
+        run.cancel()
+    st.dataframe(
+        [
+            {
+                "file": Path(f.file_path).name,
+                "status": "error" if f.error else "done",
+                "error": f.error,
+            }
+            for f in reversed(files)
+        ],
+        use_container_width=True,
+        hide_index=True,
     )
 
-    for file_name in sorted(list(all_files)):
-        with st.expander(f"Comparison for: {file_name}", expanded=True):
-            extracted = extraction_results.get(file_name, {})
-            expected = expected_results.get(file_name, {}) if expected_results else {}
-
-            if expected:
-                display_comparison_table(extracted, expected, schema_fields)
-            else:
-                st.markdown("#### Extracted Data (no expected output for comparison)")
-                st.json(extracted)
-
 
-def save_run_results(run_folder_path: Path, config_path: Path, results: dict):
-    """Saves the extraction results and config to a new folder."""
+def save_run_results(
+    dataset_path: Path,
+    config_path: Path,
+    result: ExtractionResult,
+    expected_results: dict | None,
+    output_schema: dict | None,
+):
+    """Saves the extraction result and config to the run store of the dataset."""
     try:
-        run_folder_path.mkdir(parents=True, exist_ok=True)
-        # Save the results
-        with open(
-            run_folder_path / "extraction_result.json", "w", encoding="utf-8"
-        ) as f:
-            json.dump(results, f, indent=2)
-        # Copy the config file
-        shutil.copy(config_path, run_folder_path / "config.json")
-        st.success(f"Run saved successfully to: `{run_folder_path}`")
+        config = jsonio.load(config_path)
+        with RunStore(dataset_path / RUN_STORE_FILE_NAME) as store:
+            run_id = store.save_run(
+                result=result,
+                config=config,
+                expected=expected_results,
+                output_schema=output_schema,
+            )
+        st.success(f"Run {run_id} saved to: `{dataset_path / RUN_STORE_FILE_NAME}`")
     except Exception as e:
         st.error(f"Failed to save run: {e}")
 
 
+def display_run_history(dataset_path: Path):
+    """Displays the stored runs of a dataset and the accuracy of a field over them."""
+    store_path = dataset_path / RUN_STORE_FILE_NAME
+    has_run_folders = (dataset_path / "runs").exists()
+    if not store_path.exists() and not has_run_folders:
+        return
+
+    with st.expander("Run history"):
+        with RunStore(store_path) as store:
+            if has_run_folders and st.button("Import run folders"):
+                expected_results, output_schema = None, None
+                if (dataset_path / "expected_output.json").exists():
+                    expected_results = jsonio.load(dataset_path / "expected_output.json")
+                if (dataset_path / "output_schema.json").exists():
+                    output_schema = jsonio.load(dataset_path / "output_schema.json")
+                run_ids = import_run_folders(
+                    store, dataset_path, expected_results, output_schema
+                )
+                st.success(f"Imported {len(run_ids)} runs.")
+
+            runs = store.list_runs(last=50)
+            if not runs:
+                st.info("No runs saved yet.")
+                return
+            st.dataframe(
+                [
+                    {
+                        "id": run.id,
+                        "name": run.name,
+                        "created_at": run.created_at,
+                        "files": run.files,
+                        "errors": run.errors,
+                        "exact_match": run.exact_match,
+                        "model": (run.config or {}).get("model_name"),
+                    }
+                    for run in runs
+                ],
+                use_container_width=True,
+                hide_index=True,
+            )
+
+            fields = store.fields()
+            if fields:
+                field = st.selectbox("Field accuracy over the last runs", fields)
+                accuracy = store.field_accuracy(field, last=50)
+                st.line_chart(
+                    {
+                        "created_at": [a.created_at for a in accuracy],
+                        "exact_match": [a.exact_match for a in accuracy],
+                    },
+                    x="created_at",
+                    y="exact_match",
+                )
+
+
 # --- Streamlit UI ---
 
 st.set_page_config(page_title="Run Extraction", layout="wide")
@@ -218,12 +220,21 @@ if selected_dataset_name:
                 st.write(f.name)
         else:
             st.info("No PDF files found in this dataset.")
+    display_dataset_readiness(selected_dataset_path)
+
+    renderers = [backend.value for backend in RendererBackend]
+    renderer = st.selectbox(
+        "PDF renderer",
+        renderers,
+        index=renderers.index(RenderSettings().renderer.value),
+        help="pdftoppm and pdf2image need poppler and fall back to pdfium if it is not installed.",
+    )
 
     # --- Run Extraction Button ---
+    registry = get_run_registry()
     if st.button("Run Extraction", use_container_width=True, type="primary"):
         config_path = Path("config.json")
         output_schema_path = selected_dataset_path / "output_schema.json"
-        expected_result_path = selected_dataset_path / "expected_output.json"
 
         # --- Pre-run Checks ---
         if not config_path.exists():
@@ -241,43 +252,64 @@ if selected_dataset_name:
             st.stop()
 
         try:
-            # --- Load Config and Expected Results ---
             config = load_config(path=config_path)
-            expected_results = None
-            if expected_result_path.exists():
-                with open(expected_result_path, "r", encoding="utf-8") as f:
-                    expected_results = json.load(f)
-
-            # --- Execute Pipeline ---
-            with st.spinner("Running extraction... This may take a while."):
-                extraction_results = asyncio.run(
-                    run_extraction_pipeline(
-                        config=config,
-                        output_schema_path=output_schema_path,
-                        dataset_path=selected_dataset_path,
-                    )
-                )
-
-            st.success("Extraction finished!")
-
-            # Store results in session state to allow saving
-            st.session_state.latest_run_results = extraction_results
-            st.session_state.latest_run_dataset_path = selected_dataset_path
-            st.session_state.latest_run_config_path = config_path
-            st.session_state.run_saved = False  # Reset save state for new run
+            output_schema = jsonio.load(output_schema_path)
+            run = registry.start(
+                config=config,
+                output_schema=output_schema,
+                file_paths=prepare_dataset(path=selected_dataset_path),
+                render_settings=RenderSettings(renderer=RendererBackend(renderer)),
+            )
+        except Exception as e:
+            st.error(f"Could not start the extraction: {e}")
+            st.exception(e)  # show traceback for debugging
+            st.stop()
 
-            # --- Display Results ---
-            st.header("Extraction Results")
-            schema_fields = get_schema_fields(output_schema_path)
-            if not schema_fields:
-                st.warning("Could not load schema fields. Displaying raw JSON.")
-                st.json(extraction_results)
+        st.session_state.active_run_id = run.id
+        st.session_state.latest_run_results = None
+        st.session_state.latest_run_dataset_path = selected_dataset_path
+        st.session_state.latest_run_config_path = config_path
+        st.session_state.run_saved = False  # Reset save state for new run
+
+    # --- Progress and Results ---
+    run = registry.get(st.session_state.get("active_run_id", ""))
+    if run and st.session_state.latest_run_dataset_path == selected_dataset_path:
+        st.header("Extraction Results")
+        st.fragment(run_every=None if run.finished else 1.0)(display_run_progress)(
+            run
+        )
+
+        if run.finished:
+            st.session_state.latest_run_results = run.result
+            if run.status == "failed":
+                st.error(f"An error occurred during extraction: {run.error}")
+            elif run.status == "cancelled":
+                st.warning("Extraction cancelled. Showing the files finished so far.")
             else:
-                display_results(extraction_results, expected_results, schema_fields)
+                st.success("Extraction finished!")
 
-        except Exception as e:
-            st.error(f"An error occurred during extraction: {e}")
-            st.exception(e)  # show traceback for debugging
+            # The comparison is computed once per run, pages only render a slice.
+            if st.session_state.get("comparison_run_id") != run.id:
+                st.session_state.comparison_run_id = run.id
+                st.session_state.comparison_table = load_comparison_table(
+                    selected_dataset_path, run.result
+                )
+            table: ComparisonTable | None = st.session_state.comparison_table
+
+            if table is not None:
+                display_metrics(table.evaluation_result())
+                st.subheader("Comparison")
+                display_comparison(table, key="comparison")
+
+            compared = set(table.documents) if table is not None else set()
+            uncompared = {
+                Path(f.file_path).name: f.data or {"error": f.error}
+                for f in run.result.files
+                if Path(f.file_path).name not in compared
+            }
+            if uncompared:
+                st.subheader("Extracted Data (no expected output for comparison)")
+                display_extracted(uncompared, key="extracted")
 
     # --- Save Run Section ---
     if (
@@ -287,15 +319,21 @@ if selected_dataset_name:
     ):
         st.markdown("---")
         if st.button("Save Current Run"):
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            run_folder_path = (
-                st.session_state.latest_run_dataset_path / "runs" / timestamp
-            )
+            dataset_path = st.session_state.latest_run_dataset_path
+            expected_results, output_schema = None, None
+            if (dataset_path / "expected_output.json").exists():
+                expected_results = jsonio.load(dataset_path / "expected_output.json")
+            if (dataset_path / "output_schema.json").exists():
+                output_schema = jsonio.load(dataset_path / "output_schema.json")
 
             save_run_results(
-                run_folder_path=run_folder_path,
+                dataset_path=dataset_path,
                 config_path=st.session_state.latest_run_config_path,
-                results=st.session_state.latest_run_results,
+                result=st.session_state.latest_run_results,
+                expected_results=expected_results,
+                output_schema=output_schema,
             )
             st.session_state.run_saved = True
             st.rerun()
+
+    display_run_history(selected_dataset_path)
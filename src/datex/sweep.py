@@ -0,0 +1,218 @@
+from dotenv import load_dotenv
+from pathlib import Path
+from typing import Any
+import argparse
+import asyncio
+import itertools
+import re
+from datetime import datetime
+from datex.main import (
+    add_renderer_argument,
+    dir_path,
+    file_path,
+    prepare_dataset,
+    render_settings,
+)
+from datex.extraction import run_extractions
+from datex.extraction.limits import RateBudget
+from datex.extraction.schemas import ExtractionConfig, ExtractionResult, ExtractionTask
+from datex.conversion import run_conversions
+from datex.conversion.schemas import ConversionTask, RenderSettings
+from datex.conversion.strategies import ConversionStrategy
+from datex.extraction.results import BINARY_RESULT_SUFFIX, save_result
+from datex.runs import RUN_STORE_FILE_NAME, RunStore
+from datex import jsonio
+
+load_dotenv()
+
+
+def config_name(overrides: dict[str, Any]) -> str:
+    """Builds a file system friendly name like 'model_name=gpt-4.1__temperature=0.1'."""
+    if not overrides:
+        return "base"
+    name = "__".join(f"{key}={value}" for key, value in overrides.items())
+    return re.sub(r"[^\w.=-]+", "_", name)
+
+
+def expand_grid(
+    base_config: dict[str, Any], grid: dict[str, list[Any]] | list[dict[str, Any]]
+) -> dict[str, ExtractionConfig]:
+    """
+    Expands a grid into named configs.
+
+    Args:
+        base_config: The config values shared by all configs.
+        grid: Either a mapping of config keys to lists of values, whose cartesian
+            product is taken, or an explicit list of overrides.
+
+    Returns:
+        A mapping of config names to validated ExtractionConfigs.
+    """
+    if isinstance(grid, dict):
+        keys = list(grid)
+        overrides = [
+            dict(zip(keys, values))
+            for values in itertools.product(*(grid[key] for key in keys))
+        ]
+    else:
+        overrides = grid
+
+    configs = {}
+    for override in overrides:
+        name = config_name(override)
+        if name in configs:
+            raise ValueError(f"Duplicate config in grid: {name}")
+        configs[name] = ExtractionConfig.model_validate({**base_config, **override})
+    return configs
+
+
+async def run_sweep(
+    configs: dict[str, ExtractionConfig],
+    output_schema: dict[str, Any],
+    dataset_path: Path,
+    max_concurrency: int | None = None,
+    requests_per_minute: float | None = None,
+    render_settings: RenderSettings | None = None,
+) -> dict[str, ExtractionResult]:
+    """
+    Converts the dataset once and extracts it with every config concurrently.
+
+    Args:
+        configs: Named configs to compare.
+        output_schema: The output schema used by every config.
+        dataset_path: Directory containing the PDFs.
+        max_concurrency: Concurrent requests across all configs.
+        requests_per_minute: Requests per minute across all configs.
+        render_settings: How the PDFs are rendered.
+
+    Returns:
+        A mapping of config names to their ExtractionResults.
+    """
+    conversion_task = ConversionTask(
+        file_paths=prepare_dataset(path=dataset_path),
+        strategy=ConversionStrategy.PDF2IMG,
+        render_settings=render_settings or RenderSettings(),
+        requested_at=datetime.now(),
+    )
+    conversion_result = run_conversions(conversion_task)
+
+    rate_budget = RateBudget(
+        max_concurrency=max_concurrency, requests_per_minute=requests_per_minute
+    )
+    results = await asyncio.gather(
+        *[
+            run_extractions(
+                task=ExtractionTask(
+                    config=config,
+                    output_schema=output_schema,
+                    files=conversion_result.files,
+                ),
+                rate_budget=rate_budget,
+            )
+            for config in configs.values()
+        ]
+    )
+    return dict(zip(configs, results))
+
+
+def save_sweep_results(
+    sweep_folder_path: Path,
+    configs: dict[str, ExtractionConfig],
+    results: dict[str, ExtractionResult],
+    binary: bool = False,
+):
+    """
+    Stores every config and its result in a subfolder named after the config.
+    With `binary`, results are written in the compact .dtxr format.
+    """
+    suffix = BINARY_RESULT_SUFFIX if binary else ".json"
+    for name, result in results.items():
+        run_folder_path = sweep_folder_path / name
+        run_folder_path.mkdir(parents=True, exist_ok=True)
+        save_result(run_folder_path / f"extraction_result{suffix}", result)
+        jsonio.dump(
+            configs[name].model_dump(mode="json", exclude={"api_key"}),
+            run_folder_path / "config.json",
+            indent=True,
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Extract one dataset with a grid of configs."
+    )
+    parser.add_argument("config_path", type=file_path)
+    parser.add_argument(
+        "grid_path",
+        type=file_path,
+        help="JSON object of config keys to value lists, or a list of overrides.",
+    )
+    parser.add_argument("output_schema_path", type=file_path)
+    parser.add_argument("dataset_path", type=dir_path)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--requests-per-minute", type=float, default=None)
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=None,
+        help="Additionally export every result into this folder.",
+    )
+    parser.add_argument(
+        "--export-format",
+        choices=["json", "binary"],
+        default="json",
+        help="Format of the exported results, binary is the compact .dtxr format.",
+    )
+    add_renderer_argument(parser)
+
+    args = parser.parse_args()
+    base_config = jsonio.load(args.config_path)
+    grid = jsonio.load(args.grid_path)
+    output_schema = jsonio.load(args.output_schema_path)
+
+    configs = expand_grid(base_config, grid)
+    results = await run_sweep(
+        configs=configs,
+        output_schema=output_schema,
+        dataset_path=args.dataset_path,
+        max_concurrency=args.max_concurrency,
+        requests_per_minute=args.requests_per_minute,
+        render_settings=render_settings(args),
+    )
+
+    expected = None
+    expected_result_path = args.dataset_path / "expected_output.json"
+    if expected_result_path.exists():
+        expected = jsonio.load(expected_result_path)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    store_path = args.dataset_path / RUN_STORE_FILE_NAME
+    with RunStore(store_path) as store:
+        for name, result in results.items():
+            store.save_run(
+                result=result,
+                config=configs[name].model_dump(mode="json"),
+                expected=expected,
+                output_schema=output_schema,
+                name=f"{timestamp}_sweep/{name}",
+            )
+    if args.output_dir:
+        save_sweep_results(
+            args.output_dir,
+            configs,
+            results,
+            binary=args.export_format == "binary",
+        )
+
+    for name, result in results.items():
+        errors = sum(f.error is not None for f in result.files)
+        print(f"{name}: {len(result.files)} files, {errors} errors")
+    print(f"Results saved to {store_path}")
+
+
+def cli():
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,37 @@
+from datex.evaluation.pipeline import run_evaluation
+from datex.evaluation.schemas import EvaluationTask
+from datex.extraction.schemas import ExtractedFile, ExtractionResult
+
+EXPECTED = {"a.pdf": {"name": "ACME", "note": None, "items": []}}
+
+
+def evaluate(files: list[ExtractedFile]):
+    result = ExtractionResult(status="success", duration=0, files=files)
+    return run_evaluation(EvaluationTask(extraction_result=result, expected=EXPECTED))
+
+
+def test_invalid_answer_is_scored_on_its_data():
+    evaluation = evaluate(
+        [
+            ExtractedFile(
+                file_path="a.pdf",
+                data=EXPECTED["a.pdf"],
+                error="Output does not match the schema",
+                invalid=True,
+            )
+        ]
+    )
+    assert evaluation.exact_match == 1.0
+    assert evaluation.documents[0].error == "Output does not match the schema"
+
+
+def test_failed_document_misses_every_field():
+    evaluation = evaluate([ExtractedFile(file_path="a.pdf", error="timeout")])
+    assert evaluation.exact_match == 0.0
+    assert evaluation.documents[0].error == "timeout"
+
+
+def test_missing_document_misses_every_field():
+    evaluation = evaluate([])
+    assert evaluation.exact_match == 0.0
+    assert all(field.recall in (None, 0.0) for field in evaluation.fields)